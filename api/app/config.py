@@ -10,18 +10,54 @@ class Settings(BaseSettings):
     # PiDog
     mock_hardware: bool = False
     pidog_sound_dir: str = "sounds/"
+    sound_cache_dir: str = "~/.cache/pidog/sounds"  # transcoded WAVs, keyed by content hash
 
     # Safety
     min_battery_voltage: float = 6.5
     max_action_rate: int = 10  # per second
 
+    # Battery sampling (see services/battery_sampler.py)
+    battery_sample_interval_s: float = 2.0   # background ADC read period
+    battery_ema_alpha: float = 0.3           # EMA weight of each new reading
+    battery_max_staleness_s: float = 10.0    # older cache forces a direct read
+
+    # Ultrasonic distance history (see services/distance_filter.py)
+    distance_stale_s: float = 0.5        # history older than this is reported stale
+    distance_outlier_k: float = 3.0      # Hampel threshold in scaled MADs
+    distance_filter_window: int = 7      # samples behind the filtered /sensors reading
+
     # Sensor streaming
-    sensor_broadcast_hz: float = 5.0
+    sensor_broadcast_hz: float = 5.0    # default for clients that don't ask for a rate
+    ws_max_rate_hz: float = 60.0        # cap on per-client requested rates
     status_broadcast_hz: float = 0.2
+    sensor_on_change: bool = True        # publish sensors/action_status only on change
+    sensor_keyframe_s: float = 5.0      # full snapshot at least this often when on-change
+    sensor_deadband_imu_deg: float = 0.2
+    sensor_deadband_distance_cm: float = 1.0
+    ws_send_timeout_s: float = 0.25     # per-client deadline for each WebSocket send
+    ws_max_slow_strikes: int = 3        # consecutive misses before downgrade, then eviction
+    ws_queue_size: int = 100            # per-client bound for queued logs / status messages
+    ws_log_flush_ms: int = 100          # log lines are streamed in batches at most this often
+    ws_log_batch_size: int = 50         # ... or as soon as this many are waiting
+
+    # Streamed head setpoints (see services/head_streamer.py)
+    head_stream_jitter_ms: float = 40.0   # playout delay behind client timestamps; 0 = none
+
+    # Sensor history for dashboards (see services/sensor_history.py)
+    history_enabled: bool = True
+    history_sample_hz: float = 5.0
 
     # STT (Whisper endpoint)
     stt_url: str = "http://localhost:5000/transcribe"
 
+    # Text-to-speech (see services/tts.py)
+    tts_engine: str = "piper"                  # piper or tone (stand-in beeps)
+    tts_voice: str = "en_US-lessac-medium"     # Piper voice model name
+    piper_binary: str = "piper"
+    piper_model_dir: str = "~/.local/share/piper"
+    tts_cache_dir: str = "~/.cache/pidog/tts"  # one WAV per phrase
+    tts_memory_cache_bytes: int = 8 * 1024 * 1024
+
     # LLM - Ollama
     ollama_url: str = "http://localhost:11434"
     ollama_model: str = "llama3.2:3b"
@@ -40,6 +76,7 @@ class Settings(BaseSettings):
     # Camera (requires vilib + picamera2 on real hardware)
     camera_enabled: bool = False  # auto-start on boot when True
     camera_fps: int = 15          # target frame rate for the MJPEG stream
+    camera_encode_workers: int = 2  # JPEG encode threads, off the event loop
     camera_vflip: bool = False    # vertical flip
     camera_hflip: bool = False    # horizontal flip
 
@@ -53,6 +90,7 @@ class Settings(BaseSettings):
     idle_rgb_color: str = "cyan"        # RGB color while awaiting commands
     idle_rgb_bps: float = 0.5           # breath speed (beats per second)
     idle_rgb_brightness: float = 0.7    # brightness 0-1
+    idle_rgb_offload: bool = False      # let the LED driver run the idle breath itself
 
     # Head oscillation detection (see services/head_monitor.py)
     head_oscillation_enabled: bool = True
@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
+from pathlib import Path
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
@@ -13,10 +15,15 @@ from .config import settings
 from .routers import actions, agent, camera, logs, rgb, sensors, servos, sound, status
 from .services.camera_service import CameraService
 from .services.head_monitor import HeadOscillationMonitor
+from .services.head_streamer import HeadStreamer
 from .services.idle_animator import IdleAnimator
 from .services.log_handler import BufferedLogHandler
 from .services.pidog_service import PidogService
 from .services.safety import SafetyValidator
+from .services.sensor_history import SensorHistory
+from .services.sound_catalog import SoundCatalog, sound_dir_path
+from .services.tts import TTSService
+from .websocket.commands import CommandHandler
 from .websocket.manager import ConnectionManager, SensorStream
 
 # --- Logging setup ---
@@ -79,43 +86,76 @@ async def lifespan(app: FastAPI):
         min_battery_voltage=settings.min_battery_voltage,
         max_action_rate=settings.max_action_rate,
     )
-    ws_manager = ConnectionManager()
+    head_streamer = HeadStreamer(pidog_service, settings)
+    ws_manager = ConnectionManager(
+        send_timeout_s=settings.ws_send_timeout_s,
+        max_slow_strikes=settings.ws_max_slow_strikes,
+        queue_size=settings.ws_queue_size,
+        default_rate_hz=settings.sensor_broadcast_hz,
+        max_rate_hz=settings.ws_max_rate_hz,
+        commands=CommandHandler(pidog_service, safety, head_streamer),
+    )
     sensor_stream = SensorStream(
         pidog_service,
         ws_manager,
-        sensor_hz=settings.sensor_broadcast_hz,
         status_hz=settings.status_broadcast_hz,
+        on_change=settings.sensor_on_change,
+        keyframe_s=settings.sensor_keyframe_s,
+        deadbands={
+            "distance": settings.sensor_deadband_distance_cm,
+            "imu.pitch": settings.sensor_deadband_imu_deg,
+            "imu.roll": settings.sensor_deadband_imu_deg,
+        },
     )
     camera_service = CameraService()
     head_monitor = HeadOscillationMonitor(pidog_service, settings)
     idle_animator = IdleAnimator(pidog_service, settings)
+    sensor_history = SensorHistory(pidog_service, head_monitor, settings)
+    sound_catalog = SoundCatalog(
+        sound_dir_path(settings.pidog_sound_dir), Path(settings.sound_cache_dir).expanduser(),
+        library=pidog_service.sound_library,
+    )
 
     # Optional dedicated log file for head monitor (DEBUG-level detail)
     if settings.head_oscillation_log_file:
         _setup_head_log_file(settings.head_oscillation_log_file)
 
     # Connect log handler to WebSocket manager
-    log_handler.set_ws_manager(ws_manager)
+    log_handler.set_ws_manager(
+        ws_manager,
+        flush_interval_s=settings.ws_log_flush_ms / 1000,
+        batch_size=settings.ws_log_batch_size,
+    )
 
     # Store in app state for dependency injection
     app.state.pidog = pidog_service
     app.state.safety = safety
+    app.state.head_streamer = head_streamer
     app.state.ws_manager = ws_manager
     app.state.sensor_stream = sensor_stream
     app.state.log_handler = log_handler
     app.state.camera = camera_service
     app.state.head_monitor = head_monitor
     app.state.idle_animator = idle_animator
-
-    # Start sensor streaming, head monitor, and idle animator
+    app.state.sensor_history = sensor_history
+    app.state.sound_catalog = sound_catalog
+    tts_service = TTSService(pidog_service, settings)
+    app.state.tts = tts_service
+
+    # Start battery sampling, head setpoint streaming, log and sensor
+    # streaming, head monitor, idle animator, and history recorder
+    pidog_service.battery_sampler.start()
+    head_streamer.start()
+    log_handler.start()
     sensor_stream.start()
     head_monitor.start()
     idle_animator.start()
+    sensor_history.start()
 
     # Auto-start camera if configured
     if settings.camera_enabled:
         try:
-            camera_service.start()
+            await asyncio.to_thread(camera_service.start)
         except Exception:
             logger.warning("Camera auto-start failed — use POST /camera/start to retry")
 
@@ -129,10 +169,14 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down PiDog API...")
+    await tts_service.stop()
+    sensor_history.stop()
     idle_animator.stop()
     head_monitor.stop()
     camera_service.stop()
     sensor_stream.stop()
+    log_handler.stop()
+    head_streamer.stop()
     pidog_service.close()
     logger.info("PiDog API shutdown complete")
 
@@ -7,6 +7,7 @@ class ChatRequest(BaseModel):
         None, description="LLM provider: 'ollama' or 'openrouter'"
     )
     model: str | None = Field(None, description="Model name override")
+    speak: bool = Field(False, description="Speak the answer on the robot's speaker (TTS)")
 
     model_config = {
         "json_schema_extra": {
@@ -14,6 +15,7 @@ class ChatRequest(BaseModel):
                 "message": "Wag your tail and bark",
                 "provider": "ollama",
                 "model": None,
+                "speak": True,
             }
         }
     }
@@ -25,6 +27,31 @@ class ChatResponse(BaseModel):
     transcription: str | None = Field(
         None, description="Speech transcription (voice endpoint only)"
     )
+    spoken: bool = Field(False, description="Answer is being spoken (speak=true)")
+
+
+class SpeakRequest(BaseModel):
+    text: str = Field(..., min_length=1, max_length=1000, description="Text to speak")
+    voice: str | None = Field(None, description="TTS voice override")
+
+
+class SpeakResponse(BaseModel):
+    phrases: int
+    cached_phrases: int = Field(description="Phrases played from the TTS cache")
+    played: bool = Field(description="False if no audio channel was available")
+    first_audio_ms: float | None = Field(description="Time until the first audio reached the mixer")
+    duration_s: float
+
+
+class TTSStatus(BaseModel):
+    engine: str
+    voice: str
+    entries: int
+    bytes: int
+    max_bytes: int
+    memory_hits: int
+    disk_hits: int
+    misses: int
 
 
 class VisionRequest(BaseModel):
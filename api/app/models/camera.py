@@ -7,3 +7,11 @@ class CameraStatus(BaseModel):
     fps: int = Field(..., description="Target frame rate for the MJPEG stream")
     vflip: bool = Field(..., description="Vertical flip enabled")
     hflip: bool = Field(..., description="Horizontal flip enabled")
+    frame_seq: int | None = Field(None, description="Sequence number of the latest encoded frame")
+    frames_encoded: int = Field(0, description="Frames JPEG-encoded by the capture worker")
+    frames_skipped: int = Field(0, description="Frames not encoded because every encoder was busy")
+    avg_encode_ms: float | None = Field(None, description="Mean JPEG encode time per frame")
+    stream_clients: int = Field(0, description="Open MJPEG stream connections")
+    tiers: dict[str, dict] = Field(
+        default_factory=dict, description="Per encoding tier: size, quality, clients, frames, mean size"
+    )
@@ -3,13 +3,20 @@ from pydantic import BaseModel, Field
 
 class RGBModeRequest(BaseModel):
     style: str = Field(
-        ..., description="Animation style: monochromatic, breath, boom, bark, speak, listen"
+        ...,
+        description="Animation style: monochromatic, breath, boom, bark, speak, listen, "
+        "or the name of an uploaded clip",
     )
     color: str | list[int] = Field(
         ..., description="Color name (e.g. 'cyan') or [R, G, B] array"
     )
     bps: float = Field(default=1.0, gt=0, le=10, description="Beats per second")
     brightness: float = Field(default=1.0, ge=0, le=1, description="Brightness 0-1")
+    offload: bool = Field(
+        default=False,
+        description="Let the LED driver run monochromatic/breath itself instead of "
+        "streaming frames over I2C",
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -23,6 +30,60 @@ class RGBModeRequest(BaseModel):
     }
 
 
+class RGBKeyframe(BaseModel):
+    t: float = Field(..., ge=0, description="Seconds from clip start")
+    color: str | list[int] = Field(..., description="Color name or [R, G, B] array")
+
+
+class RGBTrack(BaseModel):
+    leds: list[int] | None = Field(
+        default=None, description="LED indices 0-10 this track drives (all if omitted)"
+    )
+    keyframes: list[RGBKeyframe] = Field(
+        ..., min_length=1, description="Colors linearly interpolated between keyframes"
+    )
+
+
+class RGBClipRequest(BaseModel):
+    name: str = Field(..., pattern=r"^[a-z0-9_-]{1,32}$", description="Clip name")
+    tracks: list[RGBTrack] | None = Field(
+        default=None, description="Keyframed color tracks; later tracks override earlier ones"
+    )
+    duration_s: float | None = Field(
+        default=None, gt=0, le=60,
+        description="Clip length for tracks (default: last keyframe, at least one frame)",
+    )
+    frames: list[list[list[int]]] | None = Field(
+        default=None,
+        description="Raw frames, each 11 [R, G, B] values, played one per 50 ms",
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "name": "police",
+                "tracks": [
+                    {"leds": [0, 1, 2, 3, 4], "keyframes": [
+                        {"t": 0.0, "color": "red"}, {"t": 0.25, "color": "black"},
+                        {"t": 0.5, "color": "red"},
+                    ]},
+                    {"leds": [6, 7, 8, 9, 10], "keyframes": [
+                        {"t": 0.0, "color": "black"}, {"t": 0.25, "color": "blue"},
+                        {"t": 0.5, "color": "black"},
+                    ]},
+                ],
+            }
+        }
+    }
+
+
+class RGBClipInfo(BaseModel):
+    name: str
+    frames: int
+    duration_s: float
+    bytes: int
+
+
 RGB_STYLES = ["monochromatic", "breath", "boom", "bark", "speak", "listen"]
 
 RGB_COLORS = {
@@ -24,3 +24,33 @@ class TouchReading(BaseModel):
 class SoundReading(BaseModel):
     direction: int = Field(description="Direction in degrees (0-355), -1 if none")
     detected: bool = Field(description="Whether sound was detected")
+
+
+class DistanceSample(BaseModel):
+    timestamp: float = Field(description="Unix time the sample was taken")
+    distance: float = Field(description="Raw distance in cm (negative on read error)")
+    valid: bool = Field(description="False for read errors and rejected outliers")
+
+
+class DistanceHistory(BaseModel):
+    samples: list[DistanceSample] = Field(description="Recent samples, oldest first")
+    median: float | None = Field(description="Median of non-error samples in cm")
+    filtered: float | None = Field(description="Mean of samples after outlier rejection in cm")
+    rejected: int = Field(description="Samples dropped as errors or outliers")
+    age_s: float | None = Field(description="Seconds since the newest sample")
+    stale: bool = Field(description="True when the ultrasonic process has stopped updating")
+
+
+class HistorySeries(BaseModel):
+    t: list[float] = Field(description="Sample or bucket start times (unix seconds)")
+    value: list[float] = Field(description="Sample value or bucket mean")
+    min: list[float] | None = Field(None, description="Bucket minimum (minmax only)")
+    max: list[float] | None = Field(None, description="Bucket maximum (minmax only)")
+
+
+class SensorHistoryResponse(BaseModel):
+    start: float
+    end: float
+    method: str = Field(description="lttb, minmax, or raw")
+    resolution_s: float = Field(description="Resolution of the tier the data was read from")
+    series: dict[str, HistorySeries]
@@ -14,6 +14,15 @@ class HeadCommand(BaseModel):
     }
 
 
+class HeadStreamCommand(HeadCommand):
+    """A streamed head setpoint (WebSocket `head_stream`)."""
+
+    speed: int = Field(default=100, ge=0, le=100)
+    t: float | None = Field(
+        default=None, description="Client send time in Unix seconds, for the jitter buffer and latency"
+    )
+
+
 class LegsCommand(BaseModel):
     angles: list[float] = Field(
         ..., min_length=8, max_length=8, description="8 servo angles for all legs"
@@ -4,28 +4,51 @@ from pydantic import BaseModel, Field
 class SoundPlayRequest(BaseModel):
     name: str = Field(..., description="Sound file name (without extension)")
     volume: int = Field(default=80, ge=0, le=100, description="Playback volume 0-100")
+    priority: int | None = Field(
+        default=None, ge=0, le=2,
+        description="Mixer priority 0 low, 1 normal, 2 high. When all channels are busy "
+        "the sound replaces the lowest-priority one at or below it. Default: low for "
+        "howling/snoring/pant, normal otherwise",
+    )
 
     model_config = {
-        "json_schema_extra": {"example": {"name": "single_bark_1", "volume": 80}}
+        "json_schema_extra": {"example": {"name": "single_bark_1", "volume": 80, "priority": 2}}
     }
 
 
+class SoundStopRequest(BaseModel):
+    voice: int | None = Field(default=None, description="Voice id to stop (all if omitted)")
+
+
+class SoundVoice(BaseModel):
+    id: int
+    channel: int
+    name: str
+    priority: int
+    volume: int
+    elapsed: float = Field(description="Seconds since the voice started")
+
+
+class SoundMixerStatus(BaseModel):
+    voices: list[SoundVoice]
+    channels: int
+    busy: int
+    played: int
+    stolen: int = Field(description="Voices cut off to make room for a sound of equal/higher priority")
+    dropped: int = Field(description="Sounds not played: every channel held a higher priority")
+
+
 class SoundInfo(BaseModel):
     name: str
     format: str = Field(description="File format: mp3 or wav")
 
 
-SOUND_FILES = [
-    SoundInfo(name="angry", format="wav"),
-    SoundInfo(name="confused_1", format="mp3"),
-    SoundInfo(name="confused_2", format="mp3"),
-    SoundInfo(name="confused_3", format="mp3"),
-    SoundInfo(name="growl_1", format="mp3"),
-    SoundInfo(name="growl_2", format="mp3"),
-    SoundInfo(name="howling", format="mp3"),
-    SoundInfo(name="pant", format="mp3"),
-    SoundInfo(name="single_bark_1", format="mp3"),
-    SoundInfo(name="single_bark_2", format="mp3"),
-    SoundInfo(name="snoring", format="mp3"),
-    SoundInfo(name="woohoo", format="mp3"),
-]
+class SoundLibraryEntry(SoundInfo):
+    duration_s: float | None = Field(description="Length in seconds, from the file header")
+    sample_rate: int | None = None
+    channels: int | None = None
+    bytes: int = Field(description="Source file size")
+    transcoded: bool | None = Field(
+        None, description="Compressed sources: PCM copy already in the WAV cache"
+    )
+
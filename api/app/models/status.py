@@ -6,6 +6,7 @@ from .servos import ServoPositions
 class BatteryInfo(BaseModel):
     voltage: float = Field(description="Battery voltage")
     low: bool = Field(description="True if below minimum threshold")
+    age_s: float | None = Field(None, description="Seconds since the cached reading was sampled")
 
 
 class RobotStatus(BaseModel):
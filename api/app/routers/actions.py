@@ -40,7 +40,7 @@ async def execute_actions(body: ActionRequest, request: Request):
     service = _get_service(request)
 
     safety.check_rate_limit()
-    safety.validate_actions(body.actions)
+    safety.validate_actions(body.actions, rgb_clips=service.get_rgb_clips())
     safety.validate_speed(body.speed)
     safety.validate_battery(service.get_battery().voltage)
 
@@ -1,4 +1,4 @@
-"""AI agent endpoints: chat, voice, vision, skill document, provider listing."""
+"""AI agent endpoints: chat, voice, vision, speech, skill document, provider listing."""
 
 from __future__ import annotations
 
@@ -10,9 +10,19 @@ from pathlib import Path
 from fastapi import APIRouter, HTTPException, Request, UploadFile
 
 from ..config import settings
-from ..models.agent import ChatRequest, ChatResponse, ProviderInfo, VisionRequest, VisionResponse
+from ..models.agent import (
+    ChatRequest,
+    ChatResponse,
+    ProviderInfo,
+    SpeakRequest,
+    SpeakResponse,
+    TTSStatus,
+    VisionRequest,
+    VisionResponse,
+)
 from ..services.llm_provider import get_provider
 from ..services.safety import ACTION_CATALOG, SafetyValidator
+from ..services.tts import TTSService
 
 logger = logging.getLogger("pidog.agent")
 
@@ -102,6 +112,13 @@ async def agent_chat(body: ChatRequest, request: Request):
 
     actions, answer = _extract_actions(response_text)
 
+    # Start speaking before queueing actions: time-to-first-audio matters more
+    spoken = False
+    if body.speak and answer.strip():
+        tts: TTSService = request.app.state.tts
+        tts.speak_background(answer)
+        spoken = True
+
     # Validate and execute any extracted actions
     executed = []
     if actions:
@@ -115,7 +132,7 @@ async def agent_chat(body: ChatRequest, request: Request):
                 logger.warning(f"Action execution failed: {e}")
                 answer += f" (Action error: {e})"
 
-    return ChatResponse(answer=answer, actions=executed)
+    return ChatResponse(answer=answer, actions=executed, spoken=spoken)
 
 
 @router.post("/voice", response_model=ChatResponse)
@@ -285,6 +302,26 @@ async def agent_vision(body: VisionRequest, request: Request):
     return VisionResponse(description=description, answer=answer, actions=executed)
 
 
+@router.post("/speak", response_model=SpeakResponse)
+async def agent_speak(body: SpeakRequest, request: Request):
+    """Speak text through TTS. Phrases already synthesized play from the cache.
+
+    Returns once all audio is queued on the speaker, with time-to-first-audio.
+    """
+    tts: TTSService = request.app.state.tts
+    try:
+        return await tts.speak(body.text, voice=body.voice)
+    except (OSError, RuntimeError) as e:
+        logger.error(f"TTS error: {e}")
+        raise HTTPException(status_code=503, detail=f"TTS engine '{tts.engine.name}' failed: {e}")
+
+
+@router.get("/tts", response_model=TTSStatus)
+async def tts_status(request: Request):
+    """TTS engine, voice and phrase-cache statistics."""
+    return request.app.state.tts.stats()
+
+
 @router.get("/skill")
 async def get_skill():
     """Return the agent skill document (for AI consumption)."""
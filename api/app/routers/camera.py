@@ -3,13 +3,14 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from typing import AsyncGenerator
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import Response, StreamingResponse
 
 from ..models.camera import CameraStatus
-from ..services.camera_service import CameraService
+from ..services.camera_service import TIERS, AdaptiveTier, CameraService, Frame
 
 router = APIRouter(prefix="/camera", tags=["Camera"])
 
@@ -18,19 +19,76 @@ def _get_camera(request: Request) -> CameraService:
     return request.app.state.camera
 
 
-async def _mjpeg_generator(camera: CameraService) -> AsyncGenerator[bytes, None]:
-    frame_delay = 1.0 / camera.target_fps
+def _status(camera: CameraService) -> CameraStatus:
+    return CameraStatus(
+        running=camera.is_running,
+        mock=camera.is_mock,
+        fps=camera.target_fps,
+        vflip=camera.vflip,
+        hflip=camera.hflip,
+        **camera.get_metrics(),
+    )
+
+
+def _etag(camera: CameraService, frame: Frame) -> str:
+    return f'"{camera.boot_id}-{frame.seq}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def _mjpeg_generator(
+    camera: CameraService, max_width: int | None = None, quality: int | None = None
+) -> AsyncGenerator[bytes, None]:
+    pacer = AdaptiveTier(camera.best_tier(max_width, quality), camera.target_fps)
+    tier = pacer.tier
+    camera.use_tier(tier)
+    camera.stream_clients += 1
+    seq = 0
     try:
         while True:
-            frame = camera.get_frame()
-            if frame is not None:
-                yield (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n\r\n" + frame + b"\r\n"
-                )
-            await asyncio.sleep(frame_delay)
+            # Woken by each new frame: never the same frame twice, none missed
+            # unless the client is slower than the camera
+            frame = await camera.next_frame(seq, timeout=1.0)
+            if frame is None:
+                if not camera.is_running:
+                    return
+                continue
+            skipped = frame.seq - seq - 1 if seq else 0
+            seq = frame.seq
+            # Right after a tier change the frame may not have it yet
+            sent_tier, jpeg = frame.jpeg(tier)
+            if sent_tier < pacer.best:
+                # Only larger than the client's cap (e.g. the first frame, encoded
+                # before use_tier()): never send it, wait for the next
+                continue
+            start = time.perf_counter()
+            # The JPEG goes out as its own chunk: the shared bytes, not a copy
+            yield (
+                b"--frame\r\n"
+                b"Content-Type: image/jpeg\r\n"
+                b"Content-Length: %d\r\n"
+                b"X-Frame-Seq: %d\r\n"
+                b"X-Frame-Timestamp: %.3f\r\n"
+                b"X-Frame-Tier: %s\r\n\r\n"
+                % (len(jpeg), frame.seq, frame.captured_at, TIERS[sent_tier].name.encode())
+            )
+            yield jpeg
+            yield b"\r\n"
+            # Resumed once the server has taken the whole part: a backed-up
+            # socket shows up here as a long send
+            new_tier = pacer.record(time.perf_counter() - start, skipped)
+            if new_tier != tier:
+                camera.use_tier(new_tier)
+                camera.release_tier(tier)
+                tier = new_tier
     except (asyncio.CancelledError, GeneratorExit):
         pass
+    finally:
+        camera.release_tier(tier)
+        camera.stream_clients -= 1
 
 
 @router.get(
@@ -42,7 +100,11 @@ async def _mjpeg_generator(camera: CameraService) -> AsyncGenerator[bytes, None]
         503: {"description": "Camera not running"},
     },
 )
-async def stream(request: Request):
+async def stream(
+    request: Request,
+    max_width: int | None = Query(None, ge=1, description="Never send frames wider than this"),
+    quality: int | None = Query(None, ge=1, le=100, description="Never send JPEG quality above this"),
+):
     """Continuous MJPEG stream of the camera feed.
 
     Use directly as an `<img>` source in the frontend — no JavaScript required:
@@ -52,7 +114,14 @@ async def stream(request: Request):
     ```
 
     Returns `multipart/x-mixed-replace; boundary=frame`. Compatible with all
-    major browsers. The stream runs until the client disconnects.
+    major browsers. Each frame is sent once, as soon as it is encoded, with
+    `X-Frame-Seq` and `X-Frame-Timestamp` (capture time) part headers. The
+    stream runs until the client disconnects or the camera stops.
+
+    Resolution and JPEG quality adapt to the connection: a client that falls
+    behind drops to a smaller encoding tier and climbs back once it keeps
+    up (`X-Frame-Tier` part header). `max_width` and `quality` cap the
+    tiers it may use — e.g. `?max_width=320` for a thumbnail.
 
     Start the camera first with `POST /camera/start` (or set
     `PIDOG_CAMERA_ENABLED=true` to auto-start on boot).
@@ -64,7 +133,7 @@ async def stream(request: Request):
             detail="Camera is not running. POST /camera/start first.",
         )
     return StreamingResponse(
-        _mjpeg_generator(camera),
+        _mjpeg_generator(camera, max_width, quality),
         media_type="multipart/x-mixed-replace; boundary=frame",
     )
 
@@ -75,14 +144,19 @@ async def stream(request: Request):
     response_class=Response,
     responses={
         200: {"content": {"image/jpeg": {}}, "description": "JPEG image"},
+        304: {"description": "No new frame since the one named in If-None-Match"},
         503: {"description": "Camera not running or frame unavailable"},
     },
 )
 async def snapshot(request: Request):
-    """Capture and return a single JPEG frame from the camera.
+    """Return the latest JPEG frame from the camera.
 
     Useful for thumbnails or one-shot captures without holding a stream open.
     Start the camera first with `POST /camera/start`.
+
+    The response carries an `ETag` naming the frame, plus `X-Frame-Seq` and
+    `X-Frame-Timestamp`. A poller that sends the ETag back in
+    `If-None-Match` gets `304 Not Modified` until a newer frame exists.
     """
     camera = _get_camera(request)
     if not camera.is_running:
@@ -90,23 +164,25 @@ async def snapshot(request: Request):
             status_code=503,
             detail="Camera is not running. POST /camera/start first.",
         )
-    frame = camera.get_frame()
+    frame = camera.latest_frame()
     if frame is None:
         raise HTTPException(status_code=503, detail="No frame available.")
-    return Response(content=frame, media_type="image/jpeg")
+    headers = {
+        "ETag": _etag(camera, frame),
+        "Cache-Control": "no-cache",
+        "X-Frame-Seq": str(frame.seq),
+        "X-Frame-Timestamp": f"{frame.captured_at:.3f}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=frame.data, media_type="image/jpeg", headers=headers)
 
 
 @router.get("/status", response_model=CameraStatus, summary="Camera status")
 async def camera_status(request: Request):
     """Return current camera state — running flag, mock mode, FPS, and flip settings."""
-    camera = _get_camera(request)
-    return CameraStatus(
-        running=camera.is_running,
-        mock=camera.is_mock,
-        fps=camera.target_fps,
-        vflip=camera.vflip,
-        hflip=camera.hflip,
-    )
+    return _status(_get_camera(request))
 
 
 @router.post("/start", response_model=CameraStatus, summary="Start camera")
@@ -119,27 +195,16 @@ async def start_camera(request: Request):
     """
     camera = _get_camera(request)
     try:
-        camera.start()
+        # Blocks for the startup and the first frame: keep it off the event loop
+        await asyncio.to_thread(camera.start)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Failed to start camera: {exc}")
-    return CameraStatus(
-        running=camera.is_running,
-        mock=camera.is_mock,
-        fps=camera.target_fps,
-        vflip=camera.vflip,
-        hflip=camera.hflip,
-    )
+    return _status(camera)
 
 
 @router.post("/stop", response_model=CameraStatus, summary="Stop camera")
 async def stop_camera(request: Request):
     """Stop the camera and release picamera2 resources."""
     camera = _get_camera(request)
-    camera.stop()
-    return CameraStatus(
-        running=camera.is_running,
-        mock=camera.is_mock,
-        fps=camera.target_fps,
-        vflip=camera.vflip,
-        hflip=camera.hflip,
-    )
+    await asyncio.to_thread(camera.stop)  # joins the capture thread
+    return _status(camera)
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Request
 
-from ..models.rgb import RGB_COLORS, RGB_STYLES, RGBModeRequest
-from ..services.safety import SafetyValidator
+from ..models.rgb import RGB_COLORS, RGB_STYLES, RGBClipInfo, RGBClipRequest, RGBModeRequest
+from ..services.rgb_clips import (
+    FRAME_S,
+    MAX_CLIPS,
+    compile_frames,
+    compile_tracks,
+    validate_name,
+)
+from ..services.safety import SafetyError, SafetyValidator
 
 router = APIRouter(prefix="/rgb", tags=["RGB LEDs"])
 
@@ -10,11 +17,12 @@ router = APIRouter(prefix="/rgb", tags=["RGB LEDs"])
 async def set_rgb_mode(body: RGBModeRequest, request: Request):
     """Set RGB LED strip animation mode."""
     safety: SafetyValidator = request.app.state.safety
-    safety.validate_rgb_style(body.style)
-
     service = request.app.state.pidog
-    service.set_rgb(body.style, body.color, bps=body.bps, brightness=body.brightness)
-    return {"success": True, "style": body.style, "color": body.color}
+    safety.validate_rgb_style(body.style, clips=service.get_rgb_clips())
+    service.set_rgb(
+        body.style, body.color, bps=body.bps, brightness=body.brightness, offload=body.offload
+    )
+    return {"success": True, "style": body.style, "color": body.color, "offload": body.offload}
 
 
 @router.get("/styles")
@@ -27,3 +35,75 @@ async def list_styles():
 async def list_colors():
     """List preset color names and their RGB values."""
     return {"colors": RGB_COLORS}
+
+
+@router.get("/cache")
+async def get_cache_stats(request: Request):
+    """Rendered-animation cache statistics: entries, bytes, hits, misses, evictions."""
+    stats = request.app.state.pidog.get_rgb_cache_stats()
+    if stats is None:
+        raise HTTPException(status_code=503, detail="RGB strip not available.")
+    return stats
+
+
+@router.get("/bus")
+async def get_bus_stats(request: Request):
+    """I2C traffic of the LED driver: bytes written, bytes saved by block writes
+    and unchanged-frame skipping, frames written vs skipped, and whether the
+    driver is running the animation itself (offloaded)."""
+    stats = request.app.state.pidog.get_rgb_bus_stats()
+    if stats is None:
+        raise HTTPException(status_code=503, detail="RGB strip not available.")
+    return stats
+
+
+@router.post("/clips", response_model=RGBClipInfo)
+async def upload_clip(body: RGBClipRequest, request: Request):
+    """Compile keyframed tracks or raw frames into a named clip.
+
+    Play it with POST /rgb/mode (style = clip name) or as an "rgb:<name>"
+    step in POST /actions/execute. Uploading an existing name replaces it.
+    """
+    if (body.tracks is None) == (body.frames is None):
+        raise SafetyError("Provide exactly one of 'tracks' or 'frames'.")
+
+    service = request.app.state.pidog
+    clips = service.get_rgb_clips()
+    if body.name not in clips and len(clips) >= MAX_CLIPS:
+        raise SafetyError(f"Clip limit reached ({MAX_CLIPS}). Delete a clip first.")
+    try:
+        validate_name(body.name)
+        if body.tracks is not None:
+            frames = compile_tracks(body.tracks, body.duration_s)
+        else:
+            frames = compile_frames(body.frames)
+    except ValueError as e:
+        raise SafetyError(str(e))
+
+    if not service.add_rgb_clip(body.name, frames):
+        raise HTTPException(status_code=503, detail="RGB strip not available.")
+    return _clip_info(body.name, frames)
+
+
+@router.get("/clips", response_model=list[RGBClipInfo])
+async def list_clips(request: Request):
+    """List uploaded clips."""
+    clips = request.app.state.pidog.get_rgb_clips()
+    return [_clip_info(name, frames) for name, frames in sorted(clips.items())]
+
+
+@router.delete("/clips/{name}")
+async def delete_clip(name: str, request: Request):
+    """Delete a clip. The strip turns off if it was playing."""
+    if not request.app.state.pidog.remove_rgb_clip(name):
+        raise HTTPException(status_code=404, detail=f"Clip '{name}' not found.")
+    return {"success": True, "name": name}
+
+
+def _clip_info(name: str, frames) -> RGBClipInfo:
+    return RGBClipInfo(
+        name=name,
+        frames=len(frames),
+        duration_s=round(len(frames) * FRAME_S, 3),
+        bytes=frames.nbytes,
+    )
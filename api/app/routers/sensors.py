@@ -1,6 +1,16 @@
-from fastapi import APIRouter, Request
-
-from ..models.sensors import DistanceReading, IMUData, SensorData, SoundReading, TouchReading
+from fastapi import APIRouter, Query, Request
+
+from ..models.sensors import (
+    DistanceHistory,
+    DistanceReading,
+    IMUData,
+    SensorData,
+    SensorHistoryResponse,
+    SoundReading,
+    TouchReading,
+)
+from ..services.safety import SafetyError
+from ..services.sensor_history import FIELDS, METHODS
 
 router = APIRouter(prefix="/sensors", tags=["Sensors"])
 
@@ -22,6 +32,46 @@ async def get_distance(request: Request):
     return DistanceReading(distance=round(service.dog.read_distance(), 2))
 
 
+@router.get("/distance/history", response_model=DistanceHistory)
+async def get_distance_history(
+    request: Request,
+    limit: int = Query(default=100, ge=1, le=512, description="Number of recent samples"),
+):
+    """Get recent raw ultrasonic samples with median / outlier-rejected summaries.
+
+    Samples are read straight from the shared-memory ring written by the
+    sensory process. `stale` is true when the newest sample is older than
+    `PIDOG_DISTANCE_STALE_S`, i.e. the ultrasonic reader has stopped.
+    """
+    return _get_service(request).get_distance_history(limit)
+
+
+@router.get("/history", response_model=SensorHistoryResponse)
+async def get_sensor_history(
+    request: Request,
+    fields: str = Query(
+        default="pitch,roll,distance,battery,head_variance",
+        description=f"Comma-separated fields: {', '.join(FIELDS)}",
+    ),
+    seconds: float = Query(default=600, gt=0, le=86400, description="Range ending now"),
+    points: int = Query(default=300, ge=3, le=5000, description="Max points per field"),
+    method: str = Query(default="lttb", description="lttb, minmax, or raw"),
+):
+    """Get downsampled sensor history for charting.
+
+    Data is served from the finest in-memory tier covering the range
+    (raw for 10 min, 5 s buckets for 2 h, 60 s buckets for 24 h) and reduced
+    to at most `points` per field on the server.
+    """
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in FIELDS]
+    if unknown or not names:
+        raise SafetyError(f"Unknown history fields: {unknown}. Valid: {list(FIELDS)}")
+    if method not in METHODS:
+        raise SafetyError(f"Unknown method '{method}'. Valid: {list(METHODS)}")
+    return request.app.state.sensor_history.query(names, seconds, points, method)
+
+
 @router.get("/imu", response_model=IMUData)
 async def get_imu(request: Request):
     """Get IMU pitch and roll angles in degrees."""
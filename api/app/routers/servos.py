@@ -59,3 +59,9 @@ async def set_tail(body: TailCommand, request: Request):
 async def get_positions(request: Request):
     """Get current servo positions for all joints."""
     return _get_service(request).get_servo_positions()
+
+
+@router.get("/head/stream")
+async def get_head_stream(request: Request):
+    """Streamed head setpoints: jitter buffer state and client-to-servo latency."""
+    return request.app.state.head_streamer.get_metrics()
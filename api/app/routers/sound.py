@@ -1,27 +1,87 @@
-from fastapi import APIRouter, Request
+import asyncio
 
-from ..models.sound import SOUND_FILES, SoundInfo, SoundPlayRequest
+from fastapi import APIRouter, HTTPException, Request
+
+from ..models.sound import (
+    SoundInfo,
+    SoundLibraryEntry,
+    SoundMixerStatus,
+    SoundPlayRequest,
+    SoundStopRequest,
+)
 from ..services.safety import SafetyError
+from ..services.sound_catalog import SoundCatalog
 
 router = APIRouter(prefix="/sound", tags=["Sound"])
 
-VALID_SOUND_NAMES = {s.name for s in SOUND_FILES}
+
+def _get_catalog(request: Request) -> SoundCatalog:
+    return request.app.state.sound_catalog
 
 
 @router.post("/play")
 async def play_sound(body: SoundPlayRequest, request: Request):
-    """Play a sound file by name."""
-    if body.name not in VALID_SOUND_NAMES:
+    """Play a sound file by name on a mixer channel."""
+    names = _get_catalog(request).names()
+    if body.name not in names:
         raise SafetyError(
-            f"Unknown sound '{body.name}'. Valid: {sorted(VALID_SOUND_NAMES)}"
+            f"Unknown sound '{body.name}'. Valid: {sorted(names)}"
         )
 
     service = request.app.state.pidog
-    service.play_sound(body.name, volume=body.volume)
-    return {"success": True, "name": body.name, "volume": body.volume}
+    voice = service.play_sound(body.name, volume=body.volume, priority=body.priority)
+    if voice is None and service.has_mixer:
+        raise HTTPException(
+            status_code=409,
+            detail="All sound channels are busy with higher-priority sounds.",
+        )
+    return {"success": True, "name": body.name, "volume": body.volume, "voice": voice}
+
+
+@router.post("/stop")
+async def stop_sound(request: Request, body: SoundStopRequest | None = None):
+    """Stop one voice by id, or every playing sound."""
+    voice_id = body.voice if body else None
+    stopped = request.app.state.pidog.stop_sound(voice_id)
+    return {"success": True, "stopped": stopped}
+
+
+@router.get("/voices", response_model=SoundMixerStatus)
+async def list_voices(request: Request):
+    """Mixer state: playing voices and play/steal/drop counters."""
+    status = request.app.state.pidog.get_sound_voices()
+    if status is None:
+        raise HTTPException(status_code=503, detail="Audio mixer not available.")
+    return status
 
 
 @router.get("/list", response_model=list[SoundInfo])
-async def list_sounds():
+async def list_sounds(request: Request):
     """List all available sound files."""
-    return SOUND_FILES
+    entries = await asyncio.to_thread(_get_catalog(request).entries)  # may hash files
+    return [SoundInfo(name=e.name, format=e.format) for e in entries]
+
+
+@router.get("/library", response_model=list[SoundLibraryEntry])
+async def sound_library(request: Request, refresh: bool = False):
+    """Indexed sound library: format, duration, sample rate and transcode-cache state.
+
+    The index follows the sound directory automatically; refresh=true forces
+    a rescan (e.g. after replacing a file in place).
+    """
+    catalog = _get_catalog(request)
+    if refresh:
+        await asyncio.to_thread(catalog.refresh, True)
+    entries = await asyncio.to_thread(catalog.entries)  # may hash files
+    return [
+        SoundLibraryEntry(
+            name=e.name,
+            format=e.format,
+            duration_s=e.duration_s,
+            sample_rate=e.sample_rate,
+            channels=e.channels,
+            bytes=e.bytes,
+            transcoded=e.transcoded,
+        )
+        for e in entries
+    ]
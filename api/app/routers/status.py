@@ -9,3 +9,19 @@ router = APIRouter(prefix="/status", tags=["Status"])
 async def get_status(request: Request):
     """Get full robot status: battery, posture, action state, servos, uptime."""
     return request.app.state.pidog.get_status()
+
+
+@router.get("/battery")
+async def get_battery_sampler(request: Request):
+    """Get battery sampler state: smoothed and raw voltage, cache age, read counts."""
+    return request.app.state.pidog.battery_sampler.get_metrics()
+
+
+@router.get("/websocket")
+async def get_websocket_metrics(request: Request):
+    """Get WebSocket state: per-client queues and latency, slow clients, stream and log batching."""
+    return {
+        **request.app.state.ws_manager.get_metrics(),
+        "stream": request.app.state.sensor_stream.get_metrics(),
+        "logs": request.app.state.log_handler.stats(),
+    }
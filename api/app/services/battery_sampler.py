@@ -0,0 +1,117 @@
+"""Background battery voltage sampler.
+
+Reading the battery goes through an ADC on the shared I2C bus. Doing that
+inside every movement handler and status broadcast adds a blocking bus
+transaction to each command's latency, so the voltage is sampled here on a
+fixed interval (in the default executor) and cached.
+
+  - Readings are smoothed with an exponential moving average, which also
+    hides the brief sag while servos draw current
+  - Readers never see a value older than battery_max_staleness_s: if the
+    sampler has stalled or was never started, `voltage` falls back to a
+    direct read
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger("pidog.battery")
+
+
+class BatterySampler:
+    """Caches an EMA-smoothed battery voltage refreshed off the request path."""
+
+    def __init__(self, read_voltage: Callable[[], float], settings):
+        self._read_voltage = read_voltage
+        self._interval: float = settings.battery_sample_interval_s
+        self._alpha: float = settings.battery_ema_alpha
+        self._max_age: float = settings.battery_max_staleness_s
+        self._lock = threading.Lock()
+
+        self._voltage: float | None = None
+        self._raw: float | None = None
+        self._sampled_at: float | None = None  # time.monotonic()
+        self._sample_count: int = 0
+        self._fallback_reads: int = 0
+
+        self._task: asyncio.Task | None = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"BatterySampler started (interval={self._interval}s, "
+            f"alpha={self._alpha}, max_staleness={self._max_age}s)"
+        )
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            logger.info("BatterySampler stopped")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.sample)
+                await asyncio.sleep(self._interval)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("BatterySampler error")
+                await asyncio.sleep(self._interval)
+
+    # ------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------
+
+    def sample(self) -> float:
+        """Take one blocking reading and fold it into the EMA."""
+        raw = float(self._read_voltage())
+        with self._lock:
+            if self._voltage is None or raw <= 0:
+                # First reading, or the ADC is reporting "no battery" — don't
+                # let a stale average mask it.
+                self._voltage = raw
+            else:
+                self._voltage += self._alpha * (raw - self._voltage)
+            self._raw = raw
+            self._sampled_at = time.monotonic()
+            self._sample_count += 1
+            return self._voltage
+
+    @property
+    def age(self) -> float | None:
+        """Seconds since the last reading, or None if never sampled."""
+        if self._sampled_at is None:
+            return None
+        return time.monotonic() - self._sampled_at
+
+    @property
+    def voltage(self) -> float:
+        """Smoothed voltage, guaranteed no older than the staleness bound."""
+        age = self.age
+        if age is None or age > self._max_age:
+            self._fallback_reads += 1
+            return self.sample()
+        return self._voltage
+
+    def get_metrics(self) -> dict:
+        age = self.age
+        return {
+            "voltage": None if self._voltage is None else round(self._voltage, 3),
+            "raw": self._raw,
+            "age_s": None if age is None else round(age, 3),
+            "interval_s": self._interval,
+            "max_staleness_s": self._max_age,
+            "samples": self._sample_count,
+            "fallback_reads": self._fallback_reads,
+        }
@@ -7,19 +7,129 @@ In mock mode, generates placeholder frames using opencv-python or Pillow.
 If neither is installed, get_frame() returns None and the stream sends no
 frames — install one of them to get placeholder images during development:
     pip install opencv-python   # or:  pip install Pillow
+
+While the camera runs, a single capture thread grabs each frame at
+camera_fps and hands it to a dedicated encode pool (camera_encode_workers
+threads; OpenCV releases the GIL while encoding). Each result comes back
+through its future's callback and is published as a sequence-numbered
+Frame. Stream clients, snapshots and the vision agent all read that Frame:
+one encode per frame however many viewers there are, no image work on the
+event loop, and every reader gets the same (immutable) bytes object.
+
+Readers on the event loop wait for the next frame with `await
+next_frame(after_seq)`: publishing wakes them through the loop
+(call_soon_threadsafe), so streams send each frame once, as soon as it is
+encoded, instead of polling on a timer.
+
+Stream clients each pick an encoding tier (resolution + JPEG quality, see
+TIERS) adapted to their send backlog. Each frame is encoded once per tier
+that some client is using — the full tier always, for snapshots and the
+vision agent — and clients on the same tier share those bytes.
+
+A frame captured while every encoder is still busy is skipped rather than
+queued, so a slow encode lowers the frame rate instead of adding latency.
+`python -m benchmarks.camera_loop_lag` measures event-loop lag while
+streaming, against the old encode-per-client-on-the-loop path.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import threading
 import time
-from typing import Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Optional
 
 from ..config import settings
 
 logger = logging.getLogger("pidog.camera")
 
+JPEG_QUALITY = 80
+MOCK_SIZE = (320, 240)
+
+
+@dataclass(frozen=True)
+class EncodingTier:
+    name: str
+    max_width: int | None  # None: the camera's own resolution
+    quality: int
+
+
+# Best first. A stream client moves down a tier when it falls behind and
+# back up when it has kept up for a while (AdaptiveTier).
+TIERS = (
+    EncodingTier("full", None, JPEG_QUALITY),
+    EncodingTier("medium", 480, 65),
+    EncodingTier("low", 320, 50),
+    EncodingTier("minimal", 240, 35),
+)
+
+
+@dataclass(frozen=True)
+class Frame:
+    seq: int
+    captured_at: float  # time.time() when the image was grabbed
+    jpegs: tuple[bytes | None, ...]  # by TIERS index; None where no client wanted it
+
+    @property
+    def data(self) -> bytes:
+        """Full-tier JPEG; shared by every reader, never copied."""
+        return self.jpegs[0]
+
+    def jpeg(self, tier: int) -> tuple[int, bytes]:
+        """This frame at `tier`, else the nearest smaller tier encoded, else
+        the nearest larger. Returns (tier actually used, bytes)."""
+        order = list(range(tier, len(self.jpegs))) + list(range(tier - 1, -1, -1))
+        for i in order:
+            if self.jpegs[i] is not None:
+                return i, self.jpegs[i]
+        raise ValueError("frame has no encodings")
+
+
+class AdaptiveTier:
+    """Per-client tier choice driven by send backlog.
+
+    A frame counts as behind when sending it took longer than a frame
+    interval (the socket was backed up) or frames went by while it was
+    sent. DOWN_AFTER frames behind in a row drop a tier; UP_AFTER_S of
+    frames sent in under half an interval climb back one, never above the
+    client's own cap.
+    """
+
+    DOWN_AFTER = 2
+    UP_AFTER_S = 3.0
+
+    def __init__(self, best: int, fps: float):
+        self.best = best
+        self.tier = best
+        self.changes = 0
+        self._interval = 1.0 / fps
+        self._up_after = max(1, round(self.UP_AFTER_S * fps))
+        self._behind = 0
+        self._ok = 0
+
+    def record(self, send_s: float, skipped: int) -> int:
+        if send_s > self._interval or skipped > 0:
+            self._ok = 0
+            self._behind += 1
+            if self._behind >= self.DOWN_AFTER and self.tier < len(TIERS) - 1:
+                self.tier += 1
+                self.changes += 1
+                self._behind = 0
+        elif send_s < self._interval / 2:
+            self._behind = 0
+            self._ok += 1
+            if self._ok >= self._up_after and self.tier > self.best:
+                self.tier -= 1
+                self.changes += 1
+                self._ok = 0
+        else:
+            self._behind = 0
+        return self.tier
+
 
 class CameraService:
     """Wrapper around vilib's Vilib camera interface."""
@@ -32,6 +142,31 @@ class CameraService:
         self._vflip = settings.camera_vflip
         self._hflip = settings.camera_hflip
 
+        self._encode_workers = settings.camera_encode_workers
+        self._pool = ThreadPoolExecutor(
+            max_workers=self._encode_workers, thread_name_prefix="camera-encode"
+        )
+
+        self._frame: Frame | None = None
+        self._frame_lock = threading.Lock()  # publishing vs stop()
+        self._seq = 0  # not reset by stop(), so a seq never names two frames
+        self.boot_id = f"{int(time.time()):x}"  # seq restarts with the process; ETags must not
+        self._epoch = 0  # bumped per start(), so encodes from a stopped run are dropped
+        self._in_flight = 0
+        self._full_width: int | None = None  # learned from captures
+        self._tier_clients = [0] * len(TIERS)
+        self._tier_frames = [0] * len(TIERS)
+        self._tier_bytes = [0] * len(TIERS)
+        self._worker: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self._first_attempt = threading.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._frame_event: asyncio.Event | None = None  # replaced on every publish
+        self._frames_encoded = 0
+        self._frames_skipped = 0
+        self._encode_s = 0.0
+        self.stream_clients = 0
+
     def start(self) -> None:
         """Start the camera. On real hardware this takes ~1 second for vilib to init."""
         with self._lock:
@@ -50,12 +185,26 @@ class CameraService:
             else:
                 logger.info("Camera started (MOCK mode)")
             self._running = True
+            self._epoch += 1
+            self._stop_event.clear()
+            self._first_attempt.clear()
+            self._worker = threading.Thread(target=self._run, name="camera-worker", daemon=True)
+            self._worker.start()
+        # Have a frame ready for the first reader (or know there won't be one)
+        self._first_attempt.wait(timeout=1.0)
 
     def stop(self) -> None:
         """Stop the camera and release hardware resources."""
         with self._lock:
             if not self._running:
                 return
+            self._stop_event.set()
+            if self._worker is not None:
+                self._worker.join(timeout=2.0)
+                self._worker = None
+            with self._frame_lock:
+                self._frame = None
+            self._wake_readers()
             if not self._mock:
                 try:
                     from vilib import Vilib  # type: ignore[import]
@@ -66,31 +215,158 @@ class CameraService:
             self._running = False
             logger.info("Camera stopped")
 
-    def get_frame(self) -> Optional[bytes]:
-        """Capture and JPEG-encode the current frame.
+    # ------------------------------------------------------------------
+    # Frames
+    # ------------------------------------------------------------------
+
+    def latest_frame(self) -> Frame | None:
+        """The most recently encoded frame, or None if there is none yet."""
+        return self._frame if self._running else None
 
-        Returns None if the camera is not running or a frame cannot be captured.
-        Callers should skip yielding to the stream when None is returned.
+    async def next_frame(self, after_seq: int = 0, timeout: float | None = None) -> Frame | None:
+        """Wait for a frame newer than after_seq.
+
+        Returns None if the camera stops, or after `timeout` seconds without
+        a newer frame.
         """
-        if not self._running:
-            return None
-        if self._mock:
-            return self._generate_mock_frame()
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._frame_event = asyncio.Event()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            frame = self.latest_frame()
+            if frame is not None and frame.seq > after_seq:
+                return frame
+            if not self._running:
+                return None
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._frame_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    def _wake_readers(self) -> None:
+        """Wake next_frame() waiters. Safe from any thread."""
+        loop = self._loop
+        if loop is None:
+            return
         try:
-            from vilib import Vilib  # type: ignore[import]
-            import cv2  # type: ignore[import]
+            loop.call_soon_threadsafe(self._swap_frame_event)
+        except RuntimeError:
+            self._loop = None  # loop closed
 
-            frame = Vilib.img
-            if frame is None:
-                return None
-            _, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-            return bytes(buf)
+    def _swap_frame_event(self) -> None:
+        event, self._frame_event = self._frame_event, asyncio.Event()
+        event.set()
+
+    def get_frame(self) -> Optional[bytes]:
+        """JPEG bytes of the latest frame. Never encodes; see latest_frame().
+
+        Returns None if the camera is not running or no frame has been
+        captured yet. Callers should skip yielding to the stream when None is
+        returned.
+        """
+        frame = self.latest_frame()
+        return frame.data if frame is not None else None
+
+    def _run(self) -> None:
+        interval = 1.0 / self._fps
+        next_due = time.monotonic()
+        last_source = None
+        while not self._stop_event.is_set():
+            render: Callable[[EncodingTier], Optional[bytes]] | None = None
+            captured_at = time.time()
+            try:
+                if self._mock:
+                    render = self._generate_mock_frame
+                    self._full_width = MOCK_SIZE[0]
+                else:
+                    from vilib import Vilib  # type: ignore[import]
+
+                    source = Vilib.img
+                    # vilib replaces Vilib.img per capture; the same object
+                    # means no new image since the last encode
+                    if source is not None and source is not last_source:
+                        last_source = source
+                        render = partial(self._encode, source)
+                        self._full_width = source.shape[1]
+            except Exception as exc:
+                logger.error(f"Frame capture error: {exc}")
+
+            if render is None:
+                self._first_attempt.set()
+            elif self._in_flight >= self._encode_workers:
+                self._frames_skipped += 1
+            else:
+                self._seq += 1
+                with self._frame_lock:
+                    self._in_flight += 1
+                tiers = [0] + [i for i in range(1, len(TIERS)) if self._tier_clients[i]]
+                future = self._pool.submit(self._encode_tiers, render, tiers)
+                future.add_done_callback(partial(self._publish, self._epoch, self._seq, captured_at))
+
+            next_due += interval
+            now = time.monotonic()
+            if next_due < now:
+                next_due = now  # fell behind; don't try to catch up
+            self._stop_event.wait(next_due - now)
+
+    @staticmethod
+    def _encode_tiers(
+        render: Callable[[EncodingTier], Optional[bytes]], tiers: list[int]
+    ) -> tuple[tuple[bytes | None, ...] | None, float]:
+        """Encode one captured image at each wanted tier. None if the full tier fails."""
+        start = time.perf_counter()
+        jpegs: list[bytes | None] = [None] * len(TIERS)
+        for i in tiers:
+            jpegs[i] = render(TIERS[i])
+            if jpegs[0] is None:
+                return None, 0.0
+        return tuple(jpegs), time.perf_counter() - start
+
+    def _publish(self, epoch: int, seq: int, captured_at: float, future: Future) -> None:
+        """Encode-pool callback: make a finished encode the latest frame."""
+        try:
+            jpegs, elapsed = future.result()
         except Exception as exc:
-            logger.error(f"Frame capture error: {exc}")
-            return None
+            logger.error(f"Frame encode error: {exc}")
+            jpegs = None
+        published = False
+        with self._frame_lock:
+            self._in_flight -= 1
+            if jpegs is not None:
+                self._encode_s += elapsed
+                self._frames_encoded += 1
+                for i, jpeg in enumerate(jpegs):
+                    if jpeg is not None:
+                        self._tier_frames[i] += 1
+                        self._tier_bytes[i] += len(jpeg)
+                # Encodes can finish out of order; never go back to an older frame
+                current = self._frame
+                stale = epoch != self._epoch or self._stop_event.is_set()
+                if not stale and (current is None or seq > current.seq):
+                    self._frame = Frame(seq, captured_at, jpegs)
+                    published = True
+        if published:
+            self._wake_readers()
+        self._first_attempt.set()
 
-    def _generate_mock_frame(self) -> Optional[bytes]:
-        """Return a placeholder JPEG for mock mode.
+    @staticmethod
+    def _encode(image, tier: EncodingTier = TIERS[0]) -> bytes:
+        import cv2  # type: ignore[import]
+
+        height, width = image.shape[:2]
+        if tier.max_width and width > tier.max_width:
+            size = (tier.max_width, round(height * tier.max_width / width))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        _, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, tier.quality])
+        return buf.tobytes()
+
+    def _generate_mock_frame(self, tier: EncodingTier = TIERS[0]) -> Optional[bytes]:
+        """Return a placeholder JPEG for mock mode, at the given tier.
 
         Tries opencv-python first, then Pillow. Returns None if neither is
         installed — install one to get visual placeholder frames.
@@ -99,7 +375,7 @@ class CameraService:
             import cv2  # type: ignore[import]
             import numpy as np  # type: ignore[import]
 
-            img = np.full((240, 320, 3), 40, dtype=np.uint8)
+            img = np.full((MOCK_SIZE[1], MOCK_SIZE[0], 3), 40, dtype=np.uint8)
             cv2.putText(
                 img,
                 "MOCK CAMERA",
@@ -109,8 +385,7 @@ class CameraService:
                 (180, 180, 180),
                 2,
             )
-            _, buf = cv2.imencode(".jpg", img)
-            return bytes(buf)
+            return self._encode(img, tier)
         except ImportError:
             pass
 
@@ -119,10 +394,12 @@ class CameraService:
 
             from PIL import Image, ImageDraw  # type: ignore[import]
 
-            img = Image.new("RGB", (320, 240), (40, 40, 40))
+            img = Image.new("RGB", MOCK_SIZE, (40, 40, 40))
             ImageDraw.Draw(img).text((85, 115), "MOCK CAMERA", fill=(180, 180, 180))
+            if tier.max_width and img.width > tier.max_width:
+                img = img.resize((tier.max_width, round(img.height * tier.max_width / img.width)))
             buf = io.BytesIO()
-            img.save(buf, "JPEG", quality=80)
+            img.save(buf, "JPEG", quality=tier.quality)
             return buf.getvalue()
         except ImportError:
             pass
@@ -132,6 +409,55 @@ class CameraService:
         )
         return None
 
+    # ------------------------------------------------------------------
+    # Tiers
+    # ------------------------------------------------------------------
+
+    def best_tier(self, max_width: int | None = None, quality: int | None = None) -> int:
+        """Best tier within a client's hints (the lowest tier if none fits).
+
+        Until a capture has shown the camera's width, the full tier fits no
+        max_width.
+        """
+        for i, tier in enumerate(TIERS):
+            width = tier.max_width or self._full_width
+            fits_width = max_width is None or (width is not None and width <= max_width)
+            if fits_width and (quality is None or tier.quality <= quality):
+                return i
+        return len(TIERS) - 1
+
+    def use_tier(self, tier: int) -> None:
+        """A stream client wants `tier` encoded from the next frame on."""
+        self._tier_clients[tier] += 1
+
+    def release_tier(self, tier: int) -> None:
+        self._tier_clients[tier] -= 1
+
+    def get_metrics(self) -> dict:
+        frame = self._frame
+        return {
+            "frame_seq": frame.seq if frame is not None else None,
+            "frames_encoded": self._frames_encoded,
+            "frames_skipped": self._frames_skipped,
+            "avg_encode_ms": (
+                round(self._encode_s / self._frames_encoded * 1000, 2) if self._frames_encoded else None
+            ),
+            "stream_clients": self.stream_clients,
+            "tiers": {
+                tier.name: {
+                    "max_width": tier.max_width,
+                    "quality": tier.quality,
+                    "clients": self._tier_clients[i],
+                    "frames": self._tier_frames[i],
+                    "avg_kb": (
+                        round(self._tier_bytes[i] / self._tier_frames[i] / 1024, 1)
+                        if self._tier_frames[i] else None
+                    ),
+                }
+                for i, tier in enumerate(TIERS)
+            },
+        }
+
     @property
     def is_running(self) -> bool:
         return self._running
@@ -0,0 +1,72 @@
+"""Reader-side filtering for the ultrasonic distance history.
+
+The sensory process writes every raw reading into a shared-memory ring
+(see pidog/distance_history.py). Timeouts and glitches arrive as negative
+values or isolated spikes, so consumers should go through these helpers
+rather than trusting the latest sample:
+
+  - Negative readings (timeouts, echo errors) are always invalid
+  - Outliers are rejected with a Hampel test: |x - median| > k * 1.4826 * MAD
+  - A history whose newest sample is older than the staleness limit means
+    the sensory process has stopped writing
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+# MAD floor in cm — a perfectly still target has MAD 0, which would otherwise
+# reject every sample that differs by a single millimetre.
+MIN_MAD_CM = 0.5
+
+
+@dataclass
+class DistanceSummary:
+    valid: np.ndarray       # bool mask, True for samples that passed both filters
+    median: float | None    # median of non-error samples
+    filtered: float | None  # mean of samples that survived outlier rejection
+    rejected: int           # error readings + outliers
+    age_s: float | None     # seconds since the newest sample
+    stale: bool
+
+
+def reject_outliers(distances: np.ndarray, k: float = 3.0) -> np.ndarray:
+    """Return a bool mask of samples that are neither errors nor Hampel outliers."""
+    valid = distances >= 0
+    if not valid.any():
+        return valid
+    good = distances[valid]
+    median = np.median(good)
+    mad = max(float(np.median(np.abs(good - median))), MIN_MAD_CM)
+    return valid & (np.abs(distances - median) <= k * 1.4826 * mad)
+
+
+def summarize(
+    timestamps: np.ndarray,
+    distances: np.ndarray,
+    stale_after_s: float,
+    k: float = 3.0,
+    now: float | None = None,
+) -> DistanceSummary:
+    """Median, outlier-rejected mean and staleness for a window of samples."""
+    now = time.time() if now is None else now
+    if len(distances) == 0:
+        return DistanceSummary(
+            valid=np.zeros(0, dtype=bool), median=None, filtered=None,
+            rejected=0, age_s=None, stale=True,
+        )
+
+    non_error = distances >= 0
+    valid = reject_outliers(distances, k)
+    age = max(0.0, now - float(timestamps[-1]))
+    return DistanceSummary(
+        valid=valid,
+        median=float(np.median(distances[non_error])) if non_error.any() else None,
+        filtered=float(np.mean(distances[valid])) if valid.any() else None,
+        rejected=int(len(distances) - valid.sum()),
+        age_s=age,
+        stale=age > stale_after_s,
+    )
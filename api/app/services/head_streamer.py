@@ -0,0 +1,234 @@
+"""Streaming head setpoints, for puppeteering the head from a phone gyro.
+
+POST /servos/head and the `head` command go through head_move(immediately=True),
+which waits for the head thread to drain before queuing the new target — at
+30-60 Hz the updates serialize and lag. Streamed setpoints go through
+Pidog.head_setpoint() instead: a newer target replaces a pending one and
+nothing waits.
+
+Network arrival is uneven, so setpoints that carry a client timestamp pass
+through a small jitter buffer: each is played out at
+
+    client time + clock offset + jitter
+
+where the offset is the smallest (arrival - client time) over the recent
+window, i.e. the fastest trip seen. That restores the client's spacing as
+long as the network delay varies by less than the jitter delay. A setpoint
+that arrives after its playout time goes out at once; one overtaken by a
+newer setpoint before it was played is dropped (latest wins), and one older
+than the last played is discarded as stale.
+
+Offsets and the last played timestamp are kept per source (WebSocket
+connection), since every client has its own clock, and are reset when a
+source pauses for RESET_IDLE_S or its clock jumps back more than
+RESET_BACKWARD_S (an NTP step, an app restart): otherwise one setpoint from
+a clock running ahead would mark everything after it as stale.
+
+Latency is measured at the servo write, from the head thread's callback:
+  - e2e_ms: write - client timestamp. Includes any clock difference, so it
+    is only end-to-end when the phone and the Pi are NTP-synced
+  - server_ms: write - arrival, i.e. jitter delay plus API and head thread
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Hashable
+
+logger = logging.getLogger("pidog.head_stream")
+
+OFFSET_WINDOW = 120  # arrivals (~2-4 s at joystick rates) behind the offset estimate
+LATENCY_WINDOW = 500
+RESET_IDLE_S = 2.0      # a source silent this long starts over
+RESET_BACKWARD_S = 1.0  # a clock jumping back further is a new timeline, not reordering
+
+
+@dataclass
+class SourceClock:
+    """Per-source view of the client's clock."""
+
+    offsets: deque[float] = field(default_factory=lambda: deque(maxlen=OFFSET_WINDOW))
+    last_played: float | None = None  # client_ts of the last played setpoint
+    last_seen: float = 0.0
+
+    def reset(self) -> None:
+        self.offsets.clear()
+        self.last_played = None
+
+
+@dataclass
+class Setpoint:
+    yaw: float
+    roll: float
+    pitch: float
+    speed: int
+    client_ts: float | None  # client's time.time()-style seconds, if sent
+    received: float = field(default_factory=time.time)
+    due: float = 0.0
+    clock: SourceClock | None = None
+
+
+def _summary(values: deque[float]) -> dict | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        "p50": round(ordered[len(ordered) // 2] * 1000, 1),
+        "p95": round(ordered[int((len(ordered) - 1) * 0.95)] * 1000, 1),
+        "max": round(ordered[-1] * 1000, 1),
+    }
+
+
+class HeadStreamer:
+    """Latest-wins head setpoints behind a timestamp-driven jitter buffer."""
+
+    def __init__(self, pidog_service, settings):
+        self._service = pidog_service
+        self._jitter_s: float = settings.head_stream_jitter_ms / 1000
+        self._pending: list[Setpoint] = []  # sorted by due time
+        self._clocks: dict[Hashable, SourceClock] = {}
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+        self._e2e: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._server: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.received = 0
+        self.played = 0    # handed to head_setpoint()
+        self.written = 0   # reached the servos (not replaced in the head thread)
+        self.dropped = 0   # overtaken in the jitter buffer
+        self.stale = 0     # arrived older than one already played
+        self.late = 0      # arrived after its playout time
+        self.resets = 0    # source clock state started over
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"HeadStreamer started (jitter={self._jitter_s * 1000:.0f}ms)")
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+            logger.info("HeadStreamer stopped")
+
+    # ------------------------------------------------------------------
+    # Setpoints
+    # ------------------------------------------------------------------
+
+    def submit(self, yaw: float, roll: float, pitch: float, speed: int = 50,
+               client_ts: float | None = None, source: Hashable = None) -> bool:
+        """Queue a validated setpoint. Must be called from the event loop.
+
+        Returns False if it was discarded as stale (older than one already
+        played from the same source).
+        """
+        clock = self._clocks.setdefault(source, SourceClock())
+        point = Setpoint(yaw, roll, pitch, speed, client_ts, clock=clock)
+        self.received += 1
+
+        if clock.last_seen and point.received - clock.last_seen > RESET_IDLE_S:
+            self._reset(clock)
+        clock.last_seen = point.received
+        if client_ts is not None and clock.last_played is not None and client_ts <= clock.last_played:
+            if clock.last_played - client_ts <= RESET_BACKWARD_S:
+                self.stale += 1
+                return False
+            self._reset(clock)
+
+        if client_ts is None or self._jitter_s <= 0:
+            point.due = point.received
+        else:
+            clock.offsets.append(point.received - client_ts)
+            point.due = client_ts + min(clock.offsets) + self._jitter_s
+            if point.due < point.received:
+                self.late += 1
+                point.due = point.received
+
+        if self._task is None:
+            self._play(point)  # not started (e.g. during startup): no buffering
+            return True
+        bisect.insort(self._pending, point, key=lambda p: p.due)
+        self._wake.set()
+        return True
+
+    def forget(self, source: Hashable) -> None:
+        """Drop a source's clock state (its connection closed)."""
+        self._clocks.pop(source, None)
+
+    def _reset(self, clock: SourceClock) -> None:
+        clock.reset()
+        self.resets += 1
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not self._pending:
+                    await self._wake.wait()
+                    self._wake.clear()
+                    continue
+                delay = self._pending[0].due - time.time()
+                if delay > 0:
+                    # An earlier setpoint may arrive meanwhile; re-check on wake
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wake.clear()
+                    continue
+
+                now = time.time()
+                n = bisect.bisect_right(self._pending, now, key=lambda p: p.due)
+                due, self._pending = self._pending[:n], self._pending[n:]
+                self.dropped += len(due) - 1
+                self._play(due[-1])
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("HeadStreamer error")
+                self._pending.clear()
+
+    def _play(self, point: Setpoint) -> None:
+        def on_write() -> None:
+            # Head thread: deque appends and int increments are safe here
+            written = time.time()
+            self._server.append(written - point.received)
+            if point.client_ts is not None:
+                self._e2e.append(written - point.client_ts)
+            self.written += 1
+
+        if point.client_ts is not None and point.clock is not None:
+            point.clock.last_played = point.client_ts
+        self.played += 1
+        self._service.stream_head(
+            point.yaw, point.roll, point.pitch, speed=point.speed, on_write=on_write
+        )
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def get_metrics(self) -> dict:
+        return {
+            "jitter_ms": round(self._jitter_s * 1000, 1),
+            "sources": len(self._clocks),
+            "clock_offsets_ms": [round(min(c.offsets) * 1000, 1) for c in self._clocks.values() if c.offsets],
+            "pending": len(self._pending),
+            "received": self.received,
+            "played": self.played,
+            "written": self.written,
+            "dropped": self.dropped,
+            "stale": self.stale,
+            "late": self.late,
+            "resets": self.resets,
+            "e2e_ms": _summary(self._e2e),
+            "server_ms": _summary(self._server),
+        }
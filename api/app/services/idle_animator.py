@@ -33,6 +33,7 @@ class IdleAnimator:
         self._rgb_color: str = settings.idle_rgb_color
         self._rgb_bps: float = settings.idle_rgb_bps
         self._rgb_brightness: float = settings.idle_rgb_brightness
+        self._rgb_offload: bool = settings.idle_rgb_offload
         self._task: asyncio.Task | None = None
 
     # ------------------------------------------------------------------
@@ -97,6 +98,7 @@ class IdleAnimator:
                 color=self._rgb_color,
                 bps=self._rgb_bps,
                 brightness=self._rgb_brightness,
+                offload=self._rgb_offload,
             ),
         )
 
@@ -1,7 +1,16 @@
-"""Ring-buffer log handler that stores recent entries for the API and WebSocket."""
+"""Ring-buffer log handler that stores recent entries for the API and WebSocket.
+
+Streaming to WebSocket clients is batched: emit() only appends the entry to
+a pending deque (append/popleft are atomic, so any thread may log — the
+hardware threads included) and a single flusher task on the event loop
+sends one `logs` message per batch, at most every flush interval or as
+soon as a full batch is waiting. A burst of hundreds of DEBUG lines costs a
+handful of broadcasts instead of a task and an encode per line.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from collections import deque
 
@@ -9,13 +18,37 @@ from collections import deque
 class BufferedLogHandler(logging.Handler):
     """Stores recent log entries in a ring buffer for retrieval via API."""
 
-    def __init__(self, max_entries: int = 2000):
+    def __init__(self, max_entries: int = 2000, max_pending: int = 1000):
         super().__init__()
         self.buffer: deque[dict] = deque(maxlen=max_entries)
+        self._pending: deque[dict] = deque(maxlen=max_pending)  # handoff to the flusher
         self._ws_manager = None
+        self._flush_interval = 0.1
+        self._batch_size = 50
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._wake_requested = False
+        self._task: asyncio.Task | None = None
+
+        self.batches = 0
+        self.streamed = 0
+        self.dropped = 0  # pending overflowed before the flusher ran
 
-    def set_ws_manager(self, manager) -> None:
+    def set_ws_manager(self, manager, flush_interval_s: float = 0.1, batch_size: int = 50) -> None:
         self._ws_manager = manager
+        self._flush_interval = flush_interval_s
+        self._batch_size = batch_size
+
+    def start(self) -> None:
+        """Start the flusher. Must be called from the event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
 
     def emit(self, record: logging.LogRecord) -> None:
         entry = {
@@ -26,12 +59,66 @@ class BufferedLogHandler(logging.Handler):
         }
         self.buffer.append(entry)
 
-        # WebSocket broadcast is fire-and-forget
-        if self._ws_manager:
-            import asyncio
-
+        if self._task is None:
+            return  # not streaming (e.g., during startup)
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append(entry)
+        n = len(self._pending)
+        # Wake the flusher for the first entry of a batch and for a full batch
+        if (n == 1 or n >= self._batch_size) and not self._wake_requested:
+            self._wake_requested = True
             try:
-                loop = asyncio.get_running_loop()
-                loop.create_task(self._ws_manager.broadcast("logs", entry))
+                self._loop.call_soon_threadsafe(self._wake.set)
             except RuntimeError:
-                pass  # No event loop running (e.g., during startup)
+                pass  # loop closed during shutdown
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not self._pending:
+                    await self._wake.wait()
+                self._wake.clear()
+                self._wake_requested = False
+
+                # Gather a batch: wait out the interval unless one fills up first.
+                # A wake-up can also be a late one for the first entry; re-check.
+                deadline = self._loop.time() + self._flush_interval
+                while len(self._pending) < self._batch_size:
+                    remaining = deadline - self._loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    self._wake.clear()
+                    self._wake_requested = False
+
+                await self._flush()
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                # Can't log here without feeding the loop; drop the batch
+                self._pending.clear()
+                await asyncio.sleep(1.0)
+
+    async def _flush(self) -> None:
+        while self._pending:
+            batch = []
+            while self._pending and len(batch) < self._batch_size:
+                batch.append(self._pending.popleft())
+            if self._ws_manager and self._ws_manager.has_subscribers("logs"):
+                await self._ws_manager.broadcast("logs", {"entries": batch})
+                self.batches += 1
+                self.streamed += len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "streamed": self.streamed,
+            "dropped": self.dropped,
+            "flush_interval_s": self._flush_interval,
+            "batch_size": self._batch_size,
+        }
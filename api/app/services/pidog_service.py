@@ -10,12 +10,20 @@ import logging
 import threading
 import time
 from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+from pidog.frame_cache import FrameCache
 
 from ..config import settings
 from ..models.actions import ActionQueueStatus
-from ..models.sensors import IMUData, SensorData
+from ..models.sensors import DistanceHistory, DistanceSample, IMUData, SensorData
 from ..models.servos import ServoPositions
 from ..models.status import BatteryInfo, RobotStatus
+from .battery_sampler import BatterySampler
+from .distance_filter import summarize
+from .rgb_clips import ACTION_PREFIX
+from .sound_catalog import sound_dir_path
 
 logger = logging.getLogger("pidog.service")
 
@@ -52,6 +60,18 @@ class MockPidog:
             self.head_current_angles = list(target_yrps[0])
         logger.info(f"[MOCK] head_move({target_yrps}, speed={speed})")
 
+    def head_setpoint(
+        self,
+        target_yrp: list[float],
+        roll_comp: float = 0,
+        pitch_comp: float = 0,
+        speed: int = 50,
+        on_write: Callable[[], None] | None = None,
+    ) -> None:
+        self.head_current_angles = list(target_yrp)
+        if on_write:
+            on_write()
+
     def legs_move(
         self,
         target_angles: list[list[float]],
@@ -78,11 +98,18 @@ class MockPidog:
     def read_distance(self) -> float:
         return self._distance
 
+    def read_distance_history(self, n: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        # Simulate the 100Hz shared-memory ring ending now
+        n = 512 if n is None else min(n, 512)
+        timestamps = time.time() - 0.01 * np.arange(n - 1, -1, -1)
+        return timestamps, np.full(n, self._distance)
+
     def get_battery_voltage(self) -> float:
         return self._battery_voltage
 
-    def speak(self, name: str, volume: int = 100) -> None:
-        logger.info(f"[MOCK] speak({name!r}, volume={volume})")
+    def speak(self, name: str, volume: int = 100, priority: int | None = None):
+        logger.info(f"[MOCK] speak({name!r}, volume={volume}, priority={priority})")
+        return self.audio.play(name, volume, priority)
 
     def wait_all_done(self) -> None:
         pass
@@ -104,9 +131,155 @@ class MockEars:
         return False
 
 
+class MockVoice:
+    def __init__(self, id: int, index: int, name: str, priority: int, volume: int):
+        self.id = id
+        self.index = index
+        self.name = name
+        self.priority = priority
+        self.volume = volume
+        self.started = time.time()
+
+    def info(self) -> dict:
+        return {
+            "id": self.id,
+            "channel": self.index,
+            "name": self.name,
+            "priority": self.priority,
+            "volume": self.volume,
+            "elapsed": round(time.time() - self.started, 3),
+        }
+
+
+class MockAudioStream:
+    def __init__(self, voice: MockVoice):
+        self.voice = voice
+        self.bytes_written = 0
+
+    def write(self, pcm: bytes) -> bool:
+        self.bytes_written += len(pcm)
+        return True
+
+    def close(self) -> None:
+        logger.info(f"[MOCK] audio stream closed after {self.bytes_written} bytes")
+
+
+class MockAudioEngine:
+    """Simulates the AudioEngine mixer: fixed channels, priority stealing, stop handles.
+
+    Every mock sound "plays" for SOUND_S seconds.
+    """
+
+    CHANNELS = 8
+    SOUND_S = 1.0
+    PRIORITY_NORMAL = 1
+    PRIORITIES = {"howling": 0, "snoring": 0, "pant": 0}
+
+    def __init__(self):
+        self._voices: list[MockVoice | None] = [None] * self.CHANNELS
+        self._next_id = 1
+        self.played = 0
+        self.stolen = 0
+        self.dropped = 0
+
+    def _busy(self, voice: MockVoice | None) -> bool:
+        return voice is not None and time.time() - voice.started < self.SOUND_S
+
+    def play(self, name: str, volume: int = 100, priority: int | None = None) -> MockVoice | None:
+        if priority is None:
+            priority = self.PRIORITIES.get(name, self.PRIORITY_NORMAL)
+        index = next((i for i, v in enumerate(self._voices) if not self._busy(v)), None)
+        if index is None:
+            candidates = [v for v in self._voices if v.priority <= priority]
+            if not candidates:
+                self.dropped += 1
+                return None
+            index = min(candidates, key=lambda v: (v.priority, v.started)).index
+            self.stolen += 1
+        voice = MockVoice(self._next_id, index, name, priority, volume)
+        self._next_id += 1
+        self._voices[index] = voice
+        self.played += 1
+        return voice
+
+    def stream(
+        self, sample_rate: int, channels: int = 1, volume: int = 100,
+        priority: int = 2, name: str = "stream",
+    ) -> MockAudioStream | None:
+        voice = self.play(name, volume, priority)
+        return MockAudioStream(voice) if voice is not None else None
+
+    def voices(self) -> list[MockVoice]:
+        return [v for v in self._voices if self._busy(v)]
+
+    def stop(self, voice_id: int | None = None) -> int:
+        stopped = 0
+        for i, voice in enumerate(self._voices):
+            if self._busy(voice) and voice_id in (None, voice.id):
+                self._voices[i] = None
+                stopped += 1
+        return stopped
+
+    def stats(self) -> dict:
+        return {
+            "channels": self.CHANNELS,
+            "busy": len(self.voices()),
+            "played": self.played,
+            "stolen": self.stolen,
+            "dropped": self.dropped,
+        }
+
+
 class MockRGBStrip:
-    def set_mode(self, style: str = "breath", color: str = "cyan", bps: float = 1.0, brightness: float = 1.0) -> None:
-        logger.info(f"[MOCK] rgb.set_mode(style={style!r}, color={color!r}, bps={bps}, brightness={brightness})")
+    """Simulates set_mode() and custom clips of RGBStrip, on its real rendered-animation cache."""
+
+    FRAME_CACHE_BYTES = 256 * 1024
+    MIN_DELAY = 0.05
+    LIGHTS = 11
+
+    def __init__(self):
+        self.frame_cache = FrameCache(self.FRAME_CACHE_BYTES)
+        self._offloaded = False
+        self.clips: dict[str, np.ndarray] = {}
+
+    def set_mode(
+        self, style: str = "breath", color: str = "cyan", bps: float = 1.0,
+        brightness: float = 1.0, offload: bool = False,
+    ) -> None:
+        logger.info(
+            f"[MOCK] rgb.set_mode(style={style!r}, color={color!r}, bps={bps}, "
+            f"brightness={brightness}, offload={offload})"
+        )
+        self._offloaded = offload and style in ("monochromatic", "breath")
+        if style in self.clips:
+            max_frames = len(self.clips[style])
+        else:
+            max_frames = max(1, int(1 / bps / self.MIN_DELAY))
+        # Colors stay unparsed here, so the key holds the string instead of rgb ints
+        key = (style, str(color), float(brightness), max_frames, self.LIGHTS)
+        if self.frame_cache.get(key) is None:
+            # Blank frames of the real size: only the cache accounting is simulated
+            self.frame_cache.put(key, np.zeros((max_frames, self.LIGHTS, 3), dtype=np.uint8))
+
+    def add_clip(self, name: str, frames: np.ndarray) -> None:
+        logger.info(f"[MOCK] rgb.add_clip({name!r}, frames={len(frames)})")
+        self.clips[name] = frames
+        self.frame_cache.discard(name)
+
+    def remove_clip(self, name: str) -> None:
+        logger.info(f"[MOCK] rgb.remove_clip({name!r})")
+        del self.clips[name]
+        self.frame_cache.discard(name)
+
+    def cache_stats(self) -> dict:
+        return self.frame_cache.stats()
+
+    def bus_stats(self) -> dict:
+        # No I2C bus in mock mode
+        return {
+            "bytes_written": 0, "bytes_saved": 0, "frames_written": 0, "frames_skipped": 0,
+            "offloaded": self._offloaded,
+        }
 
     def close(self) -> None:
         pass
@@ -134,7 +307,10 @@ class MockActionFlow:
         # Simulate immediate execution in mock mode
         for action in actions:
             self._current_action = action
-            self.dog.do_action(action)
+            if action.startswith(ACTION_PREFIX):
+                self.dog.rgb_strip.set_mode(style=action[len(ACTION_PREFIX):])
+            else:
+                self.dog.do_action(action)
         self._current_action = None
         self._queue.clear()
 
@@ -159,6 +335,7 @@ class PidogService:
             self._dog.dual_touch = MockDualTouch()
             self._dog.ears = MockEars()
             self._dog.rgb_strip = MockRGBStrip()
+            self._dog.audio = MockAudioEngine()
             self._action_flow = MockActionFlow(self._dog)
         else:
             logger.info("Initializing PiDog with REAL hardware")
@@ -167,17 +344,16 @@ class PidogService:
             from pidog import Pidog
             from pidog.action_flow import ActionFlow
 
-            self._dog = Pidog()
-            sound_path = Path(settings.pidog_sound_dir).expanduser()
-            if not sound_path.is_absolute():
-                # Anchor relative paths to the api/ directory, not process cwd
-                # __file__ = api/app/services/pidog_service.py → .parent x3 = api/
-                sound_path = Path(__file__).parent.parent.parent / sound_path
-            self._dog.SOUND_DIR = str(sound_path) + "/"
+            # Sound folders passed in, so the audio engine decodes ours once at boot
+            self._dog = Pidog(
+                sound_dir=str(sound_dir_path(settings.pidog_sound_dir)) + "/",
+                sound_cache_dir=str(Path(settings.sound_cache_dir).expanduser()),
+            )
             logger.info(f"Sound directory: {self._dog.SOUND_DIR}")
             self._action_flow = ActionFlow(self._dog)
 
         self._action_flow.start()
+        self._battery = BatterySampler(self._dog.get_battery_voltage, settings)
 
         # Disable the built-in head-bobbing standby animation. The IdleAnimator
         # service (started in main.py lifespan) provides a tail-wag + RGB idle
@@ -195,6 +371,10 @@ class PidogService:
     def action_flow(self):
         return self._action_flow
 
+    @property
+    def battery_sampler(self) -> BatterySampler:
+        return self._battery
+
     def execute_actions(self, actions: list[str], speed: int = 50) -> list[str]:
         with self._lock:
             self._action_flow.add_action(*actions)
@@ -206,6 +386,14 @@ class PidogService:
             self._dog.head_move([[yaw, roll, pitch]], immediately=True, speed=speed)
             logger.info(f"Head moved to yaw={yaw}, roll={roll}, pitch={pitch}")
 
+    def stream_head(
+        self, yaw: float, roll: float, pitch: float, speed: int = 50,
+        on_write: Callable[[], None] | None = None,
+    ) -> None:
+        """Latest-wins head target: replaces a pending one, never waits (see head_streamer)."""
+        with self._lock:
+            self._dog.head_setpoint([yaw, roll, pitch], speed=speed, on_write=on_write)
+
     def set_legs(self, angles: list[float], speed: int = 50) -> None:
         with self._lock:
             self._dog.legs_move([angles], immediately=True, speed=speed)
@@ -217,18 +405,87 @@ class PidogService:
             logger.info(f"Tail moved to {angle}°")
 
     def set_rgb(
-        self, style: str, color: str | list[int], bps: float = 1.0, brightness: float = 1.0
+        self, style: str, color: str | list[int], bps: float = 1.0,
+        brightness: float = 1.0, offload: bool = False,
     ) -> None:
         with self._lock:
             self._dog.rgb_strip.set_mode(
-                style=style, color=color, bps=bps, brightness=brightness
+                style=style, color=color, bps=bps, brightness=brightness, offload=offload
             )
-            logger.info(f"RGB set: style={style}, color={color}")
+            logger.info(f"RGB set: style={style}, color={color}, offload={offload}")
+
+    def add_rgb_clip(self, name: str, frames: np.ndarray) -> bool:
+        """Register a compiled clip with the strip. False if the strip is unavailable."""
+        strip = getattr(self._dog, "rgb_strip", None)
+        if strip is None:
+            return False
+        with self._lock:
+            strip.add_clip(name, frames)
+        logger.info(f"RGB clip added: {name} ({len(frames)} frames)")
+        return True
+
+    def remove_rgb_clip(self, name: str) -> bool:
+        strip = getattr(self._dog, "rgb_strip", None)
+        if strip is None or name not in strip.clips:
+            return False
+        with self._lock:
+            strip.remove_clip(name)
+        logger.info(f"RGB clip removed: {name}")
+        return True
+
+    def get_rgb_clips(self) -> dict[str, np.ndarray]:
+        strip = getattr(self._dog, "rgb_strip", None)
+        return dict(strip.clips) if strip is not None else {}
+
+    def get_rgb_cache_stats(self) -> dict | None:
+        strip = getattr(self._dog, "rgb_strip", None)
+        if strip is None:
+            return None  # RGB strip failed to initialise
+        return strip.cache_stats()
+
+    def get_rgb_bus_stats(self) -> dict | None:
+        strip = getattr(self._dog, "rgb_strip", None)
+        if strip is None:
+            return None
+        return strip.bus_stats()
 
-    def play_sound(self, name: str, volume: int = 80) -> None:
-        # No lock needed — speak() is non-blocking and thread-safe
-        self._dog.speak(name, volume=volume)
-        logger.info(f"Playing sound: {name} at volume {volume}")
+    @property
+    def has_mixer(self) -> bool:
+        """False if the audio engine failed to start and speak() uses robot_hat Music."""
+        return getattr(self._dog, "audio", None) is not None
+
+    @property
+    def sound_library(self):
+        """The audio engine's SoundLibrary, None in mock mode or without the engine."""
+        return getattr(getattr(self._dog, "audio", None), "library", None)
+
+    def play_sound(self, name: str, volume: int = 80, priority: int | None = None) -> dict | None:
+        """Start a sound on the mixer. Returns the voice, or None if it was dropped."""
+        # No lock needed — speak() is non-blocking and the mixer is thread-safe
+        voice = self._dog.speak(name, volume=volume, priority=priority)
+        if not voice:
+            if self.has_mixer:
+                logger.info(f"Sound dropped: {name} (all channels busy with higher priority)")
+            return None
+        logger.info(f"Playing sound: {name} at volume {volume} on channel {voice.index}")
+        return voice.info()
+
+    def open_audio_stream(self, sample_rate: int, channels: int = 1, priority: int = 2):
+        """AudioStream on a mixer channel for PCM produced on the fly (TTS), or None."""
+        if not self.has_mixer:
+            return None
+        return self._dog.audio.stream(sample_rate, channels, priority=priority, name="tts")
+
+    def stop_sound(self, voice_id: int | None = None) -> int:
+        if not self.has_mixer:
+            return 0
+        return self._dog.audio.stop(voice_id)
+
+    def get_sound_voices(self) -> dict | None:
+        if not self.has_mixer:
+            return None
+        audio = self._dog.audio
+        return {"voices": [v.info() for v in audio.voices()], **audio.stats()}
 
     def emergency_stop(self) -> None:
         with self._lock:
@@ -236,7 +493,7 @@ class PidogService:
             logger.warning("EMERGENCY STOP executed")
 
     def get_sensor_data(self) -> SensorData:
-        distance = self._dog.read_distance()
+        distance = self.get_filtered_distance()
         imu = IMUData(pitch=round(self._dog.pitch, 2), roll=round(self._dog.roll, 2))
 
         touch_state = "N"
@@ -257,6 +514,38 @@ class PidogService:
             sound_direction=sound_dir,
         )
 
+    def get_filtered_distance(self) -> float:
+        """Outlier-rejected distance over the last few ultrasonic samples.
+
+        Falls back to the raw reading when the history is stale or every
+        sample in the window was rejected.
+        """
+        timestamps, distances = self._dog.read_distance_history(settings.distance_filter_window)
+        summary = summarize(
+            timestamps, distances, settings.distance_stale_s, settings.distance_outlier_k
+        )
+        if summary.stale or summary.filtered is None:
+            return self._dog.read_distance()
+        return summary.filtered
+
+    def get_distance_history(self, limit: int | None = None) -> DistanceHistory:
+        timestamps, distances = self._dog.read_distance_history(limit)
+        summary = summarize(
+            timestamps, distances, settings.distance_stale_s, settings.distance_outlier_k
+        )
+        samples = [
+            DistanceSample(timestamp=round(float(t), 3), distance=round(float(d), 2), valid=bool(v))
+            for t, d, v in zip(timestamps, distances, summary.valid)
+        ]
+        return DistanceHistory(
+            samples=samples,
+            median=None if summary.median is None else round(summary.median, 2),
+            filtered=None if summary.filtered is None else round(summary.filtered, 2),
+            rejected=summary.rejected,
+            age_s=None if summary.age_s is None else round(summary.age_s, 3),
+            stale=summary.stale,
+        )
+
     def get_servo_positions(self) -> ServoPositions:
         return ServoPositions(
             head=list(self._dog.head_current_angles),
@@ -265,8 +554,14 @@ class PidogService:
         )
 
     def get_battery(self) -> BatteryInfo:
-        voltage = round(self._dog.get_battery_voltage(), 2)
-        return BatteryInfo(voltage=voltage, low=voltage < settings.min_battery_voltage)
+        # Cached by BatterySampler — no ADC read on the request path
+        voltage = round(self._battery.voltage, 2)
+        age = self._battery.age
+        return BatteryInfo(
+            voltage=voltage,
+            low=voltage < settings.min_battery_voltage,
+            age_s=None if age is None else round(age, 2),
+        )
 
     def get_queue_status(self) -> ActionQueueStatus:
         af = self._action_flow
@@ -307,6 +602,7 @@ class PidogService:
         )
 
     def close(self) -> None:
+        self._battery.stop()
         self._action_flow.stop()
         self._dog.close()
         logger.info("PidogService closed")
@@ -8,10 +8,12 @@ from __future__ import annotations
 
 import time
 from collections import deque
+from collections.abc import Collection
 
 from fastapi import HTTPException
 
 from ..models.rgb import RGB_STYLES
+from .rgb_clips import ACTION_PREFIX
 
 # --- Action metadata ---
 # Maps action name -> (required_posture, description, body_part, has_sound)
@@ -74,11 +76,14 @@ class SafetyValidator:
         self.max_action_rate = max_action_rate
         self._action_timestamps: deque[float] = deque()
 
-    def validate_actions(self, actions: list[str]) -> None:
-        invalid = [a for a in actions if a not in VALID_ACTIONS]
+    def validate_actions(self, actions: list[str], rgb_clips: Collection[str] = ()) -> None:
+        # "rgb:<clip>" plays an uploaded RGB clip as a step of the sequence
+        clip_actions = {f"{ACTION_PREFIX}{name}" for name in rgb_clips}
+        invalid = [a for a in actions if a not in VALID_ACTIONS and a not in clip_actions]
         if invalid:
             raise SafetyError(
-                f"Unknown actions: {invalid}. Valid actions: {sorted(VALID_ACTIONS)}"
+                f"Unknown actions: {invalid}. Valid actions: "
+                f"{sorted(VALID_ACTIONS) + sorted(clip_actions)}"
             )
 
     def validate_head(self, yaw: float, roll: float, pitch: float) -> None:
@@ -104,10 +109,10 @@ class SafetyValidator:
                 "Charge the battery before executing movement commands."
             )
 
-    def validate_rgb_style(self, style: str) -> None:
-        if style not in RGB_STYLES:
+    def validate_rgb_style(self, style: str, clips: Collection[str] = ()) -> None:
+        if style not in RGB_STYLES and style not in clips:
             raise SafetyError(
-                f"Unknown RGB style '{style}'. Valid: {RGB_STYLES}"
+                f"Unknown RGB style '{style}'. Valid: {RGB_STYLES + sorted(clips)}"
             )
 
     def check_rate_limit(self) -> None:
@@ -0,0 +1,285 @@
+"""Fixed-memory sensor time-series store with server-side downsampling.
+
+Records IMU pitch/roll, filtered distance, battery voltage and head-monitor
+variance in the API process so dashboards can chart history they did not
+catch live on the WebSocket.
+
+Storage:
+  - One array-backed ring per resolution tier; every sample is folded into
+    all tiers, each keeping per-bucket mean/min/max for every field
+  - Default tiers: raw samples for 10 min, 5 s buckets for 2 h,
+    60 s buckets for 24 h (~0.75 MB total, allocated once at startup)
+
+Queries pick the finest tier that still covers the requested range, then
+downsample on the server:
+  - lttb:   Largest-Triangle-Three-Buckets on the bucket means (keeps shape)
+  - minmax: equal-count buckets reporting mean, min and max (keeps extremes)
+  - raw:    the tier's buckets as stored
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+
+import numpy as np
+
+logger = logging.getLogger("pidog.history")
+
+FIELDS = ("pitch", "roll", "distance", "battery", "head_variance")
+
+# (bucket seconds, retained seconds); bucket 0 means "one per sample"
+TIERS: tuple[tuple[float, float], ...] = ((0.0, 600.0), (5.0, 7200.0), (60.0, 86400.0))
+
+METHODS = ("lttb", "minmax", "raw")
+
+
+class _Ring:
+    """Bucketed ring buffer for one resolution tier."""
+
+    def __init__(self, resolution: float, capacity: int, n_fields: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.t = np.full(capacity, np.nan)
+        self.mean = np.full((capacity, n_fields), np.nan)
+        self.min = np.full((capacity, n_fields), np.nan)
+        self.max = np.full((capacity, n_fields), np.nan)
+        self.written = 0  # total buckets flushed
+
+        # Accumulator for the bucket in progress
+        self._bucket: float | None = None
+        self._sum = np.zeros(n_fields)
+        self._n = np.zeros(n_fields)
+        self._min = np.full(n_fields, np.inf)
+        self._max = np.full(n_fields, -np.inf)
+
+    def add(self, t: float, values: np.ndarray) -> None:
+        if self.resolution <= 0:
+            self._write(t, values, values, values)
+            return
+
+        bucket = math.floor(t / self.resolution) * self.resolution
+        if self._bucket is not None and bucket != self._bucket:
+            self._flush()
+        self._bucket = bucket
+
+        present = ~np.isnan(values)
+        self._sum[present] += values[present]
+        self._n[present] += 1
+        self._min[present] = np.minimum(self._min[present], values[present])
+        self._max[present] = np.maximum(self._max[present], values[present])
+
+    def _flush(self) -> None:
+        empty = self._n == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self._sum / self._n
+        mean[empty] = np.nan
+        lo = np.where(empty, np.nan, self._min)
+        hi = np.where(empty, np.nan, self._max)
+        self._write(self._bucket, mean, lo, hi)
+        self._sum[:] = 0
+        self._n[:] = 0
+        self._min[:] = np.inf
+        self._max[:] = -np.inf
+
+    def _write(self, t: float, mean: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> None:
+        i = self.written % self.capacity
+        self.t[i] = t
+        self.mean[i] = mean
+        self.min[i] = lo
+        self.max[i] = hi
+        self.written += 1
+
+    @property
+    def oldest(self) -> float | None:
+        if self.written == 0:
+            return None
+        if self.written < self.capacity:
+            return float(self.t[0])
+        return float(self.t[self.written % self.capacity])
+
+    def query(self, start: float, end: float) -> tuple[np.ndarray, ...]:
+        """Return (t, mean, min, max) for stored buckets in [start, end], oldest first."""
+        n = min(self.written, self.capacity)
+        idx = np.arange(self.written - n, self.written) % self.capacity
+        t = self.t[idx]
+        sel = (t >= start) & (t <= end)
+        idx = idx[sel]
+        return self.t[idx], self.mean[idx], self.min[idx], self.max[idx]
+
+
+def lttb(t: np.ndarray, v: np.ndarray, points: int) -> tuple[np.ndarray, np.ndarray]:
+    """Largest-Triangle-Three-Buckets downsampling of a single series."""
+    n = len(t)
+    if points >= n or points < 3:
+        return t, v
+
+    out = np.empty(points, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle vertex
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_t = t[nxt_lo:nxt_hi].mean()
+        avg_v = v[nxt_lo:nxt_hi].mean()
+        area = np.abs(
+            (t[a] - avg_t) * (v[lo:hi] - v[a]) - (t[a] - t[lo:hi]) * (avg_v - v[a])
+        )
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return t[out], v[out]
+
+
+def minmax_buckets(
+    t: np.ndarray, mean: np.ndarray, lo: np.ndarray, hi: np.ndarray, points: int
+) -> tuple[np.ndarray, ...]:
+    """Re-bucket a series into at most `points` equal-count buckets."""
+    n = len(t)
+    if points >= n:
+        return t, mean, lo, hi
+    edges = np.linspace(0, n, points + 1).astype(int)
+    starts = edges[:-1]
+    return (
+        t[starts],
+        np.add.reduceat(mean, starts) / np.diff(edges),
+        np.minimum.reduceat(lo, starts),
+        np.maximum.reduceat(hi, starts),
+    )
+
+
+class SensorHistory:
+    """Background recorder + query engine for sensor time series.
+
+    Instantiate and call start() inside the FastAPI lifespan; query via
+    query() or GET /sensors/history.
+    """
+
+    def __init__(self, pidog_service, head_monitor, settings):
+        self._service = pidog_service
+        self._head_monitor = head_monitor
+        self._enabled: bool = settings.history_enabled
+        self._interval: float = 1.0 / settings.history_sample_hz
+        self._rings = [
+            _Ring(
+                resolution=res,
+                capacity=int(span / (res or self._interval)),
+                n_fields=len(FIELDS),
+            )
+            for res, span in TIERS
+        ]
+        self._task: asyncio.Task | None = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"SensorHistory started (enabled={self._enabled}, "
+            f"sample={1 / self._interval:.0f}Hz, tiers={len(self._rings)})"
+        )
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            logger.info("SensorHistory stopped")
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    async def _run(self) -> None:
+        if not self._enabled:
+            logger.info("SensorHistory disabled — not recording")
+            return
+
+        while True:
+            try:
+                self.record(time.time(), self._sample())
+                await asyncio.sleep(self._interval)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("SensorHistory error")
+                await asyncio.sleep(1.0)
+
+    def _sample(self) -> dict[str, float]:
+        dog = self._service.dog
+        return {
+            "pitch": float(dog.pitch),
+            "roll": float(dog.roll),
+            "distance": float(self._service.get_filtered_distance()),
+            # Cached by BatterySampler, so this is not an ADC read
+            "battery": float(self._service.get_battery().voltage),
+            "head_variance": float(self._head_monitor.variance),
+        }
+
+    def record(self, timestamp: float, sample: dict[str, float]) -> None:
+        """Fold one sample into every tier. Missing fields are stored as gaps."""
+        values = np.array([sample.get(f, np.nan) for f in FIELDS], dtype=float)
+        if "distance" in sample and values[FIELDS.index("distance")] < 0:
+            values[FIELDS.index("distance")] = np.nan
+        for ring in self._rings:
+            ring.add(timestamp, values)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _pick_ring(self, start: float) -> _Ring:
+        # A ring that has not wrapped yet holds everything recorded so far
+        for ring in self._rings:
+            if ring.written < ring.capacity or ring.oldest <= start:
+                return ring
+        return self._rings[-1]
+
+    def query(
+        self,
+        fields: list[str],
+        seconds: float,
+        points: int,
+        method: str = "lttb",
+        now: float | None = None,
+    ) -> dict:
+        end = time.time() if now is None else now
+        start = end - seconds
+        ring = self._pick_ring(start)
+        t, mean, lo, hi = ring.query(start, end)
+
+        series: dict[str, dict] = {}
+        for name in fields:
+            col = FIELDS.index(name)
+            present = ~np.isnan(mean[:, col])
+            ft, fm = t[present], mean[present, col]
+            fl, fh = lo[present, col], hi[present, col]
+
+            if method == "lttb":
+                ft, fm = lttb(ft, fm, points)
+                series[name] = {"t": _round(ft, 3), "value": _round(fm, 4)}
+            elif method == "minmax":
+                ft, fm, fl, fh = minmax_buckets(ft, fm, fl, fh, points)
+                series[name] = {
+                    "t": _round(ft, 3),
+                    "value": _round(fm, 4),
+                    "min": _round(fl, 4),
+                    "max": _round(fh, 4),
+                }
+            else:
+                series[name] = {"t": _round(ft, 3), "value": _round(fm, 4)}
+
+        return {
+            "start": start,
+            "end": end,
+            "method": method,
+            "resolution_s": ring.resolution or self._interval,
+            "series": series,
+        }
+
+
+def _round(values: np.ndarray, digits: int) -> list[float]:
+    return np.round(values, digits).tolist()
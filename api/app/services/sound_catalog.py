@@ -0,0 +1,192 @@
+"""Sound library index for the API: names, formats and durations.
+
+Built on pidog/sound_library.py, the index the robot plays from: files in
+the sound directory are indexed by name once, and the index is rebuilt only
+when the directory's mtime changes. Durations come from the file headers —
+the WAV header, or for MP3 the Xing/Info/VBRI frame count or, for CBR
+files, the bitrate — so nothing is decoded.
+
+`transcoded` reports whether a compressed sound already has its PCM copy
+in the robot's WAV cache (named by the SHA-1 of the source file). Hashes
+come from the cache's manifest, so unchanged files are not re-read. On the
+robot the catalog shares the audio engine's SoundLibrary, so there is one
+index and one manifest writer per cache folder. entries() may hash files:
+call it off the event loop.
+"""
+
+from __future__ import annotations
+
+import logging
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+from pidog.sound_library import SoundLibrary
+
+logger = logging.getLogger("pidog.sound")
+
+# MPEG audio Layer III tables, indexed by header fields
+_MP3_BITRATES = {  # kbps
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+_MP3_VERSIONS = {0b00: 2.5, 0b10: 2, 0b11: 1}
+
+
+@dataclass
+class SoundEntry:
+    name: str
+    path: Path
+    format: str
+    bytes: int
+    duration_s: float | None
+    sample_rate: int | None
+    channels: int | None
+    transcoded: bool | None  # None for PCM sources, which are never cached
+
+
+def sound_dir_path(setting: str) -> Path:
+    """Resolve PIDOG_PIDOG_SOUND_DIR, anchoring relative paths to the api/ directory."""
+    path = Path(setting).expanduser()
+    if not path.is_absolute():
+        # __file__ = api/app/services/sound_catalog.py → .parent x3 = api/
+        path = Path(__file__).parent.parent.parent / path
+    return path
+
+
+def wav_info(path: Path) -> tuple[float, int, int]:
+    """(duration_s, sample_rate, channels) from a WAV header.
+
+    Walks the RIFF chunks directly: the stdlib wave module rejects
+    WAVE_FORMAT_EXTENSIBLE files before Python 3.12.
+    """
+    with open(path, "rb") as f:
+        riff, _, fmt = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or fmt != b"WAVE":
+            raise ValueError(f"{path.name} is not a RIFF/WAVE file")
+        channels = rate = block_align = None
+        while header := f.read(8):
+            chunk, size = struct.unpack("<4sI", header)
+            if chunk == b"fmt ":
+                _, channels, rate, _, block_align = struct.unpack("<HHIIH", f.read(14))
+                f.seek(size - 14 + (size & 1), 1)
+            elif chunk == b"data":
+                if rate is None:
+                    raise ValueError(f"{path.name}: data chunk before fmt chunk")
+                return size / (rate * block_align), rate, channels
+            else:
+                f.seek(size + (size & 1), 1)  # chunks are word-aligned
+    raise ValueError(f"{path.name} has no data chunk")
+
+
+def mp3_info(path: Path) -> tuple[float, int, int]:
+    """(duration_s, sample_rate, channels) from MP3 headers, without decoding."""
+    data = path.read_bytes()
+    pos = 0
+    if data[:3] == b"ID3":
+        # ID3v2 size is syncsafe (7 bits per byte), plus 10-byte header and optional footer
+        size = 0
+        for b in data[6:10]:
+            size = (size << 7) | (b & 0x7F)
+        pos = 10 + size + (10 if data[5] & 0x10 else 0)
+
+    # First frame sync: 11 set bits, Layer III
+    while pos + 4 <= len(data):
+        if data[pos] == 0xFF and (data[pos + 1] & 0xE0) == 0xE0 and (data[pos + 1] >> 1) & 0b11 == 0b01:
+            version = _MP3_VERSIONS.get((data[pos + 1] >> 3) & 0b11)
+            bitrate_idx = data[pos + 2] >> 4
+            rate_idx = (data[pos + 2] >> 2) & 0b11
+            if version is not None and 0 < bitrate_idx < 15 and rate_idx < 3:
+                break
+        pos += 1
+    else:
+        raise ValueError(f"No MPEG Layer III frame in {path.name}")
+
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_idx]
+    bitrate = _MP3_BITRATES[1 if version == 1 else 2][bitrate_idx] * 1000
+    mono = (data[pos + 3] >> 6) == 0b11
+    channels = 1 if mono else 2
+    samples_per_frame = 1152 if version == 1 else 576
+
+    # VBR header in the first frame: Xing/Info after the side info, or VBRI at +36
+    side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+    xing = pos + 4 + side_info
+    frames = None
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing + 4:xing + 8])[0]
+        if flags & 0x1:
+            frames = struct.unpack(">I", data[xing + 8:xing + 12])[0]
+    elif data[pos + 36:pos + 40] == b"VBRI":
+        frames = struct.unpack(">I", data[pos + 50:pos + 54])[0]
+
+    if frames is not None:
+        duration = frames * samples_per_frame / sample_rate
+    else:
+        duration = (len(data) - pos) * 8 / bitrate
+    return duration, sample_rate, channels
+
+
+class SoundCatalog:
+    """Name → file index of the sound directory, refreshed when it changes."""
+
+    def __init__(self, sound_dir: Path, cache_dir: Path, library: SoundLibrary | None = None):
+        self.sound_dir = sound_dir
+        self.cache_dir = cache_dir
+        # Pass the audio engine's library when there is one: a second instance
+        # would index the folder again and race it writing the manifest. Ours
+        # has no decoder: the API only reads the robot's cache, never transcodes
+        self._library = library or SoundLibrary(str(sound_dir), str(cache_dir))
+        self._indexed: dict[str, str] | None = None  # the library index _entries was built from
+        self._entries: dict[str, SoundEntry] = {}
+        self._index()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-index if the directory changed. Returns True if it was re-indexed."""
+        self._library.refresh(force)
+        # the engine may have rebuilt the shared index itself: compare it, not refresh()'s result
+        if self._library.index is self._indexed:
+            return False
+        self._index()
+        return True
+
+    def _index(self) -> None:
+        self._indexed = self._library.index
+        self._entries = {name: self._entry(Path(path)) for name, path in self._indexed.items()}
+        logger.info(f"Sound library indexed: {len(self._entries)} sounds in {self.sound_dir}")
+
+    def _entry(self, path: Path) -> SoundEntry:
+        fmt = path.suffix[1:]
+        try:
+            duration, rate, channels = wav_info(path) if fmt == "wav" else mp3_info(path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Could not read {path.name}: {e}")
+            duration = rate = channels = None
+        return SoundEntry(
+            name=path.stem,
+            path=path,
+            format=fmt,
+            bytes=path.stat().st_size,
+            duration_s=None if duration is None else round(duration, 3),
+            sample_rate=rate,
+            channels=channels,
+            transcoded=None,
+        )
+
+    def names(self) -> set[str]:
+        self.refresh()
+        return set(self._entries)
+
+    def entries(self) -> list[SoundEntry]:
+        self.refresh()
+        out = []
+        for entry in sorted(self._entries.values(), key=lambda e: e.name):
+            if entry.path.suffix not in SoundLibrary.PCM_EXTENSIONS:
+                try:
+                    digest = self._library.content_hash(str(entry.path), save=False)
+                    entry.transcoded = (Path(self._library.cache_dir) / f"{digest}.wav").is_file()
+                except OSError:
+                    entry.transcoded = False
+            out.append(entry)
+        self._library.save_manifest()  # once, for every hash added above
+        return out
@@ -0,0 +1,406 @@
+"""Text-to-speech with a phrase-level cache and streaming playback.
+
+Answers are split into phrases (sentences and clauses), and each phrase is
+cached independently, so the short phrases the dog says over and over
+("Okay!", "Woof woof!") are synthesized once, even inside different answers.
+
+  - Engines yield 16-bit mono PCM as they synthesize (see TTSEngine)
+  - Cache: bytes-capped in-memory LRU in front of a WAV file per phrase on
+    disk, keyed by SHA-1 of engine, voice and normalized text, so restarts
+    keep their phrases
+  - Playback: an AudioStream on the robot's mixer. Chunks are written as
+    they arrive; the first phrase starts playing while the rest of the
+    answer is still being synthesized
+
+Engines: "piper" (local Piper TTS binary, one long-lived process per voice)
+and "tone", a dependency-free stand-in that renders each word as a short
+beep — used by tests and for development without a voice model.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import re
+import shutil
+import tempfile
+import threading
+import time
+import wave
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger("pidog.tts")
+
+SAMPLE_WIDTH = 2  # bytes, every engine produces 16-bit PCM
+PRIORITY_HIGH = 2  # mixer priority: speech cuts off ambient sounds
+
+_PHRASE_END = re.compile(r"(?<=[.!?;:])\s+|\n+")
+
+
+def normalize(text: str) -> str:
+    """Cache-key form of a phrase: whitespace collapsed, case-folded."""
+    return " ".join(text.split()).casefold()
+
+
+def split_phrases(text: str) -> list[str]:
+    """Split an answer into phrases at sentence/clause ends."""
+    return [p.strip() for p in _PHRASE_END.split(text) if p.strip()]
+
+
+# ------------------------------------------------------------------
+# Engines
+# ------------------------------------------------------------------
+
+
+class TTSEngine(ABC):
+    @property
+    @abstractmethod
+    def name(self) -> str: ...
+
+    @property
+    @abstractmethod
+    def sample_rate(self) -> int: ...
+
+    @abstractmethod
+    def synthesize(self, text: str, voice: str) -> AsyncIterator[bytes]:
+        """Yield 16-bit mono PCM chunks as soon as they are synthesized."""
+
+    async def close(self) -> None:
+        """Release processes or models held between phrases."""
+
+
+class PiperEngine(TTSEngine):
+    """Local Piper TTS (https://github.com/rhasspy/piper) via its CLI.
+
+    Loading a voice model takes seconds on a Pi, far longer than
+    synthesizing a phrase, so each voice gets one long-lived process: piper
+    reads one line of text per utterance on stdin and, with --output_dir,
+    writes it to a WAV and prints the path. Phrases are already sentences,
+    which is also the granularity --output-raw streams at, so waiting for
+    the whole phrase costs nothing the model reload didn't cost many times
+    over — and raw output has no marker where one utterance ends.
+    """
+
+    CHUNK = 4096
+
+    def __init__(self, binary: str, model_dir: str):
+        self._binary = binary
+        self._model_dir = Path(model_dir).expanduser()
+        self._rates: dict[str, int] = {}
+        self._procs: dict[str, asyncio.subprocess.Process] = {}
+        self._locks: dict[str, asyncio.Lock] = {}  # one utterance at a time per process
+        self._killed: list[asyncio.subprocess.Process] = []  # reaped in close()
+        self._out_dir: Path | None = None
+        self.starts = 0  # processes spawned, i.e. model loads
+
+    @property
+    def name(self) -> str:
+        return "piper"
+
+    @property
+    def sample_rate(self) -> int:
+        return self._rates.get("default", 22050)
+
+    def voice_rate(self, voice: str) -> int:
+        """Sample rate from the voice's model config (<voice>.onnx.json)."""
+        if voice not in self._rates:
+            try:
+                config = json.loads((self._model_dir / f"{voice}.onnx.json").read_text())
+                self._rates[voice] = int(config["audio"]["sample_rate"])
+            except (OSError, KeyError, ValueError):
+                self._rates[voice] = 22050
+        return self._rates[voice]
+
+    async def _process(self, voice: str) -> asyncio.subprocess.Process:
+        proc = self._procs.get(voice)
+        if proc is not None and proc.returncode is None:
+            return proc
+        if self._out_dir is None:
+            self._out_dir = Path(tempfile.mkdtemp(prefix="pidog-piper-"))
+        proc = await asyncio.create_subprocess_exec(
+            self._binary, "--model", str(self._model_dir / f"{voice}.onnx"),
+            "--output_dir", str(self._out_dir),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self._procs[voice] = proc
+        self.starts += 1
+        logger.info(f"Piper started for voice {voice} (pid {proc.pid})")
+        return proc
+
+    @staticmethod
+    def _read_wav(path: Path) -> bytes:
+        try:
+            with wave.open(str(path), "rb") as w:
+                return w.readframes(w.getnframes())
+        finally:
+            path.unlink(missing_ok=True)
+
+    async def synthesize(self, text, voice):
+        line = " ".join(text.split())  # one line is one utterance
+        if not line:
+            return
+        async with self._locks.setdefault(voice, asyncio.Lock()):
+            proc = await self._process(voice)
+            try:
+                proc.stdin.write(line.encode() + b"\n")
+                await proc.stdin.drain()
+                path = (await proc.stdout.readline()).decode().strip()
+            except BaseException:
+                # Cancelled or broken pipe mid-utterance: its output would be
+                # taken for the next phrase's, so start over with a new process
+                self._kill(voice)
+                raise
+            if not path:
+                await proc.wait()
+                raise RuntimeError(f"piper exited with code {proc.returncode}")
+            pcm = await asyncio.to_thread(self._read_wav, Path(path))
+        for i in range(0, len(pcm), self.CHUNK):
+            yield pcm[i:i + self.CHUNK]
+
+    def _kill(self, voice: str) -> None:
+        proc = self._procs.pop(voice, None)
+        if proc is not None and proc.returncode is None:
+            proc.kill()
+            self._killed.append(proc)
+
+    async def close(self) -> None:
+        for voice in list(self._procs):
+            self._kill(voice)
+        for proc in self._killed:
+            await proc.wait()
+        self._killed.clear()
+        if self._out_dir is not None:
+            shutil.rmtree(self._out_dir, ignore_errors=True)
+            self._out_dir = None
+
+
+class ToneEngine(TTSEngine):
+    """Stand-in engine: one short beep per word, pitch derived from the word."""
+
+    RATE = 16000
+    WORD_S = 0.12
+
+    def __init__(self, word_delay_s: float = 0.0):
+        self._delay = word_delay_s  # simulated synthesis time per word
+
+    @property
+    def name(self) -> str:
+        return "tone"
+
+    @property
+    def sample_rate(self) -> int:
+        return self.RATE
+
+    async def synthesize(self, text, voice):
+        t = np.arange(int(self.RATE * self.WORD_S)) / self.RATE
+        for word in text.split():
+            if self._delay:
+                await asyncio.sleep(self._delay)
+            freq = 300 + int(hashlib.sha1(word.encode()).hexdigest()[:4], 16) % 500
+            beep = np.sin(2 * math.pi * freq * t) * 8000 * np.hanning(len(t))
+            yield beep.astype(np.int16).tobytes()
+
+
+def get_tts_engine(settings) -> TTSEngine:
+    """Factory for TTS engines."""
+    if settings.tts_engine == "piper":
+        return PiperEngine(settings.piper_binary, settings.piper_model_dir)
+    elif settings.tts_engine == "tone":
+        return ToneEngine()
+    raise ValueError(f"Unknown TTS engine: {settings.tts_engine}. Use 'piper' or 'tone'.")
+
+
+# ------------------------------------------------------------------
+# Cache
+# ------------------------------------------------------------------
+
+
+class PhraseCache:
+    """PCM per phrase: bytes-capped memory LRU backed by WAV files on disk."""
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self._dir = cache_dir
+        self._max_bytes = max_bytes
+        self._memory: OrderedDict[str, tuple[bytes, int]] = OrderedDict()  # key -> (pcm, rate)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(engine: str, voice: str, text: str) -> str:
+        return hashlib.sha1(f"{engine}\0{voice}\0{normalize(text)}".encode()).hexdigest()
+
+    def get(self, key: str) -> tuple[bytes, int] | None:
+        return self.get_memory(key) or self.load(key)
+
+    def get_memory(self, key: str) -> tuple[bytes, int] | None:
+        """Memory only: cheap enough for the event loop."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return entry
+
+    def load(self, key: str) -> tuple[bytes, int] | None:
+        """From the disk cache (blocking), remembered in memory on a hit."""
+        try:
+            with wave.open(str(self._dir / f"{key}.wav"), "rb") as w:
+                entry = (w.readframes(w.getnframes()), w.getframerate())
+        except (OSError, EOFError, wave.Error):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, pcm: bytes, rate: int) -> None:
+        """Remember and write to disk (blocking)."""
+        self._remember(key, (pcm, rate))
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            tmp = self._dir / f"{key}.wav.tmp"
+            with wave.open(str(tmp), "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(SAMPLE_WIDTH)
+                w.setframerate(rate)
+                w.writeframes(pcm)
+            tmp.replace(self._dir / f"{key}.wav")
+        except OSError as e:
+            logger.warning(f"TTS disk cache write failed: {e}")
+
+    def _remember(self, key: str, entry: tuple[bytes, int]) -> None:
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._memory[key] = entry
+            self._bytes += len(entry[0])
+            while self._bytes > self._max_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._bytes -= len(evicted[0])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._memory),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+# ------------------------------------------------------------------
+# Service
+# ------------------------------------------------------------------
+
+
+class TTSService:
+    """Speak text on the robot's speaker, phrase by phrase, from cache or engine."""
+
+    def __init__(self, pidog_service, settings, engine: TTSEngine | None = None):
+        self._service = pidog_service
+        self._engine = engine or get_tts_engine(settings)
+        self._voice: str = settings.tts_voice
+        self._cache = PhraseCache(
+            Path(settings.tts_cache_dir).expanduser(), settings.tts_memory_cache_bytes
+        )
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def engine(self) -> TTSEngine:
+        return self._engine
+
+    def _rate(self, voice: str) -> int:
+        if isinstance(self._engine, PiperEngine):
+            return self._engine.voice_rate(voice)
+        return self._engine.sample_rate
+
+    async def speak(self, text: str, voice: str | None = None) -> dict:
+        """Synthesize (or fetch) and play text. Returns timing and cache info.
+
+        Returns once every phrase has been handed to the mixer; playback of
+        the tail continues after that.
+        """
+        voice = voice or self._voice
+        rate = self._rate(voice)
+        phrases = split_phrases(text)
+        start = time.perf_counter()
+        first_audio: float | None = None
+        cached = 0
+        total = 0
+
+        stream = self._service.open_audio_stream(rate, priority=PRIORITY_HIGH)
+        if stream is None:
+            logger.warning("TTS: no audio channel available, synthesizing to cache only")
+        try:
+            for phrase in phrases:
+                key = PhraseCache.key(self._engine.name, voice, phrase)
+                entry = self._cache.get_memory(key) or await asyncio.to_thread(self._cache.load, key)
+                if entry is not None:
+                    cached += 1
+                    pcm = entry[0]
+                    if stream is not None:
+                        stream.write(pcm)
+                    first_audio = first_audio or time.perf_counter()
+                else:
+                    chunks = []
+                    async for chunk in self._engine.synthesize(phrase, voice):
+                        chunks.append(chunk)
+                        if stream is not None:
+                            stream.write(chunk)
+                        first_audio = first_audio or time.perf_counter()
+                    pcm = b"".join(chunks)
+                    await asyncio.to_thread(self._cache.put, key, pcm, rate)
+                total += len(pcm)
+        finally:
+            if stream is not None:
+                stream.close()
+
+        result = {
+            "phrases": len(phrases),
+            "cached_phrases": cached,
+            "played": stream is not None,
+            "first_audio_ms": None if first_audio is None else round((first_audio - start) * 1000, 1),
+            "duration_s": round(total / SAMPLE_WIDTH / rate, 3),
+        }
+        logger.info(f"TTS spoke {len(phrases)} phrase(s), {cached} cached, first audio {result['first_audio_ms']} ms")
+        return result
+
+    def speak_background(self, text: str, voice: str | None = None) -> None:
+        """Start speaking without waiting, e.g. while the agent executes actions."""
+        task = asyncio.create_task(self._speak_logged(text, voice))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _speak_logged(self, text: str, voice: str | None) -> None:
+        try:
+            await self.speak(text, voice)
+        except Exception:
+            logger.exception("TTS error")
+
+    async def stop(self) -> None:
+        """Cancel background speech and release the engine."""
+        for task in list(self._tasks):
+            task.cancel()
+        await self._engine.close()
+        logger.info("TTSService stopped")
+
+    def stats(self) -> dict:
+        return {"engine": self._engine.name, "voice": self._voice, **self._cache.stats()}
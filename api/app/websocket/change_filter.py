@@ -0,0 +1,65 @@
+"""On-change publishing for streamed channels, with deadbands and keyframes.
+
+A channel is published when any field moved past its deadband since the
+last *published* value (not the last sample, so slow drift still crosses
+the band eventually), or when the keyframe interval has passed since the
+last publish. Every published message is a full snapshot, so a client
+rebuilds state from whichever message it got last.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+# Flattened field -> minimum change worth publishing. Fields without a band
+# (touch, sound direction, action state) publish on any change.
+SENSOR_DEADBANDS = {"distance": 1.0, "imu.pitch": 0.2, "imu.roll": 0.2}
+
+
+def flatten(data: dict, prefix: str = "") -> dict[str, Any]:
+    """{"imu": {"pitch": 1}} -> {"imu.pitch": 1}"""
+    out: dict[str, Any] = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            out.update(flatten(value, f"{prefix}{key}."))
+        else:
+            out[f"{prefix}{key}"] = value
+    return out
+
+
+class ChangeFilter:
+    def __init__(self, deadbands: dict[str, float] | None = None, keyframe_s: float = 5.0):
+        self._deadbands = deadbands or {}
+        self._keyframe_s = keyframe_s
+        self._last: dict[str, Any] | None = None
+        self._last_time = 0.0
+        self.published = 0
+        self.suppressed = 0
+
+    def should_publish(self, values: dict[str, Any], now: float) -> bool:
+        """Decide for a flattened sample; remembers it as the published value if True."""
+        if self._last is None or now - self._last_time >= self._keyframe_s or self._changed(values):
+            self._last = values
+            self._last_time = now
+            self.published += 1
+            return True
+        self.suppressed += 1
+        return False
+
+    def reset(self) -> None:
+        """Publish the next sample regardless of change."""
+        self._last = None
+
+    def _changed(self, values: dict[str, Any]) -> bool:
+        for key, value in values.items():
+            last = self._last.get(key)
+            band = self._deadbands.get(key)
+            if band and isinstance(value, (int, float)) and isinstance(last, (int, float)):
+                if abs(value - last) >= band:
+                    return True
+            elif value != last:
+                return True
+        return False
+
+    def stats(self) -> dict:
+        return {"published": self.published, "suppressed": self.suppressed}
@@ -0,0 +1,143 @@
+"""Servo and action commands over the WebSocket, for joystick-rate control.
+
+A command is a message whose type is a command name, with an optional
+client sequence number and the same fields as the matching REST body:
+
+    {"type": "head", "seq": 41, "yaw": 10, "roll": 0, "pitch": -5, "speed": 80}
+    {"type": "tail", "seq": 42, "angle": 30}
+    {"type": "legs", "seq": 43, "angles": [..8 angles..], "speed": 50}
+    {"type": "action", "seq": 44, "actions": ["wag tail"], "speed": 50}
+    {"type": "head_stream", "t": 1708387200.512, "yaw": 10, "roll": 0, "pitch": -5}
+
+Every command is answered with an `ack` carrying its seq, except
+`head_stream`: streamed setpoints (see services/head_streamer.py) are
+fire-and-forget and only acked when rejected — invalid, or discarded as
+older than one already played. Validation is the
+REST path's: the same Pydantic models, then SafetyValidator (limits, speed,
+battery from the sampler cache). The action rate limit applies to `action`
+only; servo setpoints are meant to stream at 30-60 Hz.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+
+from pydantic import BaseModel, ValidationError
+
+from ..models.actions import ActionRequest
+from ..models.servos import HeadCommand, HeadStreamCommand, LegsCommand, TailCommand
+from ..services.safety import SafetyError, SafetyValidator
+
+logger = logging.getLogger("pidog.websocket")
+
+COMMANDS: dict[str, type[BaseModel]] = {
+    "head": HeadCommand,
+    "head_stream": HeadStreamCommand,
+    "tail": TailCommand,
+    "legs": LegsCommand,
+    "action": ActionRequest,
+}
+
+
+class CommandRejected(Exception):
+    """A valid command that was not carried out; the message is the ack error."""
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc'])) or 'body'}: {err['msg']}" for err in e.errors())
+
+
+class CommandHandler:
+    def __init__(self, pidog_service, safety: SafetyValidator, head_streamer=None):
+        self._service = pidog_service
+        self._safety = safety
+        self._head_streamer = head_streamer
+        self._stats = {name: {"ok": 0, "rejected": 0, "time_s": 0.0} for name in COMMANDS}
+
+    def execute(self, message: dict, source=None) -> dict | None:
+        """Validate and run one command message. Returns the ack body, or None for no ack.
+
+        `source` identifies the sender (its WebSocket) for per-client state.
+        """
+        command = message["type"]
+        ack = {"seq": message.get("seq"), "command": command, "ok": True}
+        start = time.perf_counter()
+        try:
+            fields = {k: v for k, v in message.items() if k not in ("type", "seq")}
+            body = COMMANDS[command].model_validate(fields)
+            if command == "head_stream":
+                result = self._head_stream(body, source)
+            else:
+                result = getattr(self, f"_{command}")(body)
+            if result is not None:
+                ack["result"] = result
+        except ValidationError as e:
+            ack.update(ok=False, error=_validation_message(e))
+        except SafetyError as e:
+            ack.update(ok=False, error=e.detail)
+        except CommandRejected as e:
+            ack.update(ok=False, error=str(e))
+        except Exception as e:
+            # e.g. an I2C error: fail this command, keep the control connection
+            logger.exception(f"Command {command!r} failed")
+            ack.update(ok=False, error=f"{command} failed: {e}")
+
+        stats = self._stats[command]
+        stats["ok" if ack["ok"] else "rejected"] += 1
+        stats["time_s"] += time.perf_counter() - start
+        if command == "head_stream" and ack["ok"]:
+            return None
+        return ack
+
+    def _head(self, body: HeadCommand) -> None:
+        self._safety.validate_head(body.yaw, body.roll, body.pitch)
+        self._safety.validate_speed(body.speed)
+        self._safety.validate_battery(self._service.get_battery().voltage)
+        self._service.set_head(body.yaw, body.roll, body.pitch, speed=body.speed)
+
+    def forget(self, source) -> None:
+        """Drop per-client state when a client disconnects."""
+        if self._head_streamer is not None:
+            self._head_streamer.forget(source)
+
+    def _head_stream(self, body: HeadStreamCommand, source=None) -> None:
+        self._safety.validate_head(body.yaw, body.roll, body.pitch)
+        self._safety.validate_speed(body.speed)
+        self._safety.validate_battery(self._service.get_battery().voltage)
+        if self._head_streamer is None:
+            self._service.stream_head(body.yaw, body.roll, body.pitch, speed=body.speed)
+        else:
+            played = self._head_streamer.submit(
+                body.yaw, body.roll, body.pitch, speed=body.speed, client_ts=body.t, source=source
+            )
+            if not played:
+                raise CommandRejected("Stale setpoint: older than one already played")
+
+    def _tail(self, body: TailCommand) -> None:
+        self._safety.validate_tail(body.angle)
+        self._safety.validate_speed(body.speed)
+        self._safety.validate_battery(self._service.get_battery().voltage)
+        self._service.set_tail(body.angle, speed=body.speed)
+
+    def _legs(self, body: LegsCommand) -> None:
+        self._safety.validate_speed(body.speed)
+        self._safety.validate_battery(self._service.get_battery().voltage)
+        self._service.set_legs(body.angles, speed=body.speed)
+
+    def _action(self, body: ActionRequest) -> list[str]:
+        self._safety.check_rate_limit()
+        self._safety.validate_actions(body.actions, rgb_clips=self._service.get_rgb_clips())
+        self._safety.validate_speed(body.speed)
+        self._safety.validate_battery(self._service.get_battery().voltage)
+        return self._service.execute_actions(body.actions, speed=body.speed)
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "ok": s["ok"],
+                "rejected": s["rejected"],
+                "avg_us": round(s["time_s"] / n * 1e6, 1) if (n := s["ok"] + s["rejected"]) else None,
+            }
+            for name, s in self._stats.items()
+        }
@@ -0,0 +1,129 @@
+"""Wire encodings for WebSocket messages, negotiated per client.
+
+Text frames are always JSON; binary frames carry the negotiated encoding.
+
+  - json: text frames, {"type", "timestamp", "data"} (the default)
+  - msgpack: binary frames, the same envelope as MessagePack (needs the
+    optional `msgpack` package)
+  - struct: binary frames with a fixed little-endian layout for the
+    high-rate channels (STRUCT_LAYOUTS). The first byte is the channel id;
+    the layouts are sent to the client in a schema message when it
+    negotiates struct. Channels without a layout (status, logs) stay JSON
+    text frames.
+
+Encoders take the message envelope and return str (text frame) or bytes
+(binary frame).
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from collections.abc import Callable
+
+try:
+    import msgpack  # type: ignore[import]
+except ImportError:
+    msgpack = None
+
+DEFAULT_ENCODING = "json"
+UNKNOWN = 255  # enum code for a value missing from the layout's enum list
+
+# channel -> layout. `fields` lists the struct members after the channel id
+# and timestamp; enum fields are sent as their index in `enums`, and `tail`
+# names a UTF-8 string appended after the fixed part (length-prefixed by u8).
+STRUCT_LAYOUTS: dict[str, dict] = {
+    "sensors": {
+        "id": 1,
+        "format": "<BdfffBh",
+        "fields": ["distance", "imu.pitch", "imu.roll", "touch", "sound_direction"],
+        "enums": {"touch": ["N", "L", "R", "LS", "RS"]},
+    },
+    "action_status": {
+        "id": 2,
+        "format": "<BdBHBB",
+        "fields": ["state", "queue_size", "posture"],
+        "enums": {
+            "state": ["standby", "think", "actions", "actions_done"],
+            "posture": ["stand", "sit", "lie"],
+        },
+        "tail": "current_action",
+    },
+}
+
+
+def available_encodings() -> list[str]:
+    return ["json", "struct"] + (["msgpack"] if msgpack is not None else [])
+
+
+def struct_schema() -> dict:
+    """Schema message body describing STRUCT_LAYOUTS to a client."""
+    return {
+        channel: {**layout, "fields": ["channel", "timestamp", *layout["fields"]]}
+        for channel, layout in STRUCT_LAYOUTS.items()
+    }
+
+
+def encode_json(message: dict) -> str:
+    return json.dumps(message)
+
+
+def encode_msgpack(message: dict) -> bytes:
+    return msgpack.packb(message)
+
+
+def _enum(layout: dict, field: str, value) -> int:
+    try:
+        return layout["enums"][field].index(value)
+    except ValueError:
+        return UNKNOWN
+
+
+def encode_struct(message: dict) -> str | bytes:
+    channel = message["type"]
+    layout = STRUCT_LAYOUTS.get(channel)
+    if layout is None:
+        return encode_json(message)
+    data = message["data"]
+    if channel == "sensors":
+        return struct.pack(
+            layout["format"], layout["id"], message["timestamp"],
+            data["distance"], data["imu"]["pitch"], data["imu"]["roll"],
+            _enum(layout, "touch", data["touch"]), data["sound_direction"],
+        )
+    tail = (data.get("current_action") or "").encode()[:255]
+    return struct.pack(
+        layout["format"], layout["id"], message["timestamp"],
+        _enum(layout, "state", data["state"]), min(data["queue_size"], 0xFFFF),
+        _enum(layout, "posture", data["posture"]), len(tail),
+    ) + tail
+
+
+def decode_struct(frame: bytes) -> dict:
+    """Inverse of encode_struct, for tests and Python clients."""
+    layout = next(lay for lay in STRUCT_LAYOUTS.values() if lay["id"] == frame[0])
+    size = struct.calcsize(layout["format"])
+    values = struct.unpack(layout["format"], frame[:size])
+    data: dict = {}
+    for field, value in zip(layout["fields"], values[2:]):
+        if field in layout.get("enums", {}):
+            options = layout["enums"][field]
+            value = options[value] if value < len(options) else None
+        elif isinstance(value, float):
+            value = round(value, 4)
+        target = data
+        *parents, leaf = field.split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = value
+    if "tail" in layout:
+        data[layout["tail"]] = frame[size:size + values[-1]].decode() or None
+    channel = next(c for c, lay in STRUCT_LAYOUTS.items() if lay is layout)
+    return {"type": channel, "timestamp": values[1], "data": data}
+
+
+ENCODERS: dict[str, Callable[[dict], str | bytes]] = {
+    "json": encode_json,
+    "msgpack": encode_msgpack,
+    "struct": encode_struct,
+}
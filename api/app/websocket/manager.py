@@ -1,4 +1,41 @@
-"""WebSocket connection manager with channel-based subscriptions."""
+"""WebSocket connection manager with channel-based subscriptions.
+
+broadcast() never waits on a socket: it encodes the message once and puts
+it in each subscriber's outbox, and every connection has its own writer
+task draining that outbox. One slow client (weak Wi-Fi, a stalled browser
+tab) therefore never holds up the others or the sensor loop.
+
+Outboxes are bounded, with a policy per channel (CHANNEL_POLICIES):
+
+  - latest-wins (sensors, action_status): one pending message per channel,
+    a newer one replaces it — a lagging client skips to the current state
+  - drop-oldest (logs): bounded queue; when it overflows the oldest lines
+    go, and the client gets a `logs_dropped` message with the count
+  - must-deliver (status): never dropped; a client whose must-deliver
+    queue overflows is evicted instead
+
+Clients pick a wire encoding in their subscribe message (see encoding.py);
+each broadcast is encoded once per encoding in use, however many clients
+share it.
+
+Clients may also ask for their own rate per streamed channel (RATE_CHANNELS).
+SensorStream samples at the highest rate any client wants; slower clients
+are decimated by holding the newest message until their next slot, so a
+change is never lost, only delayed to the client's rate.
+
+Clients can also send servo and action commands on the same socket (see
+commands.py); each is answered with an `ack` on the must-deliver queue
+(streamed head setpoints only when rejected).
+
+The last message of each latest-wins channel is kept and replayed to a
+client when it connects or changes its subscription, so clients have the
+full state right away even when SensorStream is only publishing changes.
+
+Writers send with a deadline. After max_slow_strikes consecutive slow
+sends a client is downgraded to LOW_RATE_CHANNELS, and a downgraded
+client that stays slow is evicted (closed with 1013). Any on-time send
+resets the strike count.
+"""
 
 from __future__ import annotations
 
@@ -6,74 +43,489 @@ import asyncio
 import json
 import logging
 import time
+from collections import deque
+from dataclasses import dataclass, field
 
 from fastapi import WebSocket, WebSocketDisconnect
 
+from .change_filter import SENSOR_DEADBANDS, ChangeFilter, flatten
+from .commands import COMMANDS, CommandHandler
+from .encoding import DEFAULT_ENCODING, ENCODERS, available_encodings, struct_schema
+
 logger = logging.getLogger("pidog.websocket")
 
 VALID_CHANNELS = {"sensors", "action_status", "status", "logs"}
+LOW_RATE_CHANNELS = {"status"}  # what a downgraded client still receives
+RATE_CHANNELS = {"sensors", "action_status"}  # sampled by SensorStream, per-client rates
+
+LATEST_WINS = "latest_wins"
+DROP_OLDEST = "drop_oldest"
+MUST_DELIVER = "must_deliver"
+CHANNEL_POLICIES = {
+    "sensors": LATEST_WINS,
+    "action_status": LATEST_WINS,
+    "logs": DROP_OLDEST,
+    "status": MUST_DELIVER,
+}
+
+CLOSE_TRY_AGAIN_LATER = 1013
+
+
+class Outbox:
+    """Pending messages for one client, bounded per channel policy."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.ready = asyncio.Event()
+        self.closed = False
+        self._latest: dict[str, tuple[str | bytes, float]] = {}  # channel -> (payload, queued_at)
+        self._logs: deque[tuple[str | bytes, float]] = deque()
+        self._reliable: deque[tuple[str | bytes, float]] = deque()
+        self._dropped_pending = 0  # log lines dropped since the last marker
+        self.replaced = 0
+        self.dropped = 0
+
+    def put(self, channel: str, payload: str | bytes) -> bool:
+        """Queue a message. False if a must-deliver message could not be queued."""
+        item = (payload, time.perf_counter())
+        policy = CHANNEL_POLICIES.get(channel, MUST_DELIVER)
+        if policy == LATEST_WINS:
+            if channel in self._latest:
+                self.replaced += 1
+            self._latest[channel] = item
+        elif policy == DROP_OLDEST:
+            if len(self._logs) >= self.size:
+                self._logs.popleft()
+                self._dropped_pending += 1
+                self.dropped += 1
+            self._logs.append(item)
+        else:
+            if len(self._reliable) >= self.size:
+                return False
+            self._reliable.append(item)
+        self.ready.set()
+        return True
+
+    def pop(self) -> tuple[str, str | bytes, float] | None:
+        """Next (policy, payload, queued_at): must-deliver first, then state, then logs."""
+        if self._reliable:
+            return (MUST_DELIVER, *self._reliable.popleft())
+        if self._latest:
+            channel = next(iter(self._latest))
+            return (LATEST_WINS, *self._latest.pop(channel))
+        if self._dropped_pending:
+            marker = {"type": "logs_dropped", "timestamp": time.time(), "data": {"dropped": self._dropped_pending}}
+            self._dropped_pending = 0
+            return (DROP_OLDEST, json.dumps(marker), time.perf_counter())
+        if self._logs:
+            return (DROP_OLDEST, *self._logs.popleft())
+        return None
+
+    def keep_only(self, channels: set[str]) -> None:
+        """Discard pending messages outside `channels` (on downgrade)."""
+        self._latest = {c: item for c, item in self._latest.items() if c in channels}
+        if "logs" not in channels:
+            self._logs.clear()
+            self._dropped_pending = 0
+
+    def depths(self) -> dict:
+        return {
+            "latest_wins": len(self._latest),
+            "drop_oldest": len(self._logs),
+            "must_deliver": len(self._reliable),
+        }
+
+
+@dataclass
+class ClientState:
+    channels: set[str]
+    outbox: Outbox
+    encoding: str = DEFAULT_ENCODING
+    writer: asyncio.Task | None = None
+    strikes: int = 0  # consecutive slow sends
+    downgraded: bool = False
+    sent: int = 0
+    bytes_sent: int = 0
+    timeouts: int = 0
+    latency_ms: float = 0.0  # EMA of queue-to-sent time
+    rates: dict[str, float] = field(default_factory=dict)  # requested Hz per rate channel
+    next_due: dict[str, float] = field(default_factory=dict)
+    held: dict[str, dict] = field(default_factory=dict)  # decimated messages awaiting their slot
+    connected_at: float = field(default_factory=time.time)
+
+    def wants(self, channel: str) -> bool:
+        if self.downgraded and channel not in LOW_RATE_CHANNELS:
+            return False
+        return channel in self.channels
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: dict[WebSocket, set[str]] = {}
+    def __init__(
+        self,
+        send_timeout_s: float = 0.25,
+        max_slow_strikes: int = 3,
+        queue_size: int = 100,
+        default_rate_hz: float = 5.0,
+        max_rate_hz: float = 60.0,
+        commands: CommandHandler | None = None,
+    ):
+        self.active_connections: dict[WebSocket, ClientState] = {}
         self._lock = asyncio.Lock()
+        self._send_timeout = send_timeout_s
+        self._max_strikes = max_slow_strikes
+        self._queue_size = queue_size
+        self._default_rate = default_rate_hz
+        self._max_rate = max_rate_hz
+        self._commands = commands
+        self._tasks: set[asyncio.Task] = set()
+        self._last_state: dict[str, dict] = {}  # latest-wins channel -> last message
+        self.subscriptions_changed = asyncio.Event()  # wakes an idle SensorStream
+
+        # Fanout metrics
+        self._broadcasts = 0
+        self._fanout_avg_ms = 0.0  # EMA of the time to queue a broadcast for every client
+        self._fanout_max_ms = 0.0
+        self._delivery_avg_ms = 0.0  # EMA of queue-to-sent time across clients
+        self._delivery_max_ms = 0.0
+        self._timeouts = 0
+        self._downgraded = 0
+        self._evicted = 0
+        # encoding -> [messages encoded, bytes encoded, seconds spent encoding]
+        self._encoding_stats: dict[str, list] = {name: [0, 0, 0.0] for name in available_encodings()}
 
     async def connect(self, websocket: WebSocket) -> None:
         await websocket.accept()
+        # Default: subscribe to all channels
+        client = ClientState(set(VALID_CHANNELS), Outbox(self._queue_size))
+        client.writer = asyncio.create_task(self._writer(websocket, client))
         async with self._lock:
-            # Default: subscribe to all channels
-            self.active_connections[websocket] = set(VALID_CHANNELS)
+            self.active_connections[websocket] = client
+            self._replay(client)
+        self.subscriptions_changed.set()
         logger.info(f"WebSocket connected. Total: {len(self.active_connections)}")
 
     async def disconnect(self, websocket: WebSocket) -> None:
         async with self._lock:
-            self.active_connections.pop(websocket, None)
+            client = self.active_connections.pop(websocket, None)
+        if client is not None:
+            await self._stop_writer(client)
+        if self._commands is not None:
+            self._commands.forget(websocket)
         logger.info(f"WebSocket disconnected. Total: {len(self.active_connections)}")
 
     async def handle_message(self, websocket: WebSocket, data: dict) -> None:
-        """Handle client messages (e.g., channel subscription changes)."""
+        """Handle client messages: subscription changes and commands."""
         msg_type = data.get("type")
-        if msg_type == "subscribe":
-            channels = set(data.get("channels", []))
-            valid = channels & VALID_CHANNELS
+        if msg_type in COMMANDS and self._commands is not None:
+            client = self.active_connections.get(websocket)
+            ack = self._commands.execute(data, source=websocket)
+            if ack is not None and client is not None:
+                payload = json.dumps({"type": "ack", "timestamp": time.time(), "data": ack})
+                if not client.outbox.put("ack", payload):
+                    # Like broadcast(): a lost ack must not go unnoticed
+                    logger.warning("WebSocket client cannot keep up with acks, evicting")
+                    await self._evict(websocket)
+        elif msg_type == "subscribe":
             async with self._lock:
-                if websocket in self.active_connections:
-                    self.active_connections[websocket] = valid
-            logger.info(f"Client subscribed to: {valid}")
+                client = self.active_connections.get(websocket)
+            if client is None:
+                return
+            if "channels" in data:
+                client.channels = set(data["channels"]) & VALID_CHANNELS
+                logger.info(f"Client subscribed to: {client.channels}")
+            if "rates" in data:
+                self._set_rates(client, data["rates"])
+            if "encoding" in data:
+                self._set_encoding(client, data["encoding"])
+            async with self._lock:
+                self._replay(client)
+            self.subscriptions_changed.set()
+
+    def _set_rates(self, client: ClientState, rates: dict) -> None:
+        for channel, hz in rates.items():
+            if channel not in RATE_CHANNELS:
+                continue
+            if isinstance(hz, (int, float)) and hz > 0:
+                client.rates[channel] = min(float(hz), self._max_rate)
+            else:
+                client.rates.pop(channel, None)  # back to the default rate
+        logger.info(f"Client rates: {client.rates}")
+
+    def has_subscribers(self, channel: str) -> bool:
+        return any(client.wants(channel) for client in self.active_connections.values())
+
+    def rate(self, client: ClientState, channel: str) -> float:
+        return client.rates.get(channel, self._default_rate)
+
+    def sample_rate(self) -> float:
+        """Rate SensorStream should sample at: the highest any subscriber wants."""
+        rates = [
+            self.rate(client, channel)
+            for client in self.active_connections.values()
+            for channel in RATE_CHANNELS
+            if client.wants(channel)
+        ]
+        return max(rates, default=self._default_rate)
+
+    def _due(self, client: ClientState, channel: str, now: float) -> bool:
+        """True if the client's next slot on a rate channel has come; claims it."""
+        interval = 1.0 / self.rate(client, channel)
+        due = client.next_due.get(channel, 0.0)
+        if now < due - interval * 0.1:  # tolerate sampling jitter
+            return False
+        # Keep the phase so e.g. 25 Hz out of 60 Hz samples averages 25 Hz
+        client.next_due[channel] = due + interval if due + interval > now else now + interval
+        return True
+
+    def _set_encoding(self, client: ClientState, requested: str) -> None:
+        available = available_encodings()
+        client.encoding = requested if requested in available else DEFAULT_ENCODING
+        ack = {"encoding": client.encoding, "available": available}
+        if client.encoding == "struct":
+            ack["schema"] = struct_schema()
+        if client.encoding != requested:
+            logger.warning(f"WebSocket encoding {requested!r} not available, using {client.encoding}")
+        # Pending state/logs are in the old encoding; the ack is a JSON text frame
+        client.outbox.keep_only(set())
+        client.outbox.put("encoding", json.dumps({"type": "encoding", "timestamp": time.time(), "data": ack}))
 
     async def broadcast(self, channel: str, data: dict) -> None:
-        """Send a message to all clients subscribed to the given channel."""
+        """Queue a message for all clients subscribed to the given channel."""
         message = {"type": channel, "timestamp": time.time(), "data": data}
-        payload = json.dumps(message)
+        if CHANNEL_POLICIES.get(channel) == LATEST_WINS:
+            self._last_state[channel] = message
 
+        start = time.perf_counter()
+        now = time.monotonic()
+        payloads: dict[str, str | bytes] = {}  # encoded once per encoding
+        overflowed: list[WebSocket] = []
         async with self._lock:
-            connections = list(self.active_connections.items())
+            for ws, client in self.active_connections.items():
+                if not client.wants(channel):
+                    continue
+                if channel in RATE_CHANNELS:
+                    if not self._due(client, channel, now):
+                        client.held[channel] = message
+                        continue
+                    client.held.pop(channel, None)
+                payload = payloads.get(client.encoding)
+                if payload is None:
+                    payload = payloads[client.encoding] = self._encode(client.encoding, message)
+                if not client.outbox.put(channel, payload):
+                    overflowed.append(ws)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self._broadcasts += 1
+        self._fanout_max_ms = max(self._fanout_max_ms, elapsed_ms)
+        self._fanout_avg_ms += 0.1 * (elapsed_ms - self._fanout_avg_ms)
+
+        for ws in overflowed:
+            logger.warning(f"WebSocket client cannot keep up with {channel}, evicting")
+            await self._evict(ws)
+
+    async def release_held(self) -> None:
+        """Send decimated messages whose slot has come. Called every sample tick."""
+        now = time.monotonic()
+        payloads: dict[tuple[int, str], str | bytes] = {}
+        async with self._lock:
+            for client in self.active_connections.values():
+                for channel, message in list(client.held.items()):
+                    if not client.wants(channel):
+                        del client.held[channel]
+                    elif self._due(client, channel, now):
+                        del client.held[channel]
+                        key = (id(message), client.encoding)
+                        if key not in payloads:
+                            payloads[key] = self._encode(client.encoding, message)
+                        client.outbox.put(channel, payloads[key])
+
+    def _replay(self, client: ClientState) -> None:
+        """Queue the current state of every latest-wins channel the client wants."""
+        for channel, message in self._last_state.items():
+            if client.wants(channel):
+                client.outbox.put(channel, self._encode(client.encoding, message))
+
+    def _encode(self, encoding: str, message: dict) -> str | bytes:
+        start = time.perf_counter()
+        payload = ENCODERS[encoding](message)
+        stats = self._encoding_stats[encoding]
+        stats[0] += 1
+        stats[1] += len(payload)
+        stats[2] += time.perf_counter() - start
+        return payload
 
-        stale: list[WebSocket] = []
-        for ws, channels in connections:
-            if channel not in channels:
+    # ------------------------------------------------------------------
+    # Per-client writer
+    # ------------------------------------------------------------------
+
+    async def _writer(self, ws: WebSocket, client: ClientState) -> None:
+        outbox = client.outbox
+        while not outbox.closed:
+            item = outbox.pop()
+            if item is None:
+                outbox.ready.clear()
+                await outbox.ready.wait()
                 continue
+            policy, payload, queued_at = item
+
+            send = ws.send_bytes if isinstance(payload, bytes) else ws.send_text
+            start = time.perf_counter()
             try:
-                await ws.send_text(payload)
+                if policy == MUST_DELIVER:
+                    # Not abandoned at the deadline: a slow send still counts as a strike
+                    await send(payload)
+                    slow = time.perf_counter() - start > self._send_timeout
+                else:
+                    await asyncio.wait_for(send(payload), self._send_timeout)
+                    slow = False
+            except asyncio.TimeoutError:
+                slow = True
+            except asyncio.CancelledError:
+                raise
             except Exception:
-                stale.append(ws)
+                await self.disconnect(ws)  # connection is gone
+                return
 
-        if stale:
-            async with self._lock:
-                for ws in stale:
-                    self.active_connections.pop(ws, None)
+            if not slow:
+                latency_ms = (time.perf_counter() - queued_at) * 1000
+                client.sent += 1
+                client.bytes_sent += len(payload)
+                client.strikes = 0
+                client.latency_ms += 0.1 * (latency_ms - client.latency_ms)
+                self._delivery_avg_ms += 0.1 * (latency_ms - self._delivery_avg_ms)
+                self._delivery_max_ms = max(self._delivery_max_ms, latency_ms)
+                continue
+
+            client.timeouts += 1
+            client.strikes += 1
+            self._timeouts += 1
+            if client.strikes < self._max_strikes:
+                continue
+            if client.downgraded:
+                logger.warning("Slow WebSocket client evicted")
+                await self._evict(ws)
+                return
+            client.downgraded = True
+            client.strikes = 0
+            outbox.keep_only(LOW_RATE_CHANNELS)
+            self._downgraded += 1
+            logger.warning(f"Slow WebSocket client downgraded to {sorted(LOW_RATE_CHANNELS)}")
+
+    async def _evict(self, ws: WebSocket) -> None:
+        async with self._lock:
+            client = self.active_connections.pop(ws, None)
+        if client is None:
+            return
+        self._evicted += 1
+        await self._stop_writer(client)
+        task = asyncio.create_task(self._close(ws))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _stop_writer(self, client: ClientState) -> None:
+        # The flag also stops a writer whose cancellation wait_for swallowed
+        # (a send completing as it is cancelled, before Python 3.12)
+        client.outbox.closed = True
+        client.outbox.ready.set()
+        if client.writer is not asyncio.current_task():
+            client.writer.cancel()
+            await asyncio.wait([client.writer])
+
+    async def _close(self, ws: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(ws.close(code=CLOSE_TRY_AGAIN_LATER), self._send_timeout)
+        except Exception:
+            pass
+
+    def get_metrics(self) -> dict:
+        return {
+            "clients": len(self.active_connections),
+            "send_timeout_s": self._send_timeout,
+            "max_slow_strikes": self._max_strikes,
+            "queue_size": self._queue_size,
+            "broadcasts": self._broadcasts,
+            "fanout_ms_avg": round(self._fanout_avg_ms, 3),
+            "fanout_ms_max": round(self._fanout_max_ms, 3),
+            "delivery_ms_avg": round(self._delivery_avg_ms, 2),
+            "delivery_ms_max": round(self._delivery_max_ms, 2),
+            "timeouts": self._timeouts,
+            "downgraded": self._downgraded,
+            "evicted": self._evicted,
+            "sample_hz": self.sample_rate(),
+            "commands": self._commands.stats() if self._commands is not None else None,
+            "encodings": {
+                name: {
+                    "messages": n,
+                    "bytes": size,
+                    "avg_bytes": round(size / n, 1) if n else None,
+                    "encode_us_avg": round(secs / n * 1e6, 1) if n else None,
+                }
+                for name, (n, size, secs) in self._encoding_stats.items()
+            },
+            "connections": [
+                {
+                    "channels": sorted(c.channels),
+                    "encoding": c.encoding,
+                    "rates": {ch: self.rate(c, ch) for ch in sorted(RATE_CHANNELS) if c.wants(ch)},
+                    "downgraded": c.downgraded,
+                    "strikes": c.strikes,
+                    "sent": c.sent,
+                    "bytes_sent": c.bytes_sent,
+                    "timeouts": c.timeouts,
+                    "latency_ms": round(c.latency_ms, 2),
+                    "queue": c.outbox.depths(),
+                    "replaced": c.outbox.replaced,
+                    "logs_dropped": c.outbox.dropped,
+                    "connected_s": round(time.time() - c.connected_at, 1),
+                }
+                for c in self.active_connections.values()
+            ],
+        }
 
 
 class SensorStream:
-    """Background task that polls sensors and broadcasts via WebSocket."""
+    """Background task that polls sensors and broadcasts via WebSocket.
+
+    Sensors are sampled at manager.sample_rate(), the highest rate any client
+    asked for. With on_change (the default), `sensors` and `action_status`
+    are published only when a field moves past its deadband or changes, plus
+    a keyframe every keyframe_s; a still robot costs a sample per tick and
+    nothing else.
+
+    A channel nobody subscribes to is not sampled at all (no IMU read, no
+    RobotStatus with its battery read, no encoding); with no subscribers the
+    task sleeps until the manager signals a subscription change, and the
+    first tick after waking publishes every channel right away. CPU saved is
+    estimated from each channel's measured cost per tick and its idle time.
+    """
 
-    def __init__(self, pidog_service, manager: ConnectionManager, sensor_hz: float = 5.0, status_hz: float = 0.2):
+    CHANNELS = ("sensors", "action_status", "status")
+
+    def __init__(
+        self,
+        pidog_service,
+        manager: ConnectionManager,
+        status_hz: float = 0.2,
+        on_change: bool = True,
+        keyframe_s: float = 5.0,
+        deadbands: dict[str, float] | None = None,
+    ):
         self._service = pidog_service
         self._manager = manager
-        self._sensor_interval = 1.0 / sensor_hz
         self._status_interval = 1.0 / status_hz
         self._task: asyncio.Task | None = None
+        self._filters: dict[str, ChangeFilter] = {}
+        if on_change:
+            self._filters = {
+                "sensors": ChangeFilter(SENSOR_DEADBANDS if deadbands is None else deadbands, keyframe_s),
+                "action_status": ChangeFilter(keyframe_s=keyframe_s),
+            }
+
+        # Idle accounting per channel
+        self._idle_since: dict[str, float | None] = {ch: None for ch in self.CHANNELS}
+        self._idle_s = dict.fromkeys(self.CHANNELS, 0.0)
+        self._ticks = dict.fromkeys(self.CHANNELS, 0)
+        self._cost_s = dict.fromkeys(self.CHANNELS, 0.0)  # CPU (thread time) spent sampling + publishing
 
     def start(self) -> None:
         self._task = asyncio.create_task(self._run())
@@ -84,29 +536,99 @@ class SensorStream:
             self._task.cancel()
             logger.info("SensorStream stopped")
 
+    async def _publish(self, channel: str, data: dict, now: float) -> None:
+        change_filter = self._filters.get(channel)
+        if change_filter is None or change_filter.should_publish(flatten(data), now):
+            await self._manager.broadcast(channel, data)
+
+    def _update_idle(self, active: set[str], now: float) -> None:
+        for channel in self.CHANNELS:
+            since = self._idle_since[channel]
+            if channel not in active and since is None:
+                self._idle_since[channel] = now
+                logger.debug(f"SensorStream: {channel} idle (no subscribers)")
+            elif channel in active and since is not None:
+                self._idle_s[channel] += now - since
+                self._idle_since[channel] = None
+                if channel in self._filters:
+                    self._filters[channel].reset()  # publish current state on resume
+
+    async def _wait(self, timeout: float | None) -> None:
+        """Sleep until the next tick, or sooner if subscriptions change."""
+        changed = self._manager.subscriptions_changed
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        changed.clear()
+
     async def _run(self) -> None:
         last_status_time = 0.0
         while True:
             try:
                 now = time.time()
+                active = {ch for ch in self.CHANNELS if self._manager.has_subscribers(ch)}
+                self._update_idle(active, now)
 
-                # Sensor broadcast (5Hz default)
-                sensor_data = self._service.get_sensor_data()
-                await self._manager.broadcast("sensors", sensor_data.model_dump())
+                # Sensor broadcast at the highest rate any client wants (5Hz default)
+                if "sensors" in active:
+                    start = time.thread_time()
+                    sensor_data = self._service.get_sensor_data()
+                    await self._publish("sensors", sensor_data.model_dump(), now)
+                    self._account("sensors", start)
 
                 # Action status broadcast (every sensor tick)
-                queue_status = self._service.get_queue_status()
-                await self._manager.broadcast("action_status", queue_status.model_dump())
+                if "action_status" in active:
+                    start = time.thread_time()
+                    queue_status = self._service.get_queue_status()
+                    await self._publish("action_status", queue_status.model_dump(), now)
+                    self._account("action_status", start)
 
                 # Full status broadcast (0.2Hz default)
-                if now - last_status_time >= self._status_interval:
+                if "status" not in active:
+                    last_status_time = 0.0  # send right away once someone subscribes
+                elif now - last_status_time >= self._status_interval:
+                    start = time.thread_time()
                     status = self._service.get_status()
                     await self._manager.broadcast("status", status.model_dump())
+                    self._account("status", start)
                     last_status_time = now
 
-                await asyncio.sleep(self._sensor_interval)
+                if not active:
+                    await self._wait(None)
+                    continue
+                await self._manager.release_held()
+                if active & {"sensors", "action_status"}:
+                    timeout = 1.0 / self._manager.sample_rate()
+                else:
+                    timeout = self._status_interval - (time.time() - last_status_time)
+                await self._wait(max(timeout, 0.0))
             except asyncio.CancelledError:
                 break
             except Exception:
                 logger.exception("SensorStream error")
                 await asyncio.sleep(1.0)
+
+    def _account(self, channel: str, start: float) -> None:
+        self._ticks[channel] += 1
+        self._cost_s[channel] += time.thread_time() - start
+
+    def get_metrics(self) -> dict:
+        now = time.time()
+        channels = {}
+        for channel in self.CHANNELS:
+            since = self._idle_since[channel]
+            idle_s = self._idle_s[channel] + (now - since if since is not None else 0.0)
+            ticks = self._ticks[channel]
+            cost = self._cost_s[channel] / ticks if ticks else None
+            rate = 1.0 / self._status_interval if channel == "status" else self._manager.sample_rate()
+            channels[channel] = {
+                "active": since is None,
+                "idle_s": round(idle_s, 1),
+                "ticks": ticks,
+                "cost_us_per_tick": None if cost is None else round(cost * 1e6, 1),
+                # Ticks skipped while idle x measured cost; None until the channel has run once
+                "cpu_saved_s": None if cost is None else round(idle_s * rate * cost, 4),
+                **(self._filters[channel].stats() if channel in self._filters else {}),
+            }
+        return {"on_change": bool(self._filters), "channels": channels}
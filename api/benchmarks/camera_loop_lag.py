@@ -0,0 +1,124 @@
+"""Event-loop lag while streaming the camera: per-client inline encode vs the worker.
+
+"inline" is the old path: every MJPEG client encodes the current image
+itself, on the event loop, every 1/fps. "worker" is CameraService: one
+capture thread, encodes in the camera encode pool, clients only pick up the
+shared bytes. A probe task sleeps PROBE_MS in a loop and records how late
+it wakes up — the delay any other request or WebSocket send would see.
+
+The encoder is OpenCV if installed, else Pillow, else zlib over the raw
+image as a stand-in with a similar per-frame CPU cost.
+
+Run from the api/ directory:
+    python -m benchmarks.camera_loop_lag
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import statistics
+import time
+import zlib
+
+import numpy as np
+
+from app.routers.camera import _mjpeg_generator
+from app.services.camera_service import JPEG_QUALITY, CameraService
+
+CLIENT_COUNTS = (1, 3, 6)
+FPS = 15
+DURATION_S = 3.0
+PROBE_MS = 5.0
+
+_rng = np.random.default_rng(0)
+# Smooth gradient plus noise: compresses like a camera image, not like noise
+IMAGE = (
+    np.linspace(0, 200, 640, dtype=np.float32)[None, :, None]
+    + _rng.normal(0, 12, (480, 640, 3))
+).clip(0, 255).astype(np.uint8)
+
+
+def _pick_encoder():
+    try:
+        import cv2  # type: ignore[import]
+
+        return "opencv", lambda: cv2.imencode(".jpg", IMAGE, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])[1].tobytes()
+    except ImportError:
+        pass
+    try:
+        from PIL import Image  # type: ignore[import]
+
+        def encode() -> bytes:
+            buf = io.BytesIO()
+            Image.fromarray(IMAGE).save(buf, "JPEG", quality=JPEG_QUALITY)
+            return buf.getvalue()
+
+        return "pillow", encode
+    except ImportError:
+        pass
+    return "zlib stand-in", lambda: zlib.compress(IMAGE.tobytes(), 6)
+
+
+async def _probe(lags: list[float], stop: asyncio.Event) -> None:
+    delay = PROBE_MS / 1000
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(delay)
+        lags.append((time.perf_counter() - start - delay) * 1000)
+
+
+async def _inline_client(encode, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        frame = encode()  # on the loop, once per client
+        _ = b"--frame\r\n" + frame + b"\r\n"
+        await asyncio.sleep(1.0 / FPS)
+
+
+async def _worker_client(camera: CameraService, stop: asyncio.Event) -> None:
+    stream = _mjpeg_generator(camera)
+    try:
+        while not stop.is_set():
+            await anext(stream)
+    finally:
+        await stream.aclose()
+
+
+async def _run(clients: int, mode: str, encode) -> list[float]:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    camera = None
+    if mode == "inline":
+        tasks = [asyncio.create_task(_inline_client(encode, stop)) for _ in range(clients)]
+    else:
+        camera = CameraService()
+        camera._fps = FPS
+        camera._generate_mock_frame = lambda tier: encode()
+        camera.start()
+        tasks = [asyncio.create_task(_worker_client(camera, stop)) for _ in range(clients)]
+    tasks.append(asyncio.create_task(_probe(lags, stop)))
+    await asyncio.sleep(DURATION_S)
+    stop.set()
+    await asyncio.gather(*tasks)
+    if camera is not None:
+        camera.stop()
+    return lags
+
+
+async def main() -> None:
+    name, encode = _pick_encoder()
+    start = time.perf_counter()
+    for _ in range(20):
+        encode()
+    encode_ms = (time.perf_counter() - start) / 20 * 1000
+    print(f"encoder: {name}, {encode_ms:.1f} ms/frame, {FPS} fps, {DURATION_S:.0f} s per run\n")
+    print(f"{'clients':<9}{'mode':<8}{'lag p50 ms':>12}{'lag p95 ms':>12}{'lag max ms':>12}")
+    for clients in CLIENT_COUNTS:
+        for mode in ("inline", "worker"):
+            lags = sorted(await _run(clients, mode, encode))
+            p95 = lags[int(len(lags) * 0.95) - 1]
+            print(f"{clients:<9}{mode:<8}{statistics.median(lags):>12.2f}{p95:>12.2f}{lags[-1]:>12.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
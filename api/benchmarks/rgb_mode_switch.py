@@ -0,0 +1,72 @@
+"""RGB mode-switch latency: per-pixel Python loop vs NumPy broadcast.
+
+Measures how long the RGB thread spends rebuilding frames after set_mode()
+for each style, using the legacy calulate_data() path and render_frames().
+No I2C traffic is generated — the strip is constructed without opening the bus.
+
+Run on the Pi from the api/ directory:
+    python -m benchmarks.rgb_mode_switch
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+
+import numpy as np
+
+from pidog.rgb_strip import RGBStrip, render_frames
+
+LIGHTS = 11
+REPEATS = 20
+COLOR = [0, 255, 255]
+
+
+def _strip() -> RGBStrip:
+    strip = RGBStrip.__new__(RGBStrip)  # skip __init__: no SMBus
+    strip.light_num = LIGHTS
+    strip.brightness = 1.0
+    strip.color = COLOR
+    return strip
+
+
+def _legacy(strip: RGBStrip, style: str, max_frames: int) -> list:
+    strip.style = style
+    strip.max_frames = max_frames
+    return [
+        [strip.calulate_data(f, light) for light in range(LIGHTS)]
+        for f in range(max_frames)
+    ]
+
+
+def _median_ms(fn) -> float:
+    samples = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    strip = _strip()
+    print(f"{'style':<14}{'bps':>6}{'frames':>8}{'loop ms':>10}{'numpy ms':>10}{'speedup':>9}")
+    for bps in (0.5, 1.0):
+        max_frames = int(1 / bps / RGBStrip.MIN_DELAY)
+        for style in RGBStrip.STYLES:
+            legacy = _median_ms(lambda: _legacy(strip, style, max_frames))
+            vector = _median_ms(lambda: render_frames(style, COLOR, 1.0, max_frames, LIGHTS))
+            if style != "monochromatic":
+                # Same curves, same truncation — frames must be identical
+                expected = np.array(_legacy(strip, style, max_frames), dtype=np.uint8)
+                assert np.array_equal(
+                    expected, render_frames(style, COLOR, 1.0, max_frames, LIGHTS)
+                ), style
+            print(
+                f"{style:<14}{bps:>6}{max_frames:>8}{legacy:>10.2f}{vector:>10.2f}"
+                f"{legacy / vector:>8.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
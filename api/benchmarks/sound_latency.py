@@ -0,0 +1,78 @@
+"""Sound start latency: legacy Pidog.speak() path vs the preloaded AudioEngine.
+
+The legacy path forks a shell to kill PulseAudio, probes the filesystem,
+spawns a thread and decodes the file before playing. The engine plays
+PCM decoded at boot. Latency is measured from the call until the mixer
+reports a busy channel, so the output device's own buffer is excluded
+(identical for both paths).
+
+Run on the Pi from the api/ directory:
+    python -m benchmarks.sound_latency
+Off the Pi, SDL_AUDIODRIVER=dummy gives comparable relative numbers.
+"""
+
+from __future__ import annotations
+
+import os
+import statistics
+import threading
+import time
+
+from pidog.audio_engine import AudioEngine, kill_pulseaudio
+
+SOUND_DIR = os.path.join(os.path.dirname(__file__), "..", "sounds") + "/"
+SOUNDS = ("single_bark_1", "pant", "angry", "howling")
+REPEATS = 20
+TIMEOUT_S = 2.0
+
+
+def _legacy_speak(pygame, name: str, volume: int = 100) -> None:
+    # Mirrors the old Pidog.speak() + robot_hat Music.sound_play_threading()
+    kill_pulseaudio()
+    for path in (name, SOUND_DIR + name + ".mp3", SOUND_DIR + name + ".wav"):
+        if os.path.isfile(path):
+            break
+    else:
+        return
+
+    def play():
+        sound = pygame.mixer.Sound(path)
+        sound.set_volume(volume / 100)
+        sound.play()
+
+    threading.Thread(target=play, daemon=True).start()
+
+
+def _latency_ms(pygame, start_sound) -> float:
+    pygame.mixer.stop()
+    t0 = time.perf_counter()
+    start_sound()
+    while not pygame.mixer.get_busy():
+        if time.perf_counter() - t0 > TIMEOUT_S:
+            raise RuntimeError("sound never started")
+        time.sleep(0.0001)
+    return (time.perf_counter() - t0) * 1000
+
+
+def main() -> None:
+    engine = AudioEngine(SOUND_DIR)
+    pygame = engine.pygame
+    stats = engine.stats()
+    print(
+        f"preloaded {stats['sounds']} sounds, {stats['pcm_bytes'] / 1e6:.1f} MB PCM "
+        f"in {stats['load_time'] * 1000:.0f} ms\n"
+    )
+    print(f"{'sound':<16}{'legacy p50':>12}{'legacy p95':>12}{'engine p50':>12}{'engine p95':>12}")
+    for name in SOUNDS:
+        legacy = sorted(_latency_ms(pygame, lambda: _legacy_speak(pygame, name)) for _ in range(REPEATS))
+        cached = sorted(_latency_ms(pygame, lambda: engine.play(name)) for _ in range(REPEATS))
+        p95 = int(REPEATS * 0.95) - 1
+        print(
+            f"{name:<16}{statistics.median(legacy):>12.2f}{legacy[p95]:>12.2f}"
+            f"{statistics.median(cached):>12.2f}{cached[p95]:>12.2f}"
+        )
+    pygame.mixer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""WebSocket encoding cost: bytes and CPU per sensor tick, per encoding.
+
+One tick is what SensorStream sends every 1/sensor_hz: a `sensors` and an
+`action_status` message. CPU per tick covers model_dump() plus encoding
+the envelope (time.process_time, so waiting is not counted); bytes/s is
+per client at the given rates. With the per-encoding cache in broadcast()
+the encode cost is paid once per tick per encoding, not per client.
+
+Run from the api/ directory:
+    python -m benchmarks.ws_encoding
+msgpack is reported only if the optional package is installed.
+"""
+
+from __future__ import annotations
+
+import time
+
+from app.models.actions import ActionQueueStatus
+from app.models.sensors import IMUData, SensorData
+from app.websocket.encoding import ENCODERS, available_encodings
+
+RATES_HZ = (5, 20, 50)
+TICKS = 20000
+
+SENSORS = SensorData(distance=42.53, imu=IMUData(pitch=2.318, roll=-1.127), touch="N", sound_direction=180)
+ACTION_STATUS = ActionQueueStatus(state="actions", current_action="wag tail", queue_size=1, posture="sit")
+
+
+def _tick(encode) -> int:
+    now = time.time()
+    size = 0
+    for channel, model in (("sensors", SENSORS), ("action_status", ACTION_STATUS)):
+        size += len(encode({"type": channel, "timestamp": now, "data": model.model_dump()}))
+    return size
+
+
+def main() -> None:
+    print(f"{TICKS} ticks (sensors + action_status)\n")
+    header = f"{'encoding':<10}{'bytes/tick':>12}{'CPU us/tick':>13}"
+    header += "".join(f"{f'bytes/s @{hz}Hz':>17}" for hz in RATES_HZ)
+    print(header)
+    for name in available_encodings():
+        encode = ENCODERS[name]
+        size = _tick(encode)
+        start = time.process_time()
+        for _ in range(TICKS):
+            _tick(encode)
+        cpu_us = (time.process_time() - start) / TICKS * 1e6
+        row = f"{name:<10}{size:>12}{cpu_us:>13.1f}"
+        row += "".join(f"{size * hz:>17}" for hz in RATES_HZ)
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""WebSocket fanout latency: sequential sends vs per-client writer queues.
+
+Each mock client takes CLIENT_SEND_MS to accept a message (a socket write
+plus a Wi-Fi round of backpressure); one client in every run is slow
+(SLOW_SEND_MS) to show what a single stalled browser tab costs everyone.
+Two numbers per run: how long broadcast() holds up the sensor loop, and
+how long until every client that is not the slow one has the message.
+
+Run from the api/ directory:
+    python -m benchmarks.ws_fanout
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import statistics
+import time
+
+from app.websocket.manager import ConnectionManager
+
+CLIENT_COUNTS = (1, 10, 50)
+CLIENT_SEND_MS = 2.0
+SLOW_SEND_MS = 400.0
+SEND_TIMEOUT_S = 0.05
+REPEATS = 20
+MESSAGE = {"distance": 42.5, "imu": {"pitch": 2.3, "roll": -1.1}, "touch": "N", "sound_direction": 180}
+
+
+class _MockClient:
+    def __init__(self, send_ms: float, delivered: _Counter | None = None):
+        self._delay = send_ms / 1000
+        self._delivered = delivered
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, payload: str) -> None:
+        await asyncio.sleep(self._delay)
+        if self._delivered is not None:
+            self._delivered.add()
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+class _Counter:
+    """Counts deliveries; wait() returns once `target` clients have the message."""
+
+    def __init__(self):
+        self.count = 0
+        self.target = 0
+        self._done = asyncio.Event()
+
+    def reset(self, target: int) -> None:
+        self.count = 0
+        self.target = target
+        self._done.clear()
+        if target == 0:
+            self._done.set()
+
+    def add(self) -> None:
+        self.count += 1
+        if self.count >= self.target:
+            self._done.set()
+
+    async def wait(self) -> None:
+        await self._done.wait()
+
+
+def _clients(n: int, slow: bool, delivered: _Counter | None = None) -> list[_MockClient]:
+    clients = [_MockClient(CLIENT_SEND_MS, delivered) for _ in range(n)]
+    if slow:
+        clients[-1] = _MockClient(SLOW_SEND_MS)
+    return clients
+
+
+async def _sequential(clients: list[_MockClient]) -> float:
+    # The previous ConnectionManager.broadcast(): one await per client
+    payload = json.dumps({"type": "sensors", "timestamp": time.time(), "data": MESSAGE})
+    start = time.perf_counter()
+    for ws in clients:
+        await ws.send_text(payload)
+    return (time.perf_counter() - start) * 1000
+
+
+async def _queued(manager: ConnectionManager, delivered: _Counter, target: int) -> tuple[float, float]:
+    delivered.reset(target)
+    start = time.perf_counter()
+    await manager.broadcast("sensors", MESSAGE)
+    blocked = (time.perf_counter() - start) * 1000
+    await delivered.wait()
+    return blocked, (time.perf_counter() - start) * 1000
+
+
+async def _run(n: int, slow: bool) -> tuple[list[float], list[float], list[float]]:
+    delivered = _Counter()
+    clients = _clients(n, slow, delivered)
+    # Strikes are disabled so the slow client stays in for every repeat
+    manager = ConnectionManager(send_timeout_s=SEND_TIMEOUT_S, max_slow_strikes=REPEATS + 1)
+    for ws in clients:
+        await manager.connect(ws)
+    sequential = [await _sequential(clients) for _ in range(REPEATS)]
+    queued = [await _queued(manager, delivered, n - slow) for _ in range(REPEATS)]
+    for ws in clients:
+        await manager.disconnect(ws)
+    blocked, delivery = zip(*queued)
+    return sorted(sequential), sorted(blocked), sorted(delivery)
+
+
+async def main() -> None:
+    print(
+        f"client send {CLIENT_SEND_MS:.0f} ms, slow client {SLOW_SEND_MS:.0f} ms, "
+        f"deadline {SEND_TIMEOUT_S * 1000:.0f} ms, {REPEATS} broadcasts each\n"
+    )
+    print(
+        f"{'clients':<10}{'slow':<6}{'sequential p50':>16}"
+        f"{'queued: blocks':>16}{'delivered p50':>16}{'delivered max':>16}"
+    )
+    for n in CLIENT_COUNTS:
+        for slow in (False, True):
+            sequential, blocked, delivery = await _run(n, slow)
+            print(
+                f"{n:<10}{'yes' if slow else 'no':<6}{statistics.median(sequential):>14.1f}ms"
+                f"{statistics.median(blocked):>14.2f}ms"
+                f"{statistics.median(delivery):>14.1f}ms{delivery[-1]:>14.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
-from .pidog import Pidog
-from robot_hat import utils
-from time import sleep
 from .version import __version__
 
+def __getattr__(name):
+    # Pidog pulls in robot_hat (I2C, GPIO); import it on first use so the
+    # hardware-free modules (sound_library, audio_engine, ...) import anywhere
+    if name == 'Pidog':
+        from .pidog import Pidog
+        return Pidog
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 def __main__():
+    from robot_hat import utils
+    from time import sleep
     print(f"Thanks for using Pidog {__version__} ! woof, woof, woof !")
     utils.reset_mcu()
     sleep(0.2)
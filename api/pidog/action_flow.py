@@ -28,6 +28,8 @@ class ActionFlow():
     posture = Posetures.STAND
     last_actions = None
 
+    RGB_CLIP_PREFIX = 'rgb:' # "rgb:<name>" plays a clip added with RGBStrip.add_clip()
+
     OPERATIONS = {
         "forward": {
             "function": lambda self: self.dog_obj.do_action('forward', speed=98),
@@ -194,7 +196,9 @@ class ActionFlow():
     def run(self, action):
         try:
             # print(f'run: {action}')
-            if action in self.OPERATIONS:
+            if action.startswith(self.RGB_CLIP_PREFIX):
+                self.dog_obj.rgb_strip.set_mode(style=action[len(self.RGB_CLIP_PREFIX):])
+            elif action in self.OPERATIONS:
                 operation = self.OPERATIONS[action]
                 # poseture
                 if "poseture" in operation and operation["poseture"] != None:
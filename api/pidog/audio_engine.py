@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import logging
+import threading
+import subprocess
+import numpy as np
+from .sound_library import SoundLibrary
+
+logger = logging.getLogger(__name__) # pidog.audio_engine, under the API's pidog.* loggers
+
+class Voice():
+    """Handle to a sound playing on one mixer channel"""
+
+    def __init__(self, engine, id, index, name, priority, volume):
+        self.engine = engine
+        self.id = id
+        self.index = index # mixer channel
+        self.name = name
+        self.priority = priority
+        self.volume = volume
+        self.started = time.time()
+        self.streaming = False # an AudioStream is still feeding this channel
+        self.stream = None # that AudioStream
+        self.stopped = False # stop() was called; a stream must not restart it
+
+    @property
+    def playing(self):
+        """False once finished, stopped or stolen by another sound"""
+        return self.engine._is_playing(self)
+
+    def stop(self):
+        self.engine.stop(self.id)
+
+    def set_volume(self, volume):
+        """Change this voice's volume, 0-100, without touching other channels"""
+        self.engine._set_volume(self, volume)
+
+    def info(self):
+        return {
+            'id': self.id,
+            'channel': self.index,
+            'name': self.name,
+            'priority': self.priority,
+            'volume': self.volume,
+            'elapsed': round(time.time() - self.started, 3),
+        }
+
+
+class AudioStream():
+    """
+    Play 16-bit PCM on one mixer channel while it is still being produced
+
+    write() converts each chunk to the mixer format and returns at once; a
+    feeder thread queues the chunks back to back on the channel. Used for
+    text-to-speech, so playback starts with the first synthesized chunk.
+    """
+
+    FEED_DELAY = 0.005 # s
+
+    def __init__(self, engine, voice, sample_rate, channels):
+        self.engine = engine
+        self.voice = voice
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bytes_written = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._closed = False
+        voice.streaming = True
+        voice.stream = self
+        self._thread = threading.Thread(name="audio_stream", target=self._feed, daemon=True)
+        self._thread.start()
+
+    def write(self, pcm):
+        """Queue a chunk of interleaved 16-bit PCM, False if the stream was stopped"""
+        if self._closed or not self.voice.playing:
+            return False
+        samples = self.engine.to_mixer_format(pcm, self.sample_rate, self.channels)
+        with self._lock:
+            self._pending.append(samples)
+        self.bytes_written += len(pcm)
+        return True
+
+    def close(self):
+        """No more data: play what is queued, then release the channel"""
+        self._closed = True
+
+    def discard(self):
+        """Drop what is queued and write nothing more (the voice was stopped)"""
+        with self._lock:
+            self._pending = []
+        self._closed = True
+
+    def _feed(self):
+        channel = self.engine._channels[self.voice.index]
+        while self.voice.playing and not (self._closed and not self._pending):
+            # a Channel holds one playing and one queued sound
+            if self._pending and channel.get_queue() is None:
+                with self._lock:
+                    samples = np.concatenate(self._pending)
+                    self._pending = []
+                sound = self.engine.pygame.mixer.Sound(buffer=samples.tobytes())
+                # under the engine lock, so stop() can't slip in between the
+                # check and play() and have the channel restarted after it
+                with self.engine._lock:
+                    if self.voice.stopped or not self.voice.playing:
+                        break
+                    if channel.get_busy():
+                        channel.queue(sound)
+                    else:
+                        channel.play(sound)
+                        channel.set_volume(max(0, min(100, self.voice.volume)) / 100)
+            time.sleep(self.FEED_DELAY)
+        self.voice.streaming = False
+
+
+class AudioEngine():
+    """
+    Low-latency sound effects: decode once at boot, play from memory
+
+    robot_hat.Music decodes the file from disk on every sound_play() and
+    Pidog.speak() used to kill PulseAudio (a forked shell) before each call.
+    Here the PulseAudio workaround runs once, every sound in the library is
+    decoded into a pygame Sound (PCM in memory) up front, and play() only
+    hands the cached buffer to a free mixer channel. Compressed files are
+    read from the library's WAV cache, so only the first boot decodes them.
+
+    Mixer: a fixed pool of CHANNELS channels. Each play() gets a Voice handle
+    (stop, per-voice volume). When every channel is busy, the new sound
+    steals the channel of the lowest-priority voice (oldest first) whose
+    priority is not above its own; if all are higher, the new sound is
+    dropped. Long ambient sounds default to PRIORITY_LOW, so a bark can cut
+    off a howl, but a howl never cuts off a bark.
+    """
+
+    PRIORITY_LOW = 0
+    PRIORITY_NORMAL = 1
+    PRIORITY_HIGH = 2
+    PRIORITIES = { # default priority by sound name, others PRIORITY_NORMAL
+        'howling': PRIORITY_LOW,
+        'snoring': PRIORITY_LOW,
+        'pant': PRIORITY_LOW,
+    }
+
+    FREQUENCY = 44100
+    BUFFER = 512 # samples, mixer buffer ~12 ms at 44.1 kHz, smaller is lower latency
+    CHANNELS = 8 # mixer channels, sounds beyond this steal the oldest
+    _preset = None # (frequency, buffer) set by pre_init_mixer()
+
+    @classmethod
+    def pre_init_mixer(cls, frequency=FREQUENCY, buffer=BUFFER):
+        """
+        Set the mixer defaults before anything else opens it
+
+        pygame keeps the buffer size of whoever opens the mixer first; call
+        this before e.g. robot_hat Music() so the low-latency buffer applies
+        and AudioEngine doesn't have to reopen the device.
+        """
+        import_pygame().mixer.pre_init(frequency=frequency, size=-16, channels=2, buffer=buffer)
+        cls._preset = (frequency, buffer)
+
+    def __init__(self, sound_dir, cache_dir=None, frequency=FREQUENCY, buffer=BUFFER,
+                 channels=CHANNELS):
+        """
+        Initialize the audio engine
+
+        :param sound_dir: folder of .wav/.mp3 files, preloaded by name (file stem)
+        :type sound_dir: str
+        :param cache_dir: folder for transcoded WAVs, see SoundLibrary
+        :type cache_dir: str
+        :param frequency: mixer sample rate
+        :type frequency: int
+        :param buffer: mixer buffer size in samples
+        :type buffer: int
+        :param channels: number of mixer channels
+        :type channels: int
+        """
+        self.sounds = {} # name or path -> pygame.mixer.Sound
+        self.load_time = 0.0 # s, spent decoding in load_all()
+        self._lock = threading.Lock()
+        self._voices = [None]*channels # channel index -> Voice last started on it
+        self._next_id = 1
+        self.played = 0
+        self.stolen = 0
+        self.dropped = 0
+
+        # Kill only the current user's PulseAudio session if running (VNC workaround).
+        # Once, before the mixer opens the device, instead of on every speak().
+        kill_pulseaudio()
+
+        pygame = import_pygame()
+        self.pygame = pygame
+        current = pygame.mixer.get_init()
+        if current and (current != (frequency, -16, 2) or self._preset != (frequency, buffer)):
+            # opened by someone else (e.g. robot_hat Music) with its own buffer
+            # size, which get_init() can't show: reopen it with ours
+            logger.warning(f'mixer already open as {current}, reopening at '
+                           f'{frequency} Hz with a {buffer}-sample buffer')
+            pygame.mixer.quit()
+            current = None
+        if not current:
+            pygame.mixer.init(frequency=frequency, size=-16, channels=2, buffer=buffer)
+        pygame.mixer.set_num_channels(channels)
+        self._channels = [pygame.mixer.Channel(i) for i in range(channels)]
+
+        self.library = SoundLibrary(sound_dir, cache_dir, decode=self.decode)
+        self.load_all()
+
+    def load_all(self):
+        """Decode every sound in the library into memory"""
+        start = time.time()
+        self.sounds = {}
+        index = self._loaded_index = self.library.index
+        for name in index:
+            self.load(name, self.library.pcm_path(name))
+        self.load_time = time.time() - start
+
+    def set_sound_dir(self, sound_dir, cache_dir=None):
+        """Switch to another sound folder (and cache folder) and preload it"""
+        self.library.set_dir(sound_dir, cache_dir)
+        self.load_all()
+
+    def refresh(self):
+        """Reload if files were added, removed or renamed in the sound folder"""
+        # compare the index itself: another reader of the library (the API's
+        # sound catalog) may have been the one to rebuild it
+        self.library.refresh()
+        if self.library.index is not self._loaded_index:
+            self.load_all()
+            return True
+        return False
+
+    def decode(self, path):
+        """Decode a file to raw PCM in the mixer's format, for the library's WAV cache"""
+        frequency, size, channels = self.pygame.mixer.get_init()
+        pcm = self.pygame.mixer.Sound(path).get_raw()
+        return pcm, frequency, channels, abs(size) // 8
+
+    def load(self, name, path):
+        """Decode one file and cache it under name"""
+        sound = self.pygame.mixer.Sound(path)
+        self.sounds[name] = sound
+        return sound
+
+    def get(self, name):
+        """
+        Cached sound for a name in the library or a file path, None if not found
+
+        Unknown names re-check the sound folder once; paths are decoded on
+        first use and cached like named sounds.
+        """
+        sound = self.sounds.get(name)
+        if sound is None and self.refresh():
+            sound = self.sounds.get(name)
+        if sound is None and os.path.isfile(name):
+            sound = self.load(name, name)
+        return sound
+
+    def play(self, name, volume=100, priority=None):
+        """
+        Start a sound without blocking
+
+        :param name: sound name in the library, or a file path
+        :type name: str
+        :param volume: volume, 0-100
+        :type volume: int
+        :param priority: PRIORITY_LOW/NORMAL/HIGH, default from PRIORITIES
+        :type priority: int
+        :return: Voice handle, None if the sound was not found or was dropped
+        """
+        sound = self.get(name)
+        if sound is None:
+            return None
+        if priority is None:
+            priority = self.PRIORITIES.get(name, self.PRIORITY_NORMAL)
+
+        with self._lock:
+            index = self._allocate(priority)
+            if index is None:
+                self.dropped += 1
+                return None
+            voice = Voice(self, self._next_id, index, name, priority, volume)
+            self._next_id += 1
+            self._voices[index] = voice
+            channel = self._channels[index]
+            channel.play(sound)
+            channel.set_volume(max(0, min(100, volume)) / 100) # after play(), which may reset it
+            self.played += 1
+        return voice
+
+    def _allocate(self, priority):
+        # free channel first
+        victim = None
+        for index, channel in enumerate(self._channels):
+            voice = self._voices[index]
+            if not channel.get_busy() and not (voice is not None and voice.streaming):
+                return index
+            if voice is None or voice.priority > priority:
+                continue # busy with something we may not (or cannot) steal
+            if victim is None or (voice.priority, voice.started) < (victim.priority, victim.started):
+                victim = voice
+        if victim is None:
+            return None
+        self._channels[victim.index].stop()
+        self.stolen += 1
+        return victim.index
+
+    def _is_playing(self, voice):
+        return self._voices[voice.index] is voice and (
+            voice.streaming or self._channels[voice.index].get_busy())
+
+    def _set_volume(self, voice, volume):
+        with self._lock:
+            if self._is_playing(voice):
+                voice.volume = volume
+                self._channels[voice.index].set_volume(max(0, min(100, volume)) / 100)
+
+    def stream(self, sample_rate, channels=1, volume=100, priority=PRIORITY_HIGH, name='stream'):
+        """
+        Open an AudioStream on a mixer channel
+
+        :param sample_rate: rate of the PCM that will be written
+        :type sample_rate: int
+        :param channels: channels of the PCM that will be written
+        :type channels: int
+        :return: AudioStream, None if every channel holds a higher priority
+        """
+        with self._lock:
+            index = self._allocate(priority)
+            if index is None:
+                self.dropped += 1
+                return None
+            voice = Voice(self, self._next_id, index, name, priority, volume)
+            self._next_id += 1
+            self._voices[index] = voice
+            self.played += 1
+            return AudioStream(self, voice, sample_rate, channels)
+
+    def to_mixer_format(self, pcm, sample_rate, channels):
+        """Convert interleaved 16-bit PCM to a (frames, mixer channels) int16 array"""
+        frequency, _, mixer_channels = self.pygame.mixer.get_init()
+        samples = np.frombuffer(pcm, dtype=np.int16).reshape(-1, channels)
+        if sample_rate != frequency and len(samples):
+            n = int(round(len(samples) * frequency / sample_rate))
+            src = np.arange(len(samples))
+            dst = np.linspace(0, len(samples) - 1, n)
+            samples = np.stack([np.interp(dst, src, samples[:, c]) for c in range(channels)],
+                               axis=1).astype(np.int16)
+        if channels != mixer_channels:
+            mono = samples.mean(axis=1, keepdims=True).astype(np.int16)
+            samples = np.repeat(mono, mixer_channels, axis=1)
+        return np.ascontiguousarray(samples)
+
+    def play_block(self, name, volume=100, priority=None):
+        """Play a sound and wait until it finishes or is cut off, False if not played"""
+        voice = self.play(name, volume, priority)
+        if voice is None:
+            return False
+        while voice.playing:
+            time.sleep(0.01)
+        return True
+
+    def voice(self, voice_id):
+        """Playing Voice with this id, or None"""
+        for voice in self._voices:
+            if voice is not None and voice.id == voice_id and voice.playing:
+                return voice
+        return None
+
+    def voices(self):
+        """Voices currently playing"""
+        return [v for v in self._voices if v is not None and v.playing]
+
+    def stop(self, voice_id=None):
+        """
+        Stop one voice, or every playing sound
+
+        :return: number of voices stopped
+        :rtype: int
+        """
+        with self._lock:
+            stopped = 0
+            for voice in self._voices:
+                if voice is not None and voice.playing and voice_id in (None, voice.id):
+                    voice.stopped = True
+                    voice.streaming = False
+                    if voice.stream is not None:
+                        voice.stream.discard()
+                    self._channels[voice.index].stop()
+                    stopped += 1
+            return stopped
+
+    def stats(self):
+        """Preloaded sounds and the PCM memory they use"""
+        frequency, size, channels = self.pygame.mixer.get_init()
+        frame_bytes = abs(size) // 8 * channels
+        return {
+            'sounds': len(self.sounds),
+            'pcm_bytes': sum(int(s.get_length() * frequency) * frame_bytes
+                             for s in self.sounds.values()),
+            'load_time': round(self.load_time, 3),
+            'channels': len(self._channels),
+            'busy': len(self.voices()),
+            'played': self.played,
+            'stolen': self.stolen,
+            'dropped': self.dropped,
+        }
+
+
+def import_pygame():
+    """Import pygame without its support prompt on stdout"""
+    original_stdout = sys.stdout
+    try:
+        sys.stdout = open(os.devnull, 'w')
+        import pygame
+    finally:
+        sys.stdout.close()
+        sys.stdout = original_stdout
+    return pygame
+
+
+def kill_pulseaudio():
+    """Kill the current user's PulseAudio session, if any; it holds the sound card under VNC"""
+    subprocess.run('pkill -u "$(id -un)" pulseaudio || true', shell=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
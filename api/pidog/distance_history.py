@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import time
+from multiprocessing import RawArray, RawValue
+import numpy as np
+
+class DistanceHistory():
+    """
+    Shared-memory ring buffer of timestamped ultrasonic samples.
+
+    The sensory process appends to it without taking a lock; readers in any
+    process copy the ring straight out of shared memory. The write counter is
+    read before and after the copy so slots the writer may have overwritten
+    mid-copy are dropped instead of being returned torn.
+    """
+
+    def __init__(self, size=512):
+        """
+        :param size: number of samples kept in the ring
+        :type size: int
+        """
+        self.size = size
+        self._timestamps = RawArray('d', size)
+        self._distances = RawArray('d', size)
+        self._count = RawValue('Q', 0)  # total samples ever written
+
+    def append(self, distance, timestamp=None):
+        """
+        Append a sample. Only one writer is supported.
+
+        :param distance: distance in cm, negative values mark read errors
+        :type distance: float
+        :param timestamp: sample time (time.time()), defaults to now
+        :type timestamp: float
+        """
+        count = self._count.value
+        i = count % self.size
+        self._timestamps[i] = time.time() if timestamp is None else timestamp
+        self._distances[i] = distance
+        self._count.value = count + 1
+
+    def snapshot(self, n=None):
+        """
+        Copy the most recent samples, oldest first.
+
+        :param n: maximum number of samples to return, defaults to all
+        :type n: int
+        :return: (timestamps, distances)
+        :rtype: tuple of two numpy float64 arrays
+        """
+        before = self._count.value
+        timestamps = np.frombuffer(self._timestamps, dtype=np.float64).copy()
+        distances = np.frombuffer(self._distances, dtype=np.float64).copy()
+        after = self._count.value
+
+        # Slots written during the copy (plus the one possibly in flight) are
+        # the oldest in the window, so trimming from the old end is enough.
+        available = min(before, self.size - (after - before) - 1)
+        if n is not None:
+            available = min(available, n)
+        if available <= 0:
+            return np.empty(0), np.empty(0)
+        idx = np.arange(before - available, before) % self.size
+        return timestamps[idx], distances[idx]
+
+    @property
+    def count(self):
+        """Total number of samples written since start."""
+        return self._count.value
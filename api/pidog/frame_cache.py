@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+import threading
+from collections import OrderedDict
+
+
+class FrameCache():
+    """
+    LRU cache of rendered frame arrays, bounded by total bytes
+
+    Keyed by everything rgb_strip.render_frames() depends on, so switching back to a
+    recently used mode skips rendering entirely.
+    """
+
+    def __init__(self, max_bytes=256*1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(style, color, brightness, max_frames, light_num):
+        return (style, tuple(int(c) for c in color), float(brightness), max_frames, light_num)
+
+    def get(self, key):
+        with self._lock:
+            frames = self._entries.get(key)
+            if frames is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return frames
+
+    def put(self, key, frames):
+        frames.flags.writeable = False  # shared between mode switches
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.nbytes
+            self._entries[key] = frames
+            self.bytes += frames.nbytes
+            # always keep the newest entry, even if it alone exceeds the cap
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def discard(self, style):
+        """Drop every entry rendered for style, e.g. after a clip is replaced"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == style]:
+                self.bytes -= self._entries.pop(key).nbytes
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
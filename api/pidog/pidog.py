@@ -11,6 +11,8 @@ from .sh3001 import Sh3001
 from .rgb_strip import RGBStrip
 from .sound_direction import SoundDirection
 from .dual_touch import DualTouch
+from .distance_history import DistanceHistory
+from .audio_engine import AudioEngine
 import warnings
 warnings.filterwarnings("ignore") # ignore warnings for pygame # not work
 
@@ -123,10 +125,20 @@ class Pidog():
     HEAD_PITCH_MIN = -45
     HEAD_PITCH_MAX = 30
 
+    DISTANCE_HISTORY_SIZE = 512 # ultrasonic samples kept in shared memory
+
     # init
     def __init__(self, leg_pins=DEFAULT_LEGS_PINS, head_pins=DEFAULT_HEAD_PINS, tail_pin=DEFAULT_TAIL_PIN,
-                 leg_init_angles=None, head_init_angles=None, tail_init_angle=None):
-
+                 leg_init_angles=None, head_init_angles=None, tail_init_angle=None,
+                 sound_dir=None, sound_cache_dir=None):
+        """
+        :param sound_dir: sound folder, default SOUND_DIR
+        :type sound_dir: str
+        :param sound_cache_dir: folder for transcoded WAVs, see SoundLibrary
+        :type sound_cache_dir: str
+        """
+        if sound_dir is not None:
+            self.SOUND_DIR = sound_dir
 
         utils.reset_mcu()
         sleep(0.2)
@@ -192,6 +204,7 @@ class Pidog():
 
             self.leg_current_angles = leg_init_angles
             self.head_current_angles = head_init_angles
+            self.head_write_callback = None  # see head_setpoint()
             self.tail_current_angles = tail_init_angle
 
             self.legs_speed = 90
@@ -246,6 +259,12 @@ class Pidog():
         except:
             error("fail")
 
+        try:
+            # before Music() opens the mixer, so AudioEngine's small buffer applies
+            AudioEngine.pre_init_mixer()
+        except:
+            pass
+
         try:
             debug("sound_effect init ... ", end='', flush=True)
             self.music = Music()
@@ -253,7 +272,18 @@ class Pidog():
         except:
             error("fail")
 
+        # preloaded sounds for speak(), falls back to self.music if unavailable
+        self.audio = None
+        try:
+            debug("audio_engine init ... ", end='', flush=True)
+            self.audio = AudioEngine(self.SOUND_DIR, sound_cache_dir)
+            debug("done")
+        except:
+            error("fail")
+
         self.distance = Value('f', -1.0)
+        # timestamped samples shared with the sensory process, see read_distance_history()
+        self.distance_history = DistanceHistory(size=self.DISTANCE_HISTORY_SIZE)
 
         self.sensory_process = None
         self.sensory_lock = Lock()
@@ -265,6 +295,16 @@ class Pidog():
     def read_distance(self):
         return round(self.distance.value, 2)
 
+    def read_distance_history(self, n=None):
+        """
+        Recent ultrasonic samples, oldest first, read from shared memory
+
+        :param n: maximum number of samples, defaults to the whole ring
+        :type n: int
+        :return: (timestamps, distances) numpy arrays
+        """
+        return self.distance_history.snapshot(n)
+
     # action related: legs,head,tail,imu,rgb_strip
     def close_all_thread(self):
         self.exit_flag = True
@@ -307,6 +347,7 @@ class Pidog():
 
             if 'rgb' in self.thread_list:
                 self.rgb_thread_run = False
+                self.rgb_strip.wake() # may be sleeping while the chip animates
                 self.rgb_strip_thread.join()
                 self.rgb_strip.close()
             if 'imu' in self.thread_list:
@@ -403,12 +444,20 @@ class Pidog():
                 with self.head_thread_lock:
                     self.head_current_angles = list.copy(self.head_action_buffer[0])
                     self.head_action_buffer.pop(0)
+                    on_write = None
+                    if not self.head_action_buffer:
+                        on_write, self.head_write_callback = self.head_write_callback, None
                 # Release lock after copying data before the next operations
                 _angles = list.copy(self.head_current_angles)
                 _angles[0] = self.limit(self.HEAD_YAW_MIN, self.HEAD_YAW_MAX, _angles[0])
                 _angles[1] = self.limit(self.HEAD_ROLL_MIN, self.HEAD_ROLL_MAX, _angles[1])
                 _angles[2] = self.limit(self.HEAD_PITCH_MIN, self.HEAD_PITCH_MAX, _angles[2])
                 _angles[2] += self.HEAD_PITCH_OFFSET
+                if on_write:
+                    try:
+                        on_write()
+                    except Exception as e:
+                        error(f'\r_head_action_thread on_write Exception:{e}')
                 self.head.servo_move(_angles, self.head_speed)
             except IndexError:
                 sleep(0.001)
@@ -519,6 +568,7 @@ class Pidog():
     def head_stop(self):
         with self.head_thread_lock:
             self.head_action_buffer.clear()
+            self.head_write_callback = None
         self.wait_head_done()
 
     def tail_stop(self):
@@ -559,6 +609,20 @@ class Pidog():
         with self.head_thread_lock:
             self.head_action_buffer += angles
 
+    def head_setpoint(self, target_yrp, roll_comp=0, pitch_comp=0, speed=50, on_write=None):
+        """
+        Streaming head target: replaces whatever is still pending instead of
+        waiting for it (head_move(immediately=True) blocks until the buffer
+        drains). on_write, if given, is called from the head thread just
+        before this target is written to the servos; it is dropped if a newer
+        target replaces this one first.
+        """
+        self.head_speed = speed
+        angles = self.head_rpy_to_angle(target_yrp, roll_comp, pitch_comp)
+        with self.head_thread_lock:
+            self.head_action_buffer[:] = [angles]
+            self.head_write_callback = on_write
+
     def head_move_raw(self, target_angles, immediately=True, speed=50):
         if immediately == True:
             self.head_stop()
@@ -574,12 +638,13 @@ class Pidog():
             self.tail_action_buffer += target_angles
         
     # ultrasonic
-    def _ultrasonic_thread(self, distance_addr, lock):
+    def _ultrasonic_thread(self, distance_addr, lock, history):
         while True:
             try:
                 with lock:
                     val = round(float(self.ultrasonic.read()), 2)
                     distance_addr.value = val
+                history.append(val)
                 sleep(0.01)
             except Exception as e:
                 sleep(0.1)
@@ -587,7 +652,7 @@ class Pidog():
                 break
 
     # sensory_process : ultrasonic
-    def sensory_process_work(self, distance_addr, lock):
+    def sensory_process_work(self, distance_addr, lock, history):
         try:
             debug("ultrasonic init ... ", end='', flush=True)
             echo = Pin('D0')
@@ -603,7 +668,7 @@ class Pidog():
         if 'ultrasonic' in self.thread_list:
             ultrasonic_thread = threading.Thread(name='ultrasonic_thread',
                                              target=self._ultrasonic_thread,
-                                             args=(distance_addr, lock,))
+                                             args=(distance_addr, lock, history,))
             # ultrasonic_thread.daemon = True
             ultrasonic_thread.start()
 
@@ -612,7 +677,7 @@ class Pidog():
             self.sensory_process.terminate()
         self.sensory_process = Process(name='sensory_process',
                                          target=self.sensory_process_work,
-                                         args=(self.distance, self.sensory_lock))
+                                         args=(self.distance, self.sensory_lock, self.distance_history))
         self.sensory_process.start()
 
     # reset: stop, stop_and_lie
@@ -627,7 +692,7 @@ class Pidog():
         except Exception as e:
             error(f'\rstop_and_lie error:{e}')
 
-    def speak(self, name, volume=100):
+    def speak(self, name, volume=100, priority=None):
         """
         speak, play audio
 
@@ -635,7 +700,17 @@ class Pidog():
         :type name: str
         :param volume: volume, 0-100
         :type volume: int
+        :param priority: mixer priority, AudioEngine.PRIORITY_LOW/NORMAL/HIGH
+        :type priority: int
+        :return: Voice handle, None if the mixer dropped it, False if not found
         """
+        if self.audio is not None:
+            # decoded at boot, starts on a mixer channel without a thread, fork or disk read
+            if self.audio.get(name) is None:
+                warn(f'No sound found for {name}')
+                return False
+            return self.audio.play(name, volume, priority)
+
         # Kill only the current user's PulseAudio session if running (VNC workaround).
         # Using pkill avoids requiring sudo and is safe to run over SSH.
         utils.run_command('pkill -u "$(id -un)" pulseaudio || true')
@@ -650,7 +725,7 @@ class Pidog():
             warn(f'No sound found for {name}')
             return False
 
-    def speak_block(self, name, volume=100):
+    def speak_block(self, name, volume=100, priority=None):
         """
         speak, play audio with block
 
@@ -658,7 +733,15 @@ class Pidog():
         :type name: str
         :param volume: volume, 0-100
         :type volume: int
+        :param priority: mixer priority, AudioEngine.PRIORITY_LOW/NORMAL/HIGH
+        :type priority: int
         """
+        if self.audio is not None:
+            if self.audio.get(name) is None:
+                warn(f'No sound found for {name}')
+                return False
+            return self.audio.play_block(name, volume, priority)
+
         # Kill only the current user's PulseAudio session if running (VNC workaround).
         # Using pkill avoids requiring sudo and is safe to run over SSH.
         utils.run_command('pkill -u "$(id -un)" pulseaudio || true')
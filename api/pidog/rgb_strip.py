@@ -1,8 +1,67 @@
 #!/usr/bin/env python3
 import time
+import threading
 from smbus import SMBus
 import numpy as np
 import math
+from .frame_cache import FrameCache
+
+
+def render_frames(style, color, brightness, max_frames, light_num):
+    """
+    Render every frame of a style in one NumPy broadcast
+
+    Computes the same curves as RGBStrip.breath/boom/bark/speak/listen, but
+    over a (frames x lights) grid at once instead of one pixel per call.
+
+    :param style: one of RGBStrip.STYLES
+    :type style: str
+    :param color: [r, g, b]
+    :type color: list
+    :param brightness: brightness 0-1
+    :type brightness: float or int
+    :param max_frames: number of frames in one period
+    :type max_frames: int
+    :param light_num: number of lights
+    :type light_num: int
+    :return: frames
+    :rtype: numpy uint8 array, shape (max_frames, light_num, 3)
+    """
+    color = np.asarray(color, dtype=np.float64) * brightness
+    if style == 'monochromatic':
+        level = np.ones((max_frames, light_num))
+    else:
+        f = np.arange(max_frames, dtype=np.float64)[:, None]  # (frames, 1)
+        x = np.arange(light_num, dtype=np.float64)[None, :]   # (1, lights)
+
+        def cos_func(peak, a, offset=0.0):
+            return (peak/2.0) * np.cos(a*f + offset) + peak/2
+
+        def normal(u, sig, A, offset):
+            return A*np.exp(-(x-u)**2/(2*sig**2))/(math.sqrt(2*math.pi)*sig) + offset
+
+        if style in ('breath', 'boom'):
+            # breath: period = max_frames, boom: period = 2*max_frames
+            period = max_frames if style == 'breath' else max_frames*2.0
+            level = normal(5, 2, 5, -cos_func(1, 2*math.pi/period))
+        elif style in ('bark', 'speak'):
+            # bark: period = 2*max_frames, speak: period = max_frames
+            period = max_frames*2.0 if style == 'bark' else max_frames
+            peak = (light_num-1)/2
+            u_offset = cos_func(peak, 2*math.pi/period)
+            u = np.where(x <= peak, u_offset, 2*peak - u_offset)
+            level = normal(u, 1, 2.5, 0)
+        elif style == 'listen':
+            peak = light_num-1
+            u = cos_func(peak, 2*math.pi/max_frames, math.pi/2)
+            level = normal(u, 1, 2.5, 0)
+        else:
+            raise ValueError("Invalid style value.")
+
+    # int() truncation + max(0, ...) of the per-pixel version
+    data = np.trunc(level[:, :, None] * color[None, None, :])
+    return np.clip(data, 0, 255).astype(np.uint8)
+
 
 class RGBStrip():
     # preset colors define
@@ -29,6 +88,17 @@ class RGBStrip():
     ]
 
     MIN_DELAY = 0.05
+    FRAME_CACHE_BYTES = 256*1024 # memory cap for rendered animations
+    I2C_BLOCK_MAX = 32 # SMBus block write limit, bytes
+
+    # Hardware offload: styles the chip can run on its own once uploaded.
+    # monochromatic is a static picture, breath uses the breath engine.
+    # The auto-play engine is not used: with the Type3 matrix, FRAME1_PAGE and
+    # FRAME2_PAGE together hold a single picture, so there are no spare
+    # frames to cycle through.
+    HW_STYLES = ('monochromatic', 'breath')
+    HW_IDLE_TIMEOUT = 1.0 # s, max sleep of the rgb thread while the chip animates
+    BREATH_TIME_UNIT = 0.026 # s, breath engine fade time = unit * 2^n, n = 0-7
 
     # region constants
     CONFIGURE_CMD_PAGE = 0XFD
@@ -72,6 +142,7 @@ class RGBStrip():
     mskBLINK_EN = (0x1 << 3)
     mskBLINK_DIS = (0x0 << 3)
     mskBLINK_PERIOD_TIME_CONST = (0x7 << 0)
+    mskBREATH_EN = (0x1 << 4)
 
     Type3Vaf = [
         # Frame 1
@@ -110,6 +181,19 @@ class RGBStrip():
         self.current_frame = 0
         self.bps = 1.5 # beats per second
         self.is_changed = False
+        self.frame_cache = FrameCache(self.FRAME_CACHE_BYTES)
+        self.clips = {} # name -> (frames, light_num, 3) uint8, see add_clip()
+        self.offload = False # let the chip run HW_STYLES animations
+        self.hw_active = False # chip currently running the animation
+        self._mode_event = threading.Event()
+
+        # I2C bookkeeping: current RAM page, last data written per (page, reg)
+        self._page = None
+        self._last_blocks = {}
+        self.bus_bytes_written = 0
+        self.bus_bytes_saved = 0
+        self.frames_written = 0
+        self.frames_skipped = 0
 
         # Initial
         # =================================================================
@@ -158,17 +242,65 @@ class RGBStrip():
     # =================================================================
     def write_cmd(self, reg, cmd):
         self.bus.write_byte_data(self.addr, reg, cmd)
+        self.bus_bytes_written += 3  # addr + reg + data
+        if reg == self.CONFIGURE_CMD_PAGE:
+            self._page = cmd
+
+    def select_page(self, page):
+        """Switch RAM page, skipping the write if it is already selected"""
+        if self._page == page:
+            self.bus_bytes_saved += 3
+            return
+        self.write_cmd(self.CONFIGURE_CMD_PAGE, page)
+
+    def write_block(self, startaddr, data):
+        """
+        Write consecutive registers using the chip's address auto-increment,
+        in SMBus blocks of at most I2C_BLOCK_MAX bytes
+        """
+        for i in range(0, len(data), self.I2C_BLOCK_MAX):
+            chunk = data[i:i+self.I2C_BLOCK_MAX]
+            self.bus.write_i2c_block_data(self.addr, startaddr+i, chunk)
+            self.bus_bytes_written += 2 + len(chunk)
+            # vs one write_byte_data (addr + reg + data) per register
+            self.bus_bytes_saved += 3*len(chunk) - (2 + len(chunk))
 
     def write_Ndata(self, startaddr, data, length):
-        addr = startaddr
         if isinstance(data, int):
-            for i in range(length):
-                self.write_cmd(addr, data)
-                addr += 1
-        elif isinstance(data, list):
-            for i in range(length):
-                self.write_cmd(addr, data[i])
-                addr += 1
+            data = [data]*length
+        self.write_block(startaddr, list(data[:length]))
+
+    def write_frame(self, blocks):
+        """
+        Write (page, reg, data) blocks, skipping any block whose registers
+        already hold the same data
+
+        :return: True if anything was written
+        """
+        changed = False
+        for page, reg, data in blocks:
+            if self._last_blocks.get((page, reg)) == data:
+                self.bus_bytes_saved += 2 + len(data)
+                continue
+            self.select_page(page)
+            self.write_block(reg, data)
+            self._last_blocks[(page, reg)] = data
+            changed = True
+        if changed:
+            self.frames_written += 1
+        else:
+            self.frames_skipped += 1
+        return changed
+
+    def bus_stats(self):
+        """I2C traffic statistics"""
+        return {
+            'bytes_written': self.bus_bytes_written,
+            'bytes_saved': self.bus_bytes_saved,
+            'frames_written': self.frames_written,
+            'frames_skipped': self.frames_skipped,
+            'offloaded': self.hw_active,
+        }
 
     # display fuction
     # =================================================================
@@ -177,31 +309,30 @@ class RGBStrip():
         Display the rgb datas
 
         :param image: rgb datas, should be a x*3 array 
-        :type image: list [[r, g, b], [r, g, b], ...]
+        :type image: list [[r, g, b], [r, g, b], ...] or numpy array
         """
-        # 'lambda x: x[0]'  same as  'fun(x): return x[0]'
-        reds = list(map(lambda x: x[0], image))
-        greens = list(map(lambda x: x[1], image))
-        blues = list(map(lambda x: x[2], image))
-        revert_image = [reds, greens, blues]
+        # [reds, greens, blues] as plain ints (smbus rejects numpy scalars)
+        revert_image = np.asarray(image).T.astype(int).tolist()
 
         reg = 0x20  # Register start address of a page
         empty = 0  # Register address vacancy position (needs to be filled with 0)
         pos = 0  # data position, index
+        page = self.FRAME1_PAGE
+        blocks = []
 
         for i in range(3):
             # Set the page to write
             if i == 0:
-                self.write_cmd(self.CONFIGURE_CMD_PAGE, self.FRAME1_PAGE)  
+                page = self.FRAME1_PAGE
             elif reg == 0x20:
-                self.write_cmd(self.CONFIGURE_CMD_PAGE, self.FRAME2_PAGE)
+                page = self.FRAME2_PAGE
 
             color = i % 3
             data = revert_image[color][pos*14:(pos+1)*14]
             data.insert(empty, 0)  # The written data is filled with 0
             data.insert(empty + 1, 0)
 
-            self.bus.write_i2c_block_data(self.addr, reg, data)
+            blocks.append((page, reg, data))
             if color == 2:
                 empty += 3
                 pos += 1
@@ -209,6 +340,9 @@ class RGBStrip():
             if reg == 0xA0:
                 reg = 0x20
 
+        # unchanged frames (e.g. monochromatic) cost no bus traffic
+        self.write_frame(blocks)
+
     # 
     # calulate rgb data of different styles
     # =================================================================
@@ -386,20 +520,24 @@ class RGBStrip():
         except:
             raise ValueError('\033[0;31m%s\033[0m'%("Invalid color value."))
 
-    def set_mode(self, style='breath', color='white', bps=1, brightness=1):
+    def set_mode(self, style='breath', color='white', bps=1, brightness=1, offload=False):
         """
         Set the display mode of the rgb strip
 
-        :param style: rgb display style
+        :param style: rgb display style, or the name of a clip added with add_clip()
         :type style: str
         :param color: rgb display color
         :type color: str , 1*3 list, tuple, eg: "white", "WHITE", "#a2c20c", 0xa2c20c, [168, 192, 203], (168, 192, 203)
-        :param bps: beats per second, this number of style actions executed per second
+        :param bps: beats per second, this number of style actions executed per second,
+                    ignored by clips, which play one frame per MIN_DELAY
         :type bps: float or int
         :param brightness: rgb display brightness
         :type brightness: float or int
+        :param offload: upload monochromatic/breath animations to the chip once and
+                        let it run them, other styles still stream from Python
+        :type offload: bool
         """
-        if style in self.STYLES:
+        if style in self.STYLES or style in self.clips:
             self.style = style
         else:
             self.style = None
@@ -418,8 +556,79 @@ class RGBStrip():
         else:
             raise ValueError("Invalid brightness value.")
 
+        self.offload = bool(offload)
         self.is_changed = True
-        
+        self._mode_event.set()
+
+    def add_clip(self, name, frames):
+        """
+        Add (or replace) a pre-rendered animation, playable with set_mode(style=name)
+
+        :param name: clip name, must not be a built-in style
+        :type name: str
+        :param frames: (frames, light_num, 3) array of 0-255 rgb values,
+                       one frame per MIN_DELAY, looped
+        :type frames: numpy.ndarray or nested list
+        """
+        if name in self.STYLES:
+            raise ValueError(f"Clip name '{name}' is a built-in style.")
+        frames = np.array(frames, dtype=np.uint8)
+        if frames.ndim != 3 or frames.shape[1:] != (self.light_num, 3) or len(frames) == 0:
+            raise ValueError(f"Clip frames must have shape (n, {self.light_num}, 3).")
+        frames.flags.writeable = False
+        self.clips[name] = frames
+        self.frame_cache.discard(name)
+        if self.style == name:
+            self.is_changed = True
+            self._mode_event.set()
+
+    def remove_clip(self, name):
+        """Remove a clip, turning the strip off if it is playing"""
+        self.clips.pop(name)
+        self.frame_cache.discard(name)
+        if self.style == name:
+            # the show() thread blanks the strip: it owns the bus and the dirty tracking
+            self.style = None
+            self.is_changed = True
+            self._mode_event.set()
+
+    def wake(self):
+        """Wake a show() that is sleeping while the chip animates"""
+        self._mode_event.set()
+
+    # hardware offload
+    # =================================================================
+    def breath_time_code(self, period):
+        """
+        Breath engine fade time code whose fade in + fade out best matches period
+
+        :param period: seconds per breath
+        :type period: float
+        :return: n in 0-7, fade time = BREATH_TIME_UNIT * 2^n
+        :rtype: int
+        """
+        n = round(math.log2(max(period, 1e-3) / (2*self.BREATH_TIME_UNIT)))
+        return min(7, max(0, n))
+
+    def _start_hw_animation(self):
+        if self.style == 'breath':
+            # brightest frame of the period; the breath engine fades it in and out
+            self.display(self.frames[len(self.frames)//2])
+            n = self.breath_time_code(1/self.bps)
+            self.select_page(self.FUNCTION_PAGE)
+            self.write_cmd(self.BREATH_CTL_REG, (n << 4) | n) # fade out | fade in
+            self.write_cmd(self.BREATH_CTL_REG2, self.mskBREATH_EN) # extinguish time 0
+        else:
+            self.display(self.frames[0])
+            self.select_page(self.FUNCTION_PAGE)
+            self.write_cmd(self.BREATH_CTL_REG2, 0x00)
+        self.hw_active = True
+
+    def _stop_hw_animation(self):
+        self.select_page(self.FUNCTION_PAGE)
+        self.write_cmd(self.BREATH_CTL_REG2, 0x00)
+        self.hw_active = False
+
 
     # calulate and display frames
     # =================================================================
@@ -438,20 +647,39 @@ class RGBStrip():
             return self.listen(frame_index, light_index, color=self.color)
 
     def show(self):
+        # cleared before is_changed is read, so a set_mode() from now on wakes us
+        self._mode_event.clear()
         if self.style is not None:
             # if changed, calulate frames
             if self.is_changed:
                 self.is_changed = False
-                self.frames.clear()
-                self.max_frames = int(1/self.bps/self.MIN_DELAY)
-                for frame_index in range(self.max_frames):
-                    frame = [] # 11*[r, g ,b]
-                    for light_index in range(self.light_num):
-                        _data = self.calulate_data(frame_index, light_index)
-                        frame.append(_data)
-                    if __name__ == '__main__':
-                        print(f"{frame_index}:{frame}")
-                    self.frames.append(frame)
+                clip = self.clips.get(self.style)
+                if clip is not None:
+                    self.max_frames = len(clip)
+                else:
+                    self.max_frames = max(1, int(1/self.bps/self.MIN_DELAY))
+                self.current_frame = 0
+                # (max_frames, light_num, 3) uint8 array, reused if recently rendered
+                key = FrameCache.key(self.style, self.color, self.brightness,
+                                     self.max_frames, self.light_num)
+                frames = self.frame_cache.get(key)
+                if frames is None:
+                    if clip is not None:
+                        frames = (clip * self.brightness).astype(np.uint8)
+                    else:
+                        frames = render_frames(self.style, self.color, self.brightness,
+                                               self.max_frames, self.light_num)
+                    self.frame_cache.put(key, frames)
+                self.frames = frames
+                if self.offload and self.style in self.HW_STYLES:
+                    self._start_hw_animation()
+                elif self.hw_active:
+                    self._stop_hw_animation()
+            # the chip is running the animation: no frames to push until the next change
+            if self.hw_active:
+                if not self.is_changed:
+                    self._mode_event.wait(self.HW_IDLE_TIMEOUT)
+                return
             # dispaly frame-by-frame, to quickly change mode or close 
             if self.current_frame >= self.max_frames:
                 self.current_frame = 0
@@ -459,12 +687,24 @@ class RGBStrip():
             self.current_frame += 1
             time.sleep(self.MIN_DELAY)
         # --- close ---
-        else: 
+        else:
+            if self.is_changed:
+                self.is_changed = False
+                if self.hw_active:
+                    self._stop_hw_animation()
+                self.display([[0, 0, 0]]*self.light_num)
             time.sleep(self.MIN_DELAY)
 
+    def cache_stats(self):
+        """Rendered-animation cache statistics"""
+        return self.frame_cache.stats()
+
     def close(self):
         self.style = None
         self.is_changed = True
+        self._mode_event.set()
+        if self.hw_active:
+            self._stop_hw_animation()
         self.display([[0, 0, 0]]*self.light_num)
         time.sleep(self.MIN_DELAY)
 
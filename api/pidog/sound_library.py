@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+import os
+import json
+import wave
+import hashlib
+import threading
+
+class SoundLibrary():
+    """
+    Index of sound names to files, with an on-disk PCM cache for compressed sources
+
+    The index is built once and rebuilt only when the sound folder changes
+    (its mtime), so resolving a name never probes the filesystem. Compressed
+    files are decoded once and written as WAV into cache_dir, named by the
+    SHA-1 of their content: a restart, a rename or a copy of the same sound
+    loads the WAV instead of decoding again, and an edited file gets a new
+    entry. A manifest remembers each source's (size, mtime) -> hash so files
+    are not re-hashed on every boot either.
+    """
+
+    EXTENSIONS = ('.wav', '.mp3') # a name present in both uses the first
+    PCM_EXTENSIONS = ('.wav',) # played as-is, not cached
+    MANIFEST = 'index.json'
+
+    def __init__(self, sound_dir, cache_dir=None, decode=None):
+        """
+        Initialize the sound library
+
+        :param sound_dir: folder of sound files, indexed by name (file stem)
+        :type sound_dir: str
+        :param cache_dir: folder for transcoded WAVs, default ~/.cache/pidog/sounds
+        :type cache_dir: str
+        :param decode: decode(path) -> (pcm bytes, sample rate, channels, sample width)
+                       used to transcode compressed files; None disables the cache
+        :type decode: callable
+        """
+        self.sound_dir = sound_dir
+        self.cache_dir = cache_dir or os.path.expanduser('~/.cache/pidog/sounds')
+        self.decode = decode
+        self.index = {} # name -> source path
+        self._dir_mtime = None
+        self._manifest_lock = threading.Lock() # shared by the engine and the API's catalog
+        self._manifest = self._load_manifest()
+        self._manifest_dirty = False
+        self.refresh()
+
+    # index
+    # =================================================================
+    def refresh(self, force=False):
+        """
+        Rebuild the index if the sound folder changed
+
+        :return: True if the index was rebuilt
+        :rtype: bool
+        """
+        try:
+            mtime = os.stat(self.sound_dir).st_mtime_ns
+        except OSError:
+            mtime = None
+        if not force and mtime == self._dir_mtime:
+            return False
+        self._dir_mtime = mtime
+
+        index = {}
+        if mtime is not None:
+            files = sorted(os.listdir(self.sound_dir),
+                           key=lambda f: self._ext_rank(os.path.splitext(f)[1]))
+            for file in files:
+                name, ext = os.path.splitext(file)
+                if ext in self.EXTENSIONS and name not in index:
+                    index[name] = os.path.join(self.sound_dir, file)
+        self.index = index
+        return True
+
+    def set_dir(self, sound_dir, cache_dir=None):
+        """Index a different sound folder, optionally with a different cache folder"""
+        self.sound_dir = sound_dir
+        if cache_dir is not None:
+            with self._manifest_lock:
+                self.cache_dir = cache_dir
+                self._manifest = self._load_manifest()
+                self._manifest_dirty = False
+        self.refresh(force=True)
+
+    def resolve(self, name):
+        """Source path for a sound name or an existing file path, None if unknown"""
+        path = self.index.get(name)
+        if path is None and self.refresh():
+            path = self.index.get(name)
+        if path is None and os.path.isfile(name):
+            path = name
+        return path
+
+    def _ext_rank(self, ext):
+        return self.EXTENSIONS.index(ext) if ext in self.EXTENSIONS else len(self.EXTENSIONS)
+
+    # PCM cache
+    # =================================================================
+    def pcm_path(self, name):
+        """
+        Path to load for a sound: the source if it is PCM, else its cached WAV
+
+        Transcodes on a cache miss. Falls back to the source path if there is
+        no decoder or the cache folder is not writable.
+        """
+        path = self.resolve(name)
+        if path is None:
+            return None
+        if os.path.splitext(path)[1] in self.PCM_EXTENSIONS or self.decode is None:
+            return path
+
+        cached = os.path.join(self.cache_dir, self.content_hash(path) + '.wav')
+        if os.path.isfile(cached):
+            return cached
+        try:
+            self._transcode(path, cached)
+        except OSError:
+            return path
+        return cached
+
+    def content_hash(self, path, save=True):
+        """
+        SHA-1 of a file's content, memoized by (size, mtime) in the manifest
+
+        :param save: write the manifest now if it changed; pass False when
+                     hashing many files and call save_manifest() once after
+        :type save: bool
+        """
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        with self._manifest_lock:
+            entry = self._manifest.get(key)
+        if entry is not None and entry[:2] == [st.st_size, st.st_mtime_ns]:
+            return entry[2]
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        with self._manifest_lock:
+            self._manifest[key] = [st.st_size, st.st_mtime_ns, digest]
+            self._manifest_dirty = True
+        if save:
+            self.save_manifest()
+        return digest
+
+    def _transcode(self, path, cached):
+        pcm, rate, channels, width = self.decode(path)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = cached + '.tmp'
+        with wave.open(tmp, 'wb') as w:
+            w.setnchannels(channels)
+            w.setsampwidth(width)
+            w.setframerate(rate)
+            w.writeframes(pcm)
+        os.replace(tmp, cached) # never leave a truncated WAV under the final name
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.cache_dir, self.MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self):
+        """Write the manifest if content_hash() added to it"""
+        with self._manifest_lock:
+            if not self._manifest_dirty:
+                return
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = os.path.join(self.cache_dir, self.MANIFEST + '.tmp')
+                with open(tmp, 'w') as f:
+                    json.dump(self._manifest, f)
+                os.replace(tmp, os.path.join(self.cache_dir, self.MANIFEST))
+                self._manifest_dirty = False
+            except OSError:
+                pass # keep it dirty; the next save retries
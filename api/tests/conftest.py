@@ -5,7 +5,10 @@ from fastapi.testclient import TestClient
 
 # Force mock mode before importing the app
 import os
+import tempfile
 os.environ["PIDOG_MOCK_HARDWARE"] = "true"
+os.environ["PIDOG_TTS_ENGINE"] = "tone"
+os.environ["PIDOG_TTS_CACHE_DIR"] = tempfile.mkdtemp(prefix="pidog-tts-")
 
 from app.main import app  # noqa: E402
 
@@ -0,0 +1,208 @@
+"""Tests for the hardware audio engine (pidog/audio_engine.py) against a fake mixer."""
+
+import sys
+import threading
+import time
+import types
+
+import pidog.audio_engine as audio_engine
+from pidog.audio_engine import AudioEngine, AudioStream
+from pidog.sound_library import SoundLibrary
+
+
+class _FakeSound:
+    def __init__(self, buffer=b""):
+        self.buffer = buffer
+
+
+class _FakeChannel:
+    """pygame Channel: one playing and one queued sound, until stopped."""
+
+    def __init__(self):
+        self.busy = False
+        self.queued = None
+        self.plays = 0
+        self.volume = 1.0
+
+    def get_busy(self):
+        return self.busy
+
+    def get_queue(self):
+        return self.queued
+
+    def play(self, sound):
+        self.busy = True
+        self.plays += 1
+
+    def queue(self, sound):
+        self.queued = sound
+
+    def stop(self):
+        self.busy = False
+        self.queued = None
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+
+class _FakeMixer:
+    Sound = _FakeSound
+
+    @staticmethod
+    def get_init():
+        return (44100, -16, 2)
+
+
+class _FakePygame:
+    mixer = _FakeMixer
+
+
+def _engine(channels: int = 2) -> AudioEngine:
+    """An AudioEngine on fake channels, skipping the device and library setup."""
+    engine = AudioEngine.__new__(AudioEngine)
+    engine.pygame = _FakePygame
+    engine.sounds = {"bark": _FakeSound(), "howling": _FakeSound()}
+    engine._lock = threading.Lock()
+    engine._channels = [_FakeChannel() for _ in range(channels)]
+    engine._voices = [None] * channels
+    engine._next_id = 1
+    engine.played = engine.stolen = engine.dropped = 0
+    return engine
+
+
+def _settle():
+    time.sleep(AudioStream.FEED_DELAY * 6)
+
+
+def test_stop_ends_a_stream_for_good():
+    engine = _engine()
+    stream = engine.stream(44100, channels=2)
+    chunk = b"\x00\x00" * 2 * 64
+    channel = engine._channels[stream.voice.index]
+
+    stream.write(chunk)
+    _settle()  # playing
+    stream.write(chunk)
+    _settle()  # queued behind it
+    stream.write(chunk)  # waiting for the queue slot
+    assert channel.plays == 1 and channel.get_queue() is not None
+
+    assert engine.stop() == 1
+    _settle()
+    assert not stream.voice.playing
+    assert channel.plays == 1 and not channel.busy  # not restarted with the pending chunk
+    assert stream.write(chunk) is False
+    assert engine.voices() == []
+
+
+def test_stop_one_voice_leaves_others():
+    engine = _engine()
+    bark = engine.play("bark")
+    stream = engine.stream(44100, channels=2)
+    assert engine.stop(stream.voice.id) == 1
+    assert bark.playing and not stream.voice.playing
+
+
+def test_allocate_steals_lowest_priority_then_oldest():
+    engine = _engine()
+    howl = engine.play("howling")  # PRIORITY_LOW
+    first = engine.play("bark")
+    bark = engine.play("bark")
+    assert bark.index == howl.index and not howl.playing and first.playing
+
+    first.started, bark.started = 1.0, 2.0
+    again = engine.play("bark")
+    assert again.index == first.index and not first.playing and bark.playing
+    assert engine.stolen == 2 and engine.dropped == 0
+
+
+def test_allocate_reuses_finished_channel_before_stealing():
+    engine = _engine()
+    howl = engine.play("howling")
+    done = engine.play("bark")
+    engine._channels[done.index].busy = False  # finished on its own
+
+    bark = engine.play("bark")
+    assert bark.index == done.index and howl.playing
+    assert engine.stolen == 0
+
+
+def test_allocate_drops_when_everything_outranks_it():
+    engine = _engine()
+    streams = [engine.stream(44100) for _ in range(2)]  # PRIORITY_HIGH, idle between chunks
+    assert all(s.voice.playing for s in streams)
+
+    assert engine.play("bark") is None
+    assert engine.play("bark", priority=AudioEngine.PRIORITY_HIGH) is not None  # equal rank: oldest goes
+    assert engine.dropped == 1 and engine.stolen == 1
+
+
+class _RecordingMixer:
+    """pygame.mixer that remembers how it was opened."""
+
+    Sound = _FakeSound
+
+    def __init__(self, opened=None):
+        self.opened = opened  # get_init() value
+        self.defaults = {}
+        self.calls = []
+
+    def get_init(self):
+        return self.opened
+
+    def pre_init(self, **kwargs):
+        self.defaults = kwargs
+
+    def init(self, **kwargs):  # robot_hat Music calls it without arguments
+        kwargs = {**self.defaults, **kwargs}
+        self.calls.append(("init", kwargs))
+        self.opened = (kwargs.get("frequency", 22050), kwargs.get("size", -16), kwargs.get("channels", 2))
+
+    def quit(self):
+        self.calls.append(("quit", {}))
+        self.opened = None
+
+    def set_num_channels(self, n):
+        pass
+
+    def Channel(self, index):
+        return _FakeChannel()
+
+
+def _open_engine(monkeypatch, tmp_path, mixer):
+    monkeypatch.setitem(sys.modules, "pygame", types.SimpleNamespace(mixer=mixer))
+    monkeypatch.setattr(audio_engine, "kill_pulseaudio", lambda: None)
+    return AudioEngine(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+
+
+def test_mixer_opened_elsewhere_is_reopened_with_small_buffer(monkeypatch, tmp_path, caplog):
+    mixer = _RecordingMixer(opened=(44100, -16, 2))  # buffer unknown
+    monkeypatch.setattr(AudioEngine, "_preset", None)
+    with caplog.at_level("WARNING", logger="pidog.audio_engine"):
+        _open_engine(monkeypatch, tmp_path, mixer)
+    assert "reopening" in caplog.text
+    assert [name for name, _ in mixer.calls] == ["quit", "init"]
+    assert mixer.calls[1][1]["buffer"] == AudioEngine.BUFFER
+
+
+def test_pre_init_mixer_keeps_the_open_mixer(monkeypatch, tmp_path):
+    mixer = _RecordingMixer()
+    monkeypatch.setitem(sys.modules, "pygame", types.SimpleNamespace(mixer=mixer))
+    monkeypatch.setattr(AudioEngine, "_preset", None)
+    AudioEngine.pre_init_mixer()
+    mixer.init()  # e.g. Music() opening it first
+    _open_engine(monkeypatch, tmp_path, mixer)
+    assert mixer.calls == [("init", mixer.defaults)]
+    assert mixer.defaults["buffer"] == AudioEngine.BUFFER
+
+
+def test_refresh_reloads_when_another_reader_rebuilt_the_index(tmp_path):
+    (tmp_path / "bark.wav").touch()
+    engine = _engine()
+    engine.library = SoundLibrary(str(tmp_path), str(tmp_path / "cache"))
+    engine.load_all()
+
+    (tmp_path / "growl.wav").touch()
+    engine.library.refresh()  # e.g. the API's sound catalog
+    assert engine.refresh() is True
+    assert set(engine.sounds) == {"bark", "growl"}
@@ -0,0 +1,79 @@
+"""Tests for the cached battery sampler."""
+
+import asyncio
+
+import pytest
+
+from app.services.battery_sampler import BatterySampler
+
+
+class _FakeSettings:
+    battery_sample_interval_s = 0.01
+    battery_ema_alpha = 0.5
+    battery_max_staleness_s = 10.0
+
+
+class _FakeADC:
+    def __init__(self, voltage=8.0):
+        self.voltage = voltage
+        self.reads = 0
+
+    def __call__(self) -> float:
+        self.reads += 1
+        return self.voltage
+
+
+def test_first_read_on_demand_when_never_sampled():
+    adc = _FakeADC(7.6)
+    sampler = BatterySampler(adc, _FakeSettings())
+    assert sampler.voltage == 7.6
+    assert adc.reads == 1
+    assert sampler.get_metrics()["fallback_reads"] == 1
+
+
+def test_cached_value_served_without_read():
+    adc = _FakeADC(7.6)
+    sampler = BatterySampler(adc, _FakeSettings())
+    sampler.sample()
+    for _ in range(100):
+        assert sampler.voltage == 7.6
+    assert adc.reads == 1
+
+
+def test_ema_smoothing():
+    adc = _FakeADC(8.0)
+    sampler = BatterySampler(adc, _FakeSettings())
+    sampler.sample()
+    adc.voltage = 7.0
+    assert sampler.sample() == pytest.approx(7.5)
+    assert sampler.sample() == pytest.approx(7.25)
+
+
+def test_stale_cache_forces_direct_read():
+    adc = _FakeADC(8.0)
+    settings = _FakeSettings()
+    settings.battery_max_staleness_s = 0.0
+    sampler = BatterySampler(adc, settings)
+    sampler.sample()
+    sampler.voltage
+    assert adc.reads == 2
+
+
+@pytest.mark.asyncio
+async def test_background_sampling():
+    adc = _FakeADC(8.0)
+    sampler = BatterySampler(adc, _FakeSettings())
+    sampler.start()
+    await asyncio.sleep(0.1)
+    sampler.stop()
+    await asyncio.sleep(0.02)
+    assert adc.reads >= 3
+    assert sampler.age is not None and sampler.age < 1.0
+
+
+def test_battery_sampler_endpoint(client):
+    resp = client.get("/api/v1/status/battery")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["voltage"] > 0
+    assert "age_s" in data
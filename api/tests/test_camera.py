@@ -0,0 +1,242 @@
+"""Tests for the shared camera capture worker."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+from app.routers.camera import _mjpeg_generator
+from app.services.camera_service import TIERS, AdaptiveTier, CameraService
+
+
+class _FakeEncoder:
+    """Stands in for the placeholder encode (no OpenCV/Pillow needed)."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, tier=TIERS[0]) -> bytes:
+        self.calls += 1
+        return b"\xff\xd8jpeg %d %s\xff\xd9" % (self.calls, tier.name.encode())
+
+
+def _camera(encoder: _FakeEncoder, fps: int = 50) -> CameraService:
+    camera = CameraService()
+    camera._fps = fps
+    camera._generate_mock_frame = encoder
+    return camera
+
+
+def test_readers_share_one_encode():
+    encoder = _FakeEncoder()
+    camera = _camera(encoder, fps=2)
+    camera.start()
+    try:
+        frames = [camera.get_frame() for _ in range(3)]
+        assert frames[0] is not None
+        assert frames[0] is frames[1] is frames[2]
+    finally:
+        camera.stop()
+
+
+def test_worker_publishes_sequence_numbered_frames():
+    encoder = _FakeEncoder()
+    camera = _camera(encoder)
+    camera.start()
+    first = camera.latest_frame()
+    time.sleep(0.1)
+    later = camera.latest_frame()
+    camera.stop()
+
+    assert later.seq > first.seq
+    assert camera.get_frame() is None
+    assert camera.get_metrics()["frames_encoded"] == encoder.calls
+
+
+async def test_stream_clients_send_shared_bytes():
+    encoder = _FakeEncoder()
+    camera = _camera(encoder, fps=2)
+    camera.start()
+    streams = [_mjpeg_generator(camera) for _ in range(3)]
+    try:
+        parts = [[await anext(s) for _ in range(3)] for s in streams]
+        assert camera.get_metrics()["stream_clients"] == 3
+    finally:
+        for s in streams:
+            await s.aclose()
+        camera.stop()
+
+    header, jpeg, trailer = parts[0]
+    assert header.startswith(b"--frame\r\n") and b"Content-Length: %d" % len(jpeg) in header
+    assert all(p[1] is jpeg for p in parts)
+    assert camera.get_metrics()["stream_clients"] == 0
+
+
+def test_snapshot_serves_latest_frame(client):
+    camera = client.app.state.camera
+    encoder = _FakeEncoder()
+    with patch.object(camera, "_generate_mock_frame", encoder):
+        camera.start()
+        resp = client.get("/api/v1/camera/snapshot")
+        status = client.get("/api/v1/camera/status").json()
+        camera.stop()
+
+    assert resp.status_code == 200
+    assert resp.content.startswith(b"\xff\xd8jpeg")
+    assert status["frame_seq"] >= 1 and status["frames_encoded"] >= 1
+
+
+def test_busy_encoder_skips_frames_instead_of_queueing():
+    def slow_encode(tier) -> bytes:
+        time.sleep(0.05)
+        return b"\xff\xd8slow\xff\xd9"
+
+    camera = _camera(_FakeEncoder())
+    camera._generate_mock_frame = slow_encode
+    camera.start()
+    time.sleep(0.2)
+    metrics = camera.get_metrics()
+    camera.stop()
+
+    assert metrics["frames_skipped"] > 0
+    assert metrics["frames_encoded"] >= 2
+
+
+async def test_stream_sends_each_frame_once_and_ends_on_stop():
+    camera = _camera(_FakeEncoder(), fps=50)
+    camera.start()
+    stream = _mjpeg_generator(camera)
+    seqs = []
+    for _ in range(5):
+        header = await anext(stream)
+        await anext(stream)
+        await anext(stream)
+        seqs.append(int(header.split(b"X-Frame-Seq: ")[1].split(b"\r\n")[0]))
+    assert seqs == sorted(set(seqs))
+
+    camera.stop()
+    remaining = [chunk async for chunk in stream]
+    assert len(remaining) % 3 == 0  # at most frames already published, then the end
+
+
+async def test_next_frame_waits_for_newer():
+    camera = _camera(_FakeEncoder(), fps=20)
+    camera.start()
+    try:
+        first = await camera.next_frame()
+        newer = await camera.next_frame(first.seq, timeout=1.0)
+        assert newer.seq > first.seq
+        assert newer.captured_at >= first.captured_at
+    finally:
+        camera.stop()
+    assert await camera.next_frame(newer.seq, timeout=0.05) is None
+
+
+def test_snapshot_etag_not_modified(client):
+    camera = client.app.state.camera
+    with patch.object(camera, "_generate_mock_frame", _FakeEncoder()):
+        camera._fps = 2
+        camera.start()
+        first = client.get("/api/v1/camera/snapshot")
+        etag = first.headers["etag"]
+        again = client.get("/api/v1/camera/snapshot", headers={"If-None-Match": etag})
+        time.sleep(0.6)
+        fresh = client.get("/api/v1/camera/snapshot", headers={"If-None-Match": etag})
+        camera.stop()
+
+    assert first.status_code == 200 and first.headers["x-frame-seq"] == etag.strip('"').split("-")[1]
+    assert again.status_code == 304 and again.content == b""
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+
+
+def test_adaptive_tier_steps_down_and_recovers():
+    pacer = AdaptiveTier(best=1, fps=10)
+    assert pacer.record(0.2, 0) == 1  # one slow frame is not enough
+    assert pacer.record(0.01, 3) == 2  # frames went by while sending
+    for _ in range(4):
+        pacer.record(0.5, 0)
+    assert pacer.tier == len(TIERS) - 1
+
+    for _ in range(30 * 3):  # 3 s of fast sends per step at 10 fps
+        pacer.record(0.01, 0)
+    assert pacer.tier == 1  # back up, but not above the client's cap
+
+
+def test_best_tier_respects_hints():
+    camera = _camera(_FakeEncoder())
+    assert TIERS[camera.best_tier(max_width=4000)].name == "medium"  # width not known yet
+    camera._full_width = 320
+    assert camera.best_tier() == 0
+    assert camera.best_tier(max_width=320) == 0
+    assert TIERS[camera.best_tier(max_width=300)].max_width == 240
+    assert TIERS[camera.best_tier(quality=60)].name == "low"
+
+
+async def test_clients_on_a_tier_share_its_encode():
+    encoder = _FakeEncoder()
+    camera = _camera(encoder, fps=5)
+    camera.start()
+    streams = [_mjpeg_generator(camera, max_width=240) for _ in range(2)] + [_mjpeg_generator(camera)]
+
+    async def last_part(stream) -> list[bytes]:
+        # Pull like the server does; the third frame is past any captured
+        # before the tier was wanted
+        chunks = [await anext(stream) for _ in range(9)]
+        await stream.aclose()
+        return chunks[6:]
+
+    parts = await asyncio.gather(*(last_part(s) for s in streams))
+    camera.stop()
+
+    assert b"X-Frame-Tier: minimal" in parts[0][0] and b"X-Frame-Tier: full" in parts[2][0]
+    assert parts[0][1] is parts[1][1] and parts[0][1].endswith(b"minimal\xff\xd9")
+    tiers = camera.get_metrics()["tiers"]
+    assert tiers["medium"]["frames"] == 0 and tiers["minimal"]["frames"] > 0
+    assert all(t["clients"] == 0 for t in tiers.values())
+
+
+async def test_backed_up_client_drops_tier():
+    camera = _camera(_FakeEncoder(), fps=20)
+    camera.start()
+    stream = _mjpeg_generator(camera)
+    tiers = []
+    try:
+        for _ in range(6):
+            header = await anext(stream)
+            await anext(stream)
+            await asyncio.sleep(0.08)  # socket backed up: the part takes > 1 frame to send
+            await anext(stream)
+            tiers.append(header.split(b"X-Frame-Tier: ")[1].split(b"\r\n")[0])
+    finally:
+        await stream.aclose()
+        camera.stop()
+
+    assert tiers[0] == b"full"
+    assert tiers[-1] != b"full"
+
+
+def test_start_endpoint_runs_off_the_event_loop(client):
+    camera = client.app.state.camera
+    on_loop = []
+
+    def start():
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+
+    with patch.object(camera, "start", start):
+        assert client.post("/api/v1/camera/start").status_code == 200
+    assert on_loop == [False]
+
+
+async def test_stream_never_sends_above_width_cap():
+    camera = _camera(_FakeEncoder(), fps=10)
+    camera.start()  # the first frame is encoded before the stream wants a small tier
+    stream = _mjpeg_generator(camera, max_width=240)
+    try:
+        header = await anext(stream)
+    finally:
+        await stream.aclose()
+        camera.stop()
+    assert b"X-Frame-Tier: minimal" in header
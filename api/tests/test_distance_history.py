@@ -0,0 +1,58 @@
+"""Tests for ultrasonic distance filtering and the history endpoint."""
+
+import numpy as np
+
+from app.services.distance_filter import reject_outliers, summarize
+
+
+def test_reject_outliers_drops_errors_and_spikes():
+    distances = np.array([40.0, 40.2, -1.0, 39.9, 250.0, 40.1, -2.0])
+    mask = reject_outliers(distances)
+    assert mask.tolist() == [True, True, False, True, False, True, False]
+
+
+def test_reject_outliers_flat_signal_keeps_small_noise():
+    distances = np.array([30.0, 30.0, 30.0, 30.0, 30.3])
+    assert reject_outliers(distances).all()
+
+
+def test_summarize_median_and_filtered():
+    timestamps = np.arange(5, dtype=float)
+    distances = np.array([10.0, 10.0, 10.0, 300.0, -1.0])
+    summary = summarize(timestamps, distances, stale_after_s=1.0, now=4.1)
+    assert summary.median == 10.0
+    assert summary.filtered == 10.0
+    assert summary.rejected == 2
+    assert not summary.stale
+
+
+def test_summarize_stale_history():
+    timestamps = np.array([0.0, 0.01])
+    distances = np.array([20.0, 20.0])
+    summary = summarize(timestamps, distances, stale_after_s=0.5, now=5.0)
+    assert summary.stale
+    assert abs(summary.age_s - 4.99) < 1e-9
+
+
+def test_summarize_empty_history_is_stale():
+    summary = summarize(np.empty(0), np.empty(0), stale_after_s=0.5)
+    assert summary.stale
+    assert summary.median is None
+    assert summary.filtered is None
+
+
+def test_distance_history_endpoint(client):
+    resp = client.get("/api/v1/sensors/distance/history?limit=20")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert len(data["samples"]) == 20
+    assert data["stale"] is False
+    assert data["median"] == 42.0
+    assert all(s["valid"] for s in data["samples"])
+    timestamps = [s["timestamp"] for s in data["samples"]]
+    assert timestamps == sorted(timestamps)
+
+
+def test_distance_history_limit_validated(client):
+    resp = client.get("/api/v1/sensors/distance/history?limit=0")
+    assert resp.status_code == 422
@@ -0,0 +1,53 @@
+"""Tests for the rendered-animation LRU cache (pidog/frame_cache.py)."""
+
+import numpy as np
+
+from pidog.frame_cache import FrameCache
+
+
+def _frames(nbytes: int) -> np.ndarray:
+    return np.zeros(nbytes, dtype=np.uint8)
+
+
+def test_evicts_least_recently_used_over_byte_cap():
+    cache = FrameCache(max_bytes=300)
+    for name in ("a", "b", "c"):
+        cache.put((name,), _frames(100))
+    assert cache.get(("a",)) is not None  # a is now the most recent
+
+    cache.put(("d",), _frames(100))
+    assert cache.get(("b",)) is None
+    assert all(cache.get((name,)) is not None for name in ("a", "c", "d"))
+    stats = cache.stats()
+    assert stats["bytes"] == 300 and stats["entries"] == 3 and stats["evictions"] == 1
+
+
+def test_keeps_newest_entry_even_over_cap():
+    cache = FrameCache(max_bytes=100)
+    cache.put(("small",), _frames(50))
+    cache.put(("big",), _frames(500))
+    assert cache.get(("small",)) is None
+    assert cache.get(("big",)) is not None
+    assert cache.stats()["bytes"] == 500
+
+
+def test_replace_and_discard_keep_byte_count():
+    cache = FrameCache(max_bytes=1000)
+    cache.put(("clip", 1), _frames(100))
+    cache.put(("clip", 1), _frames(200))
+    cache.put(("clip", 2), _frames(100))
+    cache.put(("breath", 1), _frames(100))
+    assert cache.stats()["bytes"] == 400
+
+    cache.discard("clip")
+    assert cache.stats()["bytes"] == 100 and cache.stats()["entries"] == 1
+
+
+def test_cached_frames_are_read_only_and_counted():
+    cache = FrameCache()
+    key = FrameCache.key("breath", [255, 100, 100], 1, 20, 11)
+    assert cache.get(key) is None
+    cache.put(key, _frames(10))
+    assert not cache.get(FrameCache.key("breath", (255, 100, 100), 1.0, 20, 11)).flags.writeable
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
@@ -0,0 +1,150 @@
+"""Tests for streamed head setpoints and the jitter buffer."""
+
+import asyncio
+import time
+
+from app.services.head_streamer import HeadStreamer
+
+
+class _FakeSettings:
+    def __init__(self, jitter_ms: float = 50.0):
+        self.head_stream_jitter_ms = jitter_ms
+
+
+class _FakeService:
+    def __init__(self):
+        self.writes: list[tuple[float, float]] = []  # (yaw, time)
+
+    def stream_head(self, yaw, roll, pitch, speed=50, on_write=None):
+        self.writes.append((yaw, time.time()))
+        if on_write:
+            on_write()
+
+
+async def test_latest_wins_without_timestamps():
+    service = _FakeService()
+    streamer = HeadStreamer(service, _FakeSettings())
+    streamer.start()
+    for yaw in (1, 2, 3):
+        streamer.submit(yaw, 0, 0)
+    await asyncio.sleep(0.01)
+    streamer.stop()
+
+    assert [yaw for yaw, _ in service.writes] == [3]
+    assert streamer.get_metrics()["dropped"] == 2
+
+
+async def test_jitter_buffer_restores_client_spacing():
+    service = _FakeService()
+    streamer = HeadStreamer(service, _FakeSettings(jitter_ms=50))
+    streamer.start()
+    streamer.submit(0, 0, 0, client_ts=time.time())  # fast trip: sets the offset
+    await asyncio.sleep(0.08)
+
+    # Sent 20 ms apart, arriving together
+    now = time.time()
+    for yaw, age in ((1, 0.04), (2, 0.02), (3, 0.0)):
+        streamer.submit(yaw, 0, 0, client_ts=now - age)
+    await asyncio.sleep(0.12)
+    streamer.stop()
+
+    burst = [(yaw, t) for yaw, t in service.writes if yaw]
+    assert [yaw for yaw, _ in burst] == [1, 2, 3]
+    gaps = [b[1] - a[1] for a, b in zip(burst, burst[1:])]
+    assert all(gap > 0.01 for gap in gaps)
+    assert streamer.get_metrics()["dropped"] == 0
+
+
+async def test_no_jitter_plays_burst_as_latest():
+    service = _FakeService()
+    streamer = HeadStreamer(service, _FakeSettings(jitter_ms=0))
+    streamer.start()
+    now = time.time()
+    for yaw, age in ((1, 0.04), (2, 0.02), (3, 0.0)):
+        streamer.submit(yaw, 0, 0, client_ts=now - age)
+    await asyncio.sleep(0.01)
+    streamer.stop()
+
+    assert [yaw for yaw, _ in service.writes] == [3]
+
+
+async def test_stale_setpoint_discarded_and_latency_measured():
+    service = _FakeService()
+    streamer = HeadStreamer(service, _FakeSettings(jitter_ms=0))
+    streamer.start()
+    sent = time.time() - 0.03
+    streamer.submit(5, 0, 0, client_ts=sent)
+    await asyncio.sleep(0.01)
+    assert streamer.submit(4, 0, 0, client_ts=sent - 0.01) is False  # reordered in flight
+    await asyncio.sleep(0.01)
+    streamer.stop()
+
+    metrics = streamer.get_metrics()
+    assert [yaw for yaw, _ in service.writes] == [5]
+    assert metrics["stale"] == 1
+    assert metrics["written"] == 1
+    assert metrics["e2e_ms"]["p50"] >= 30
+    assert metrics["server_ms"]["p50"] < 30
+
+
+async def test_clock_ahead_does_not_freeze_later_setpoints():
+    service = _FakeService()
+    streamer = HeadStreamer(service, _FakeSettings(jitter_ms=0))
+    streamer.start()
+    streamer.submit(1, 0, 0, client_ts=time.time() + 5)  # clock ran ahead, then stepped back
+    await asyncio.sleep(0.01)
+    for yaw in (2, 3):
+        assert streamer.submit(yaw, 0, 0, client_ts=time.time())
+        await asyncio.sleep(0.01)
+    streamer.stop()
+
+    assert [yaw for yaw, _ in service.writes] == [1, 2, 3]
+    assert streamer.get_metrics()["stale"] == 0
+
+
+async def test_sources_keep_separate_clocks():
+    service = _FakeService()
+    streamer = HeadStreamer(service, _FakeSettings(jitter_ms=0))
+    streamer.start()
+    now = time.time()
+    streamer.submit(1, 0, 0, client_ts=now, source="a")
+    await asyncio.sleep(0.01)
+    assert streamer.submit(2, 0, 0, client_ts=now - 0.5, source="b")  # other phone, slower clock
+    await asyncio.sleep(0.01)
+    assert not streamer.submit(3, 0, 0, client_ts=now - 0.01, source="a")
+    streamer.forget("b")
+    streamer.stop()
+
+    assert [yaw for yaw, _ in service.writes] == [1, 2]
+    assert streamer.get_metrics()["sources"] == 1
+
+
+def test_stale_setpoint_acked_over_websocket(client):
+    now = time.time()
+    with client.websocket_connect("/api/v1/ws") as ws:
+        ws.send_json({"type": "subscribe", "channels": []})
+        ws.send_json({"type": "head_stream", "t": now, "yaw": 10, "roll": 0, "pitch": 0})
+        time.sleep(0.1)  # played
+        ws.send_json({"type": "head_stream", "seq": 3, "t": now - 0.05, "yaw": 20, "roll": 0, "pitch": 0})
+        msg = ws.receive_json()
+        while msg["type"] != "ack":
+            msg = ws.receive_json()
+        assert msg["data"]["seq"] == 3 and not msg["data"]["ok"]
+        assert "Stale" in msg["data"]["error"]
+
+
+def test_head_stream_over_websocket(client):
+    with client.websocket_connect("/api/v1/ws") as ws:
+        ws.send_json({"type": "subscribe", "channels": []})
+        ws.send_json({"type": "head_stream", "t": time.time(), "yaw": 25, "roll": 0, "pitch": 0})
+        ws.send_json({"type": "head_stream", "seq": 9, "yaw": 120, "roll": 0, "pitch": 0})
+        msg = ws.receive_json()
+        while msg["type"] != "ack":  # state sent before the subscribe took effect
+            msg = ws.receive_json()
+        assert msg["data"]["seq"] == 9 and not msg["data"]["ok"]  # only the rejection is acked
+        time.sleep(0.1)  # jitter buffer
+
+    assert client.get("/api/v1/servos/positions").json()["head"][0] == 25
+    metrics = client.get("/api/v1/servos/head/stream").json()
+    assert metrics["received"] == 1 and metrics["written"] == 1
+    assert metrics["e2e_ms"] is not None
@@ -0,0 +1,92 @@
+"""Tests for batched log streaming."""
+
+import asyncio
+import logging
+import threading
+
+from app.services.log_handler import BufferedLogHandler
+
+
+class _FakeManager:
+    def __init__(self, subscribed: bool = True):
+        self.subscribed = subscribed
+        self.batches: list[list[dict]] = []
+
+    def has_subscribers(self, channel: str) -> bool:
+        return self.subscribed
+
+    async def broadcast(self, channel: str, data: dict) -> None:
+        assert channel == "logs"
+        self.batches.append(data["entries"])
+
+
+def _logger(handler: BufferedLogHandler) -> logging.Logger:
+    logger = logging.getLogger(f"pidog.test.{id(handler)}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(handler)
+    return logger
+
+
+async def test_burst_is_batched():
+    handler = BufferedLogHandler()
+    manager = _FakeManager()
+    handler.set_ws_manager(manager, flush_interval_s=0.05, batch_size=50)
+    handler.start()
+    log = _logger(handler)
+
+    for i in range(500):
+        log.debug(f"line {i}")
+    await asyncio.sleep(0.1)
+    handler.stop()
+
+    assert len(manager.batches) == 10
+    messages = [e["message"] for batch in manager.batches for e in batch]
+    assert messages == [f"line {i}" for i in range(500)]
+    assert handler.stats()["streamed"] == 500
+
+
+async def test_lines_within_interval_share_a_batch():
+    handler = BufferedLogHandler()
+    manager = _FakeManager()
+    handler.set_ws_manager(manager, flush_interval_s=0.05, batch_size=50)
+    handler.start()
+    log = _logger(handler)
+
+    log.info("one")
+    await asyncio.sleep(0.01)
+    log.info("two")
+    await asyncio.sleep(0.1)
+    handler.stop()
+
+    assert [[e["message"] for e in b] for b in manager.batches] == [["one", "two"]]
+
+
+async def test_logs_from_other_threads_are_streamed():
+    handler = BufferedLogHandler()
+    manager = _FakeManager()
+    handler.set_ws_manager(manager, flush_interval_s=0.02)
+    handler.start()
+    log = _logger(handler)
+
+    thread = threading.Thread(target=lambda: [log.warning(f"hw {i}") for i in range(3)])
+    thread.start()
+    thread.join()
+    await asyncio.sleep(0.1)
+    handler.stop()
+
+    assert [e["message"] for b in manager.batches for e in b] == ["hw 0", "hw 1", "hw 2"]
+
+
+async def test_no_subscribers_keeps_buffer_only():
+    handler = BufferedLogHandler()
+    manager = _FakeManager(subscribed=False)
+    handler.set_ws_manager(manager, flush_interval_s=0.01)
+    handler.start()
+    _logger(handler).info("quiet")
+    await asyncio.sleep(0.05)
+    handler.stop()
+
+    assert manager.batches == []
+    assert handler.stats()["pending"] == 0
+    assert handler.buffer[-1]["message"] == "quiet"
@@ -0,0 +1,71 @@
+"""Tests for custom RGB clip compilation and the clip endpoints."""
+
+import pytest
+
+from app.models.rgb import RGBKeyframe, RGBTrack
+from app.services.rgb_clips import compile_frames, compile_tracks
+
+FADE = {"name": "fade", "tracks": [{"keyframes": [
+    {"t": 0.0, "color": "black"}, {"t": 1.0, "color": [200, 100, 0]},
+]}]}
+
+
+def test_compile_tracks_interpolates_on_frame_clock():
+    track = RGBTrack(keyframes=[
+        RGBKeyframe(t=0.0, color="black"), RGBKeyframe(t=1.0, color=[200, 100, 0]),
+    ])
+    frames = compile_tracks([track])
+    assert frames.shape == (20, 11, 3)
+    assert frames[0, 0].tolist() == [0, 0, 0]
+    assert frames[10, 5].tolist() == [100, 50, 0]
+
+
+def test_compile_tracks_led_subsets_and_hold():
+    tracks = [
+        RGBTrack(leds=[0, 1], keyframes=[RGBKeyframe(t=0.0, color="red")]),
+        RGBTrack(leds=[1], keyframes=[RGBKeyframe(t=0.0, color="blue")]),
+    ]
+    frames = compile_tracks(tracks, duration_s=0.5)
+    assert len(frames) == 10
+    assert frames[9, 0].tolist() == [255, 0, 0]
+    assert frames[9, 1].tolist() == [0, 0, 255]  # later track wins
+    assert frames[9, 2].tolist() == [0, 0, 0]    # undriven LEDs stay off
+
+
+def test_compile_tracks_rejects_bad_input():
+    with pytest.raises(ValueError):
+        compile_tracks([RGBTrack(leds=[11], keyframes=[RGBKeyframe(t=0, color="red")])])
+    with pytest.raises(ValueError):
+        compile_tracks([RGBTrack(keyframes=[RGBKeyframe(t=0, color="mauve")])])
+
+
+def test_compile_frames_validates_shape():
+    assert compile_frames([[[1, 2, 3]] * 11] * 4).shape == (4, 11, 3)
+    with pytest.raises(ValueError):
+        compile_frames([[[1, 2, 3]] * 10])
+    with pytest.raises(ValueError):
+        compile_frames([[[1, 2, 300]] * 11])
+
+
+def test_clip_upload_play_and_delete(client):
+    resp = client.post("/api/v1/rgb/clips", json=FADE)
+    assert resp.status_code == 200
+    assert resp.json() == {"name": "fade", "frames": 20, "duration_s": 1.0, "bytes": 660}
+    assert [c["name"] for c in client.get("/api/v1/rgb/clips").json()] == ["fade"]
+
+    resp = client.post("/api/v1/rgb/mode", json={"style": "fade", "color": "white"})
+    assert resp.status_code == 200
+    resp = client.post("/api/v1/actions/execute", json={"actions": ["rgb:fade"]})
+    assert resp.status_code == 200
+
+    assert client.delete("/api/v1/rgb/clips/fade").status_code == 200
+    assert client.delete("/api/v1/rgb/clips/fade").status_code == 404
+    resp = client.post("/api/v1/rgb/mode", json={"style": "fade", "color": "white"})
+    assert resp.status_code == 422
+
+
+def test_clip_upload_validation(client):
+    both = {**FADE, "frames": [[[0, 0, 0]] * 11]}
+    assert client.post("/api/v1/rgb/clips", json=both).status_code == 422
+    builtin = {**FADE, "name": "breath"}
+    assert client.post("/api/v1/rgb/clips", json=builtin).status_code == 422
@@ -0,0 +1,96 @@
+"""Tests for the hardware RGB strip driver (pidog/rgb_strip.py) against a fake I2C bus."""
+
+import sys
+import types
+
+import numpy as np
+
+
+class _FakeSMBus:
+    """smbus.SMBus: records every write as (kind, reg, data)."""
+
+    def __init__(self, bus):
+        self.writes = []
+
+    def write_byte_data(self, addr, reg, value):
+        self.writes.append(("byte", reg, value))
+
+    def write_i2c_block_data(self, addr, reg, data):
+        self.writes.append(("block", reg, list(data)))
+
+
+# smbus only exists on the Pi; rgb_strip imports it at module level
+sys.modules.setdefault("smbus", types.SimpleNamespace(SMBus=_FakeSMBus))
+
+from pidog.rgb_strip import RGBStrip  # noqa: E402
+
+LIGHTS = 11
+
+
+def _strip() -> RGBStrip:
+    strip = RGBStrip(0x74, LIGHTS)
+    strip.bus.writes.clear()
+    return strip
+
+
+def _lit(strip: RGBStrip) -> bool:
+    return any(any(data) for data in strip._last_blocks.values())
+
+
+def test_remove_playing_clip_blanks_from_show_thread():
+    strip = _strip()
+    strip.add_clip("flash", np.full((2, LIGHTS, 3), 200))
+    strip.set_mode("flash")
+    strip.show()
+    assert _lit(strip)
+
+    strip.bus.writes.clear()
+    strip.remove_clip("flash")
+    assert strip.bus.writes == []  # the caller never touches the bus
+    assert strip._mode_event.is_set()
+
+    strip.show()
+    assert not _lit(strip)
+    strip.bus.writes.clear()
+    strip.show()
+    assert strip.bus.writes == []  # blanked once, then idle
+
+
+def test_write_block_splits_into_smbus_blocks():
+    strip = _strip()
+    before = strip.bus_stats()["bytes_written"]
+    strip.write_block(0x20, list(range(70)))
+
+    blocks = [w for w in strip.bus.writes if w[0] == "block"]
+    assert [(reg, len(data)) for _, reg, data in blocks] == [(0x20, 32), (0x40, 32), (0x60, 6)]
+    assert sum((data for _, _, data in blocks), []) == list(range(70))
+    assert strip.bus_stats()["bytes_written"] - before == 3 * 2 + 70  # addr + reg per block
+
+
+def test_select_page_skips_current_page():
+    strip = _strip()
+    strip.select_page(strip.FUNCTION_PAGE)
+    strip.select_page(strip.FUNCTION_PAGE)
+    strip.select_page(strip.FRAME1_PAGE)
+
+    assert strip.bus.writes == [
+        ("byte", strip.CONFIGURE_CMD_PAGE, strip.FUNCTION_PAGE),
+        ("byte", strip.CONFIGURE_CMD_PAGE, strip.FRAME1_PAGE),
+    ]
+
+
+def test_unchanged_frame_writes_nothing():
+    strip = _strip()
+    image = [[10, 20, 30]] * LIGHTS
+    strip.display(image)
+    assert strip.bus.writes
+
+    strip.bus.writes.clear()
+    strip.display(image)
+    assert strip.bus.writes == []
+    stats = strip.bus_stats()
+    assert stats["frames_written"] == 1 and stats["frames_skipped"] == 1
+
+    image[0] = [11, 20, 30]
+    strip.display(image)
+    assert [w[1] for w in strip.bus.writes if w[0] == "block"] == [0x20]  # only the changed red block
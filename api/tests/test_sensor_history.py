@@ -0,0 +1,83 @@
+"""Tests for the downsampled sensor history store."""
+
+import numpy as np
+
+from app.services.sensor_history import SensorHistory, lttb, minmax_buckets
+
+
+class _FakeSettings:
+    history_enabled = True
+    history_sample_hz = 5.0
+
+
+def _history() -> SensorHistory:
+    return SensorHistory(pidog_service=None, head_monitor=None, settings=_FakeSettings())
+
+
+def test_lttb_keeps_endpoints_and_peak():
+    t = np.arange(1000, dtype=float)
+    v = np.zeros(1000)
+    v[500] = 10.0
+    dt, dv = lttb(t, v, 50)
+    assert len(dt) == 50
+    assert dt[0] == 0 and dt[-1] == 999
+    assert 10.0 in dv
+
+
+def test_lttb_passthrough_when_short():
+    t = np.arange(10, dtype=float)
+    dt, dv = lttb(t, t, 50)
+    assert len(dt) == 10
+
+
+def test_minmax_buckets_preserve_extremes():
+    t = np.arange(100, dtype=float)
+    v = np.sin(t)
+    _, mean, lo, hi = minmax_buckets(t, v, v, v, 10)
+    assert len(mean) == 10
+    assert lo.min() == v.min()
+    assert hi.max() == v.max()
+
+
+def test_raw_query_returns_recorded_samples():
+    history = _history()
+    for i in range(20):
+        history.record(1000.0 + i * 0.2, {"pitch": float(i), "roll": 0.0})
+    result = history.query(["pitch"], seconds=60, points=100, method="raw", now=1004.0)
+    assert result["series"]["pitch"]["value"] == [float(i) for i in range(20)]
+
+
+def test_missing_fields_are_gaps():
+    history = _history()
+    history.record(1000.0, {"pitch": 1.0, "battery": 7.8})
+    history.record(1000.2, {"pitch": 2.0})
+    result = history.query(["battery"], seconds=60, points=100, method="raw", now=1001.0)
+    assert result["series"]["battery"]["value"] == [7.8]
+
+
+def test_coarse_tier_used_for_long_range():
+    history = _history()
+    # 20 minutes at 5Hz overflows the 10-minute raw tier
+    start = 10_000.0
+    for i in range(20 * 60 * 5):
+        history.record(start + i * 0.2, {"pitch": float(i % 7)})
+    now = start + 20 * 60
+    result = history.query(["pitch"], seconds=900, points=1000, method="minmax", now=now)
+    assert result["resolution_s"] == 5.0
+    series = result["series"]["pitch"]
+    assert min(series["min"]) == 0.0
+    assert max(series["max"]) == 6.0
+
+
+def test_history_endpoint(client):
+    resp = client.get("/api/v1/sensors/history?fields=pitch,roll&seconds=60&points=50")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["method"] == "lttb"
+    assert set(data["series"]) == {"pitch", "roll"}
+
+
+def test_history_endpoint_rejects_unknown_field(client):
+    resp = client.get("/api/v1/sensors/history?fields=temperature")
+    assert resp.status_code == 422
+
@@ -0,0 +1,62 @@
+"""Tests for the sound library index."""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from app.services.sound_catalog import SoundCatalog
+from pidog.sound_library import SoundLibrary
+
+SOUNDS = Path(__file__).parent.parent / "sounds"
+
+
+def test_catalog_follows_directory_changes(tmp_path):
+    shutil.copy(SOUNDS / "angry.wav", tmp_path / "angry.wav")
+    catalog = SoundCatalog(tmp_path, tmp_path / "cache")
+    assert catalog.names() == {"angry"}
+    assert catalog.refresh() is False  # unchanged directory, no rescan
+
+    shutil.copy(SOUNDS / "pant.mp3", tmp_path / "pant.mp3")
+    assert catalog.names() == {"angry", "pant"}
+
+
+def test_catalog_reports_transcode_cache(tmp_path):
+    shutil.copy(SOUNDS / "pant.mp3", tmp_path / "pant.mp3")
+    cache = tmp_path / "cache"
+    catalog = SoundCatalog(tmp_path, cache)
+    assert catalog.entries()[0].transcoded is False
+
+    cache.mkdir(exist_ok=True)
+    digest = hashlib.sha1((tmp_path / "pant.mp3").read_bytes()).hexdigest()
+    (cache / f"{digest}.wav").touch()
+    assert catalog.entries()[0].transcoded is True
+
+
+def test_catalog_reads_hashes_from_library_manifest(tmp_path):
+    shutil.copy(SOUNDS / "pant.mp3", tmp_path / "pant.mp3")
+    st = (tmp_path / "pant.mp3").stat()
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    # As written by the robot's SoundLibrary; a stale memo proves the file isn't re-hashed
+    manifest = {os.path.abspath(tmp_path / "pant.mp3"): [st.st_size, st.st_mtime_ns, "feed"]}
+    (cache / "index.json").write_text(json.dumps(manifest))
+    (cache / "feed.wav").touch()
+
+    assert SoundCatalog(tmp_path, cache).entries()[0].transcoded is True
+
+
+def test_catalog_shares_the_engine_library(tmp_path):
+    shutil.copy(SOUNDS / "pant.mp3", tmp_path / "pant.mp3")
+    cache = tmp_path / "cache"
+    library = SoundLibrary(str(tmp_path), str(cache))
+    catalog = SoundCatalog(tmp_path, cache, library=library)
+
+    catalog.entries()
+    manifest = json.loads((cache / "index.json").read_text())
+    assert list(manifest) == [os.path.abspath(tmp_path / "pant.mp3")]
+
+    shutil.copy(SOUNDS / "angry.wav", tmp_path / "angry.wav")
+    library.refresh()  # the engine noticed the new file first
+    assert catalog.names() == {"angry", "pant"}
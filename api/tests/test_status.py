@@ -101,3 +101,72 @@ def test_agent_skill(client):
     resp = client.get("/api/v1/agent/skill")
     assert resp.status_code == 200
     assert "skill" in resp.json()
+
+
+def test_rgb_cache_hit_on_repeated_mode(client):
+    mode = {"style": "speak", "color": "magenta", "bps": 2.0, "brightness": 0.5}
+    before = client.get("/api/v1/rgb/cache").json()
+    client.post("/api/v1/rgb/mode", json=mode)
+    client.post("/api/v1/rgb/mode", json={"style": "boom", "color": "red"})
+    client.post("/api/v1/rgb/mode", json=mode)
+    after = client.get("/api/v1/rgb/cache").json()
+    assert after["hits"] - before["hits"] >= 1
+    assert after["bytes"] <= after["max_bytes"]
+
+
+def test_rgb_bus_stats(client):
+    resp = client.get("/api/v1/rgb/bus")
+    assert resp.status_code == 200
+    assert set(resp.json()) == {
+        "bytes_written", "bytes_saved", "frames_written", "frames_skipped", "offloaded"
+    }
+
+
+def test_rgb_mode_offload(client):
+    resp = client.post(
+        "/api/v1/rgb/mode", json={"style": "breath", "color": "cyan", "offload": True}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["offload"] is True
+    assert client.get("/api/v1/rgb/bus").json()["offloaded"] is True
+
+    # Streamed styles fall back to software rendering
+    client.post("/api/v1/rgb/mode", json={"style": "boom", "color": "red", "offload": True})
+    assert client.get("/api/v1/rgb/bus").json()["offloaded"] is False
+
+
+def test_sound_library(client):
+    resp = client.get("/api/v1/sound/library")
+    assert resp.status_code == 200
+    library = {s["name"]: s for s in resp.json()}
+    assert len(library) == 12
+    assert library["angry"]["format"] == "wav"
+    assert library["angry"]["transcoded"] is None
+    assert abs(library["angry"]["duration_s"] - 2.033) < 0.01
+    assert library["howling"]["format"] == "mp3"
+    assert abs(library["howling"]["duration_s"] - 4.7) < 0.1
+    assert library["howling"]["sample_rate"] == 44100
+
+
+def test_sound_mixer_priorities_and_stop(client):
+    client.post("/api/v1/sound/stop")
+    howl = client.post("/api/v1/sound/play", json={"name": "howling"}).json()["voice"]
+    assert howl["priority"] == 0
+    for _ in range(7):
+        client.post("/api/v1/sound/play", json={"name": "single_bark_1", "priority": 2})
+
+    # All channels busy: a normal sound steals the low-priority howl...
+    resp = client.post("/api/v1/sound/play", json={"name": "woohoo"})
+    assert resp.status_code == 200
+    voices = client.get("/api/v1/sound/voices").json()
+    assert howl["id"] not in [v["id"] for v in voices["voices"]]
+    assert voices["busy"] == voices["channels"]
+
+    # ...but nothing below high priority can displace the barks and woohoo
+    resp = client.post("/api/v1/sound/play", json={"name": "snoring"})
+    assert resp.status_code == 409
+
+    resp = client.post("/api/v1/sound/stop", json={"voice": 999})
+    assert resp.json()["stopped"] == 0
+    assert client.post("/api/v1/sound/stop").json()["stopped"] == 8
+    assert client.get("/api/v1/sound/voices").json()["busy"] == 0
@@ -0,0 +1,133 @@
+"""Tests for the phrase-level TTS cache and the speak endpoints."""
+
+import asyncio
+import sys
+from types import SimpleNamespace
+
+from app.services.tts import PhraseCache, PiperEngine, TTSService, ToneEngine, normalize, split_phrases
+
+# Stands in for the piper binary in --output_dir mode: one WAV per stdin line
+_FAKE_PIPER = f"""#!{sys.executable}
+import os, sys, wave
+out = sys.argv[sys.argv.index("--output_dir") + 1]
+for n, line in enumerate(sys.stdin):
+    path = os.path.join(out, f"{{os.getpid()}}-{{n}}.wav")
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(22050)
+        w.writeframes(b"\\x01\\x00" * 100 * len(line.split()))
+    print(path, flush=True)
+"""
+
+
+class _FakeSettings:
+    tts_voice = "test"
+    tts_memory_cache_bytes = 1024 * 1024
+
+    def __init__(self, cache_dir):
+        self.tts_cache_dir = str(cache_dir)
+
+
+class _FakeStream:
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def write(self, pcm):
+        self.chunks.append(pcm)
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+def _service(stream):
+    return SimpleNamespace(open_audio_stream=lambda rate, priority: stream)
+
+
+def test_split_and_normalize():
+    assert split_phrases("Woof! I see a ball.  Let's play") == ["Woof!", "I see a ball.", "Let's play"]
+    assert normalize("  Hello   THERE ") == "hello there"
+
+
+async def test_speak_streams_then_caches(tmp_path):
+    stream = _FakeStream()
+    tts = TTSService(_service(stream), _FakeSettings(tmp_path), engine=ToneEngine())
+
+    first = await tts.speak("Woof woof! Good dog.")
+    assert first["phrases"] == 2 and first["cached_phrases"] == 0
+    assert len(stream.chunks) == 4  # one chunk per word, written as synthesized
+    assert stream.closed
+
+    again = await tts.speak("good   DOG.")
+    assert again["cached_phrases"] == 1
+    assert tts.stats()["memory_hits"] == 1
+
+
+async def test_disk_cache_survives_restart(tmp_path):
+    await TTSService(_service(None), _FakeSettings(tmp_path), engine=ToneEngine()).speak("Sit.")
+    restarted = TTSService(_service(None), _FakeSettings(tmp_path), engine=ToneEngine())
+    result = await restarted.speak("Sit.")
+    assert result["cached_phrases"] == 1
+    assert result["played"] is False
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_cache_key_depends_on_voice():
+    assert PhraseCache.key("tone", "a", "Hi") != PhraseCache.key("tone", "b", "Hi")
+    assert PhraseCache.key("tone", "a", "Hi") == PhraseCache.key("tone", "a", " hi ")
+
+
+def test_speak_endpoint(client):
+    resp = client.post("/api/v1/agent/speak", json={"text": "Hello! I am PiDog."})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["phrases"] == 2
+    assert data["played"] is True
+    assert data["first_audio_ms"] is not None
+    assert client.get("/api/v1/agent/tts").json()["engine"] == "tone"
+
+
+def _piper(tmp_path) -> PiperEngine:
+    binary = tmp_path / "piper"
+    binary.write_text(_FAKE_PIPER)
+    binary.chmod(0o755)
+    return PiperEngine(str(binary), str(tmp_path / "models"))
+
+
+async def test_piper_loads_each_voice_once(tmp_path):
+    engine = _piper(tmp_path)
+    try:
+        lengths = []
+        for phrase in ("Woof!", "Good dog.", "Let's play ball."):
+            lengths.append(len(b"".join([c async for c in engine.synthesize(phrase, "a")])))
+        assert lengths == [200, 400, 600]
+        assert [c async for c in engine.synthesize("Hi.", "b")]
+        assert engine.starts == 2
+    finally:
+        await engine.close()
+
+
+async def test_piper_restarts_after_cancelled_phrase(tmp_path):
+    engine = _piper(tmp_path)
+    try:
+        await anext(engine.synthesize("Warm up.", "a"))
+        task = asyncio.create_task(anext(engine.synthesize("Cut off.", "a")))
+        await asyncio.sleep(0)
+        task.cancel()
+        chunks = [c async for c in engine.synthesize("Next one.", "a")]
+        assert len(b"".join(chunks)) == 400  # not the cancelled phrase's audio
+        assert engine.starts == 2
+    finally:
+        await engine.close()
+
+
+async def test_stop_cancels_background_speech(tmp_path):
+    tts = TTSService(_service(None), _FakeSettings(tmp_path), engine=ToneEngine(word_delay_s=0.5))
+    tts.speak_background("A long answer that takes a while.")
+    await asyncio.sleep(0.01)
+    task = next(iter(tts._tasks))
+    await tts.stop()
+    await asyncio.sleep(0)
+    assert task.cancelled()
@@ -0,0 +1,395 @@
+"""Tests for WebSocket fanout: per-client outboxes, channel policies, slow clients."""
+
+import asyncio
+import json
+import time
+
+from app.websocket import encoding
+from app.websocket.change_filter import SENSOR_DEADBANDS, ChangeFilter, flatten
+from app.websocket.encoding import decode_struct, encode_struct
+from app.websocket.manager import ConnectionManager, Outbox, SensorStream
+
+SENSORS = {"distance": 42.5, "imu": {"pitch": 2.25, "roll": -1.5}, "touch": "LS", "sound_direction": 180}
+
+
+class _FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.messages: list[dict] = []
+        self.closed_code: int | None = None
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, payload: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.messages.append(json.loads(payload))
+
+    async def send_bytes(self, payload: bytes) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.messages.append(payload)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_code = code
+
+
+async def test_broadcast_does_not_wait_for_clients():
+    manager = ConnectionManager(send_timeout_s=1.0)
+    clients = [_FakeWebSocket(delay=0.05) for _ in range(10)]
+    for ws in clients:
+        await manager.connect(ws)
+
+    start = time.perf_counter()
+    await manager.broadcast("sensors", {"distance": 42.0})
+    assert time.perf_counter() - start < 0.02
+
+    await asyncio.sleep(0.15)  # sequential sends would take 0.5 s
+    assert all(ws.messages[0]["data"] == {"distance": 42.0} for ws in clients)
+
+
+async def test_slow_client_does_not_delay_others():
+    manager = ConnectionManager(send_timeout_s=0.05)
+    fast, slow = _FakeWebSocket(), _FakeWebSocket(delay=1.0)
+    await manager.connect(fast)
+    await manager.connect(slow)
+
+    await manager.broadcast("sensors", {})
+    await asyncio.sleep(0.02)
+    assert len(fast.messages) == 1
+    await asyncio.sleep(0.06)
+    assert manager.active_connections[slow].strikes == 1
+
+
+def test_outbox_latest_wins():
+    outbox = Outbox(size=10)
+    for i in range(5):
+        outbox.put("sensors", json.dumps({"i": i}))
+    outbox.put("action_status", "{}")
+    assert outbox.depths()["latest_wins"] == 2
+    assert outbox.replaced == 4
+    assert json.loads(outbox.pop()[1]) == {"i": 4}
+
+
+def test_outbox_logs_drop_oldest_with_marker():
+    outbox = Outbox(size=3)
+    for i in range(5):
+        outbox.put("logs", json.dumps({"i": i}))
+    assert outbox.dropped == 2
+
+    marker = json.loads(outbox.pop()[1])
+    assert marker["type"] == "logs_dropped"
+    assert marker["data"]["dropped"] == 2
+    assert [json.loads(outbox.pop()[1])["i"] for _ in range(3)] == [2, 3, 4]
+    assert outbox.pop() is None
+
+
+def test_outbox_status_must_deliver():
+    outbox = Outbox(size=2)
+    assert outbox.put("status", "a")
+    assert outbox.put("status", "b")
+    assert not outbox.put("status", "c")  # never silently dropped
+    outbox.put("sensors", "s")
+    assert outbox.pop()[1] == "a"  # must-deliver goes first
+
+
+async def test_status_overflow_evicts_client():
+    manager = ConnectionManager(send_timeout_s=5.0, queue_size=2)
+    stuck = _FakeWebSocket(delay=10.0)
+    await manager.connect(stuck)
+    for _ in range(4):
+        await manager.broadcast("status", {})
+    await asyncio.sleep(0.01)
+    assert stuck not in manager.active_connections
+    assert stuck.closed_code == 1013
+
+
+class _AckingCommands:
+    def execute(self, message: dict, source=None) -> dict:
+        return {"seq": message.get("seq"), "command": message["type"], "ok": True}
+
+    def forget(self, source) -> None:
+        pass
+
+
+async def test_ack_overflow_evicts_client():
+    manager = ConnectionManager(send_timeout_s=5.0, queue_size=2, commands=_AckingCommands())
+    stuck = _FakeWebSocket(delay=10.0)
+    await manager.connect(stuck)
+    for seq in range(4):
+        await manager.handle_message(stuck, {"type": "tail", "seq": seq, "angle": 0})
+    await asyncio.sleep(0.01)
+    assert stuck not in manager.active_connections
+    assert stuck.closed_code == 1013
+
+
+async def test_slow_client_downgraded_then_evicted():
+    manager = ConnectionManager(send_timeout_s=0.01, max_slow_strikes=2, default_rate_hz=1000)
+    fast, slow = _FakeWebSocket(), _FakeWebSocket(delay=0.03)
+    await manager.connect(fast)
+    await manager.connect(slow)
+
+    for _ in range(2):
+        await manager.broadcast("sensors", {})
+        await asyncio.sleep(0.02)
+    assert manager.active_connections[slow].downgraded
+    assert manager.active_connections[slow].outbox.depths()["latest_wins"] == 0
+
+    # Downgraded: high-rate channels are no longer queued for it at all
+    await manager.broadcast("sensors", {})
+    assert manager.active_connections[slow].outbox.depths()["latest_wins"] == 0
+
+    for _ in range(2):
+        await manager.broadcast("status", {})
+    await asyncio.sleep(0.1)
+    assert slow not in manager.active_connections
+    assert slow.closed_code == 1013
+    assert fast in manager.active_connections
+    assert len(fast.messages) == 5
+
+    metrics = manager.get_metrics()
+    assert metrics["clients"] == 1
+    assert metrics["downgraded"] == 1
+    assert metrics["evicted"] == 1
+    assert metrics["timeouts"] == 4
+
+
+async def test_metrics_show_queue_depths():
+    manager = ConnectionManager(send_timeout_s=1.0)
+    ws = _FakeWebSocket(delay=0.05)
+    await manager.connect(ws)
+    for _ in range(3):
+        await manager.broadcast("logs", {"message": "x"})
+    await asyncio.sleep(0.01)
+
+    conn = manager.get_metrics()["connections"][0]
+    assert conn["queue"]["drop_oldest"] == 2  # one in flight
+    await asyncio.sleep(0.2)
+    assert manager.get_metrics()["connections"][0]["sent"] == 3
+
+
+async def test_failed_send_disconnects_client():
+    class _Broken(_FakeWebSocket):
+        async def send_text(self, payload):
+            raise RuntimeError("connection reset")
+
+    manager = ConnectionManager()
+    ws = _Broken()
+    await manager.connect(ws)
+    await manager.broadcast("status", {})
+    await asyncio.sleep(0.01)
+    assert ws not in manager.active_connections
+    assert manager.get_metrics()["evicted"] == 0
+
+
+def test_struct_roundtrip():
+    frame = encode_struct({"type": "sensors", "timestamp": 1700000000.5, "data": SENSORS})
+    assert isinstance(frame, bytes) and len(frame) == 24
+    assert decode_struct(frame) == {"type": "sensors", "timestamp": 1700000000.5, "data": SENSORS}
+
+    status = {"state": "actions", "current_action": "wag tail", "queue_size": 2, "posture": "sit"}
+    frame = encode_struct({"type": "action_status", "timestamp": 1.0, "data": status})
+    assert decode_struct(frame)["data"] == status
+
+
+def test_struct_falls_back_to_json_for_other_channels():
+    payload = encode_struct({"type": "status", "timestamp": 1.0, "data": {"uptime": 5}})
+    assert json.loads(payload)["data"] == {"uptime": 5}
+
+
+async def test_struct_negotiation_sends_schema_then_binary():
+    manager = ConnectionManager()
+    ws = _FakeWebSocket()
+    await manager.connect(ws)
+    await manager.handle_message(ws, {"type": "subscribe", "encoding": "struct"})
+    await manager.broadcast("sensors", SENSORS)
+    await asyncio.sleep(0.01)
+
+    ack, frame = ws.messages
+    assert ack["type"] == "encoding"
+    assert ack["data"]["encoding"] == "struct"
+    assert ack["data"]["schema"]["sensors"]["format"] == "<BdfffBh"
+    assert decode_struct(frame)["data"] == SENSORS
+    assert manager.active_connections[ws].channels == {"sensors", "action_status", "status", "logs"}
+
+
+async def test_unavailable_encoding_falls_back_to_json(monkeypatch):
+    monkeypatch.setattr(encoding, "msgpack", None)
+    manager = ConnectionManager()
+    ws = _FakeWebSocket()
+    await manager.connect(ws)
+    await manager.handle_message(ws, {"type": "subscribe", "encoding": "msgpack"})
+    await asyncio.sleep(0.01)
+    assert ws.messages[0]["data"]["encoding"] == "json"
+    assert "msgpack" not in ws.messages[0]["data"]["available"]
+
+
+async def test_encoded_once_per_encoding():
+    manager = ConnectionManager()
+    clients = [_FakeWebSocket() for _ in range(4)]
+    for ws in clients:
+        await manager.connect(ws)
+    for ws in clients[:3]:
+        await manager.handle_message(ws, {"type": "subscribe", "encoding": "struct"})
+    await manager.broadcast("sensors", SENSORS)
+    await asyncio.sleep(0.01)
+
+    stats = manager.get_metrics()["encodings"]
+    assert stats["struct"]["messages"] == 1
+    assert stats["json"]["messages"] == 1
+    assert stats["struct"]["avg_bytes"] < stats["json"]["avg_bytes"]
+    assert isinstance(clients[0].messages[-1], bytes)
+    assert clients[0].messages[-1] is clients[1].messages[-1]
+
+
+def test_change_filter_deadbands():
+    f = ChangeFilter(SENSOR_DEADBANDS, keyframe_s=5.0)
+    assert f.should_publish(flatten(SENSORS), now=0.0)  # first sample
+    assert not f.should_publish(flatten({**SENSORS, "imu": {"pitch": 2.35, "roll": -1.5}}), now=0.2)
+    assert not f.should_publish(flatten({**SENSORS, "distance": 43.0}), now=0.4)
+    assert f.should_publish(flatten({**SENSORS, "distance": 43.5}), now=0.6)
+    assert f.should_publish(flatten({**SENSORS, "distance": 43.5, "touch": "N"}), now=0.8)
+    assert f.stats() == {"published": 3, "suppressed": 2}
+
+
+def test_change_filter_drift_crosses_band():
+    f = ChangeFilter({"imu.pitch": 0.2}, keyframe_s=60.0)
+    f.should_publish({"imu.pitch": 0.0}, now=0.0)
+    published = [f.should_publish({"imu.pitch": 0.05 * i}, now=float(i)) for i in range(1, 6)]
+    assert published == [False, False, False, True, False]
+
+
+def test_change_filter_keyframe():
+    f = ChangeFilter(keyframe_s=5.0)
+    assert f.should_publish({"state": "standby"}, now=0.0)
+    assert not f.should_publish({"state": "standby"}, now=4.9)
+    assert f.should_publish({"state": "standby"}, now=5.0)
+
+
+class _StillService:
+    def __init__(self):
+        from app.models.actions import ActionQueueStatus
+        from app.models.sensors import SensorData
+
+        self.sensors = SensorData(**SENSORS)
+        self.queue = ActionQueueStatus(state="standby", posture="lie")
+
+        self.calls = {"sensors": 0, "queue": 0, "status": 0}
+
+    def get_sensor_data(self):
+        self.calls["sensors"] += 1
+        return self.sensors
+
+    def get_queue_status(self):
+        self.calls["queue"] += 1
+        return self.queue
+
+    def get_status(self):
+        self.calls["status"] += 1
+        return self.queue
+
+
+async def test_sensor_stream_publishes_only_changes():
+    manager = ConnectionManager(default_rate_hz=200, max_rate_hz=200)
+    ws = _FakeWebSocket()
+    await manager.connect(ws)
+    stream = SensorStream(_StillService(), manager, status_hz=0.01, keyframe_s=60.0)
+    stream.start()
+    await asyncio.sleep(0.1)
+    stream.stop()
+
+    types = [m["type"] for m in ws.messages]
+    assert types.count("sensors") == 1
+    assert types.count("action_status") == 1
+    assert stream.get_metrics()["channels"]["sensors"]["suppressed"] > 5
+
+
+async def test_new_client_gets_current_state():
+    manager = ConnectionManager()
+    await manager.broadcast("sensors", SENSORS)
+    await manager.broadcast("logs", {"message": "not replayed"})
+
+    ws = _FakeWebSocket()
+    await manager.connect(ws)
+    await manager.handle_message(ws, {"type": "subscribe", "encoding": "struct"})
+    await asyncio.sleep(0.01)
+
+    ack, frame = ws.messages  # the JSON copy queued on connect is replaced
+    assert ack["type"] == "encoding"
+    assert decode_struct(frame)["data"] == SENSORS
+
+
+async def test_per_client_rates_decimate():
+    manager = ConnectionManager(default_rate_hz=5, max_rate_hz=50)
+    dashboard, phone = _FakeWebSocket(), _FakeWebSocket()
+    await manager.connect(dashboard)
+    await manager.connect(phone)
+    await manager.handle_message(dashboard, {"type": "subscribe", "rates": {"sensors": 100}})
+    await manager.handle_message(phone, {"type": "subscribe", "rates": {"sensors": 10}})
+    assert manager.sample_rate() == 50  # capped
+
+    for i in range(25):  # 0.5 s at 50 Hz
+        await manager.broadcast("sensors", {**SENSORS, "distance": float(i)})
+        await manager.release_held()
+        await asyncio.sleep(0.02)
+    await asyncio.sleep(0.01)
+
+    assert 20 <= len(dashboard.messages) <= 25
+    assert 4 <= len(phone.messages) <= 7
+    metrics = manager.get_metrics()["connections"]
+    assert metrics[1]["rates"]["sensors"] == 10
+    assert metrics[1]["rates"]["action_status"] == 5
+
+
+async def test_decimated_change_is_delivered_late_not_lost():
+    manager = ConnectionManager(default_rate_hz=2)
+    ws = _FakeWebSocket()
+    await manager.connect(ws)
+    await manager.broadcast("sensors", SENSORS)
+    await manager.broadcast("sensors", {**SENSORS, "distance": 10.0})  # within the slot: held
+    await asyncio.sleep(0.01)
+    assert len(ws.messages) == 1
+
+    await asyncio.sleep(0.5)
+    await manager.release_held()
+    await asyncio.sleep(0.01)
+    assert ws.messages[-1]["data"]["distance"] == 10.0
+
+
+async def test_sensor_stream_idles_without_subscribers():
+    manager = ConnectionManager(default_rate_hz=100)
+    service = _StillService()
+    stream = SensorStream(service, manager, status_hz=0.01)
+    stream.start()
+    await asyncio.sleep(0.05)
+    assert service.calls == {"sensors": 0, "queue": 0, "status": 0}
+
+    ws = _FakeWebSocket()
+    await manager.connect(ws)
+    await manager.handle_message(ws, {"type": "subscribe", "channels": ["status"]})
+    await asyncio.sleep(0.02)  # woken by the subscription, not a timer
+    assert service.calls["status"] == 1
+    assert service.calls["sensors"] == 0
+    assert [m["type"] for m in ws.messages] == ["status"]
+
+    await manager.handle_message(ws, {"type": "subscribe", "channels": ["sensors"]})
+    await asyncio.sleep(0.02)
+    stream.stop()
+    assert service.calls["sensors"] > 0
+    assert ws.messages[-1]["type"] == "sensors"
+
+    channels = stream.get_metrics()["channels"]
+    assert channels["sensors"]["active"]
+    assert not channels["status"]["active"]
+    assert channels["action_status"]["ticks"] == 0
+    assert channels["action_status"]["cpu_saved_s"] is None
+    assert channels["status"]["cpu_saved_s"] is not None
+
+
+def test_websocket_metrics_endpoint(client):
+    resp = client.get("/api/v1/status/websocket")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["clients"] == 0
+    assert data["queue_size"] > 0
@@ -0,0 +1,81 @@
+"""Tests for servo and action commands over the WebSocket."""
+
+from unittest.mock import patch
+
+
+def _ack(ws) -> dict:
+    """Next ack, skipping any streamed state messages."""
+    while True:
+        msg = ws.receive_json()
+        if msg["type"] == "ack":
+            return msg["data"]
+
+
+def _mute(ws) -> None:
+    ws.send_json({"type": "subscribe", "channels": []})
+
+
+def test_head_command_acked_and_applied(client):
+    with client.websocket_connect("/api/v1/ws") as ws:
+        _mute(ws)
+        ws.send_json({"type": "head", "seq": 7, "yaw": 20, "roll": 0, "pitch": -10, "speed": 80})
+        assert _ack(ws) == {"seq": 7, "command": "head", "ok": True}
+    assert client.get("/api/v1/servos/positions").json()["head"][0] == 20
+
+
+def test_out_of_range_rejected_with_reason(client):
+    with client.websocket_connect("/api/v1/ws") as ws:
+        _mute(ws)
+        ws.send_json({"type": "tail", "seq": 1, "angle": 120})
+        ack = _ack(ws)
+        assert ack["seq"] == 1 and not ack["ok"]
+        assert "angle" in ack["error"]
+
+        ws.send_json({"type": "legs", "seq": 2, "angles": [0, 0, 0]})
+        assert not _ack(ws)["ok"]
+
+        ws.send_json({"type": "action", "seq": 3, "actions": ["moonwalk"]})
+        ack = _ack(ws)
+        assert not ack["ok"] and "Unknown actions" in ack["error"]
+
+
+def test_servo_commands_not_rate_limited(client):
+    with client.websocket_connect("/api/v1/ws") as ws:
+        _mute(ws)
+        for seq in range(30):
+            ws.send_json({"type": "tail", "seq": seq, "angle": seq})
+        acks = [_ack(ws) for _ in range(30)]
+    assert [a["seq"] for a in acks] == list(range(30))
+    assert all(a["ok"] for a in acks)
+
+
+def test_action_command_queues_and_is_rate_limited(client):
+    with client.websocket_connect("/api/v1/ws") as ws:
+        _mute(ws)
+        ws.send_json({"type": "action", "seq": 1, "actions": ["wag tail"]})
+        ack = _ack(ws)
+        assert ack["ok"] and ack["result"] == ["wag tail"]
+
+        for seq in range(2, 14):
+            ws.send_json({"type": "action", "seq": seq, "actions": ["wag tail"]})
+        acks = [_ack(ws) for _ in range(12)]
+    assert any("Rate limit" in a.get("error", "") for a in acks)
+    stats = client.get("/api/v1/status/websocket").json()["commands"]
+    assert stats["action"]["rejected"] >= 1
+
+
+def test_service_error_acked_and_connection_kept(client):
+    service = client.app.state.pidog
+
+    def broken(*args, **kwargs):
+        raise OSError(121, "Remote I/O error")
+
+    with patch.object(service, "set_tail", broken):
+        with client.websocket_connect("/api/v1/ws") as ws:
+            _mute(ws)
+            ws.send_json({"type": "tail", "seq": 1, "angle": 10})
+            ack = _ack(ws)
+            assert ack["seq"] == 1 and not ack["ok"] and "Remote I/O error" in ack["error"]
+
+            ws.send_json({"type": "head", "seq": 2, "yaw": 0, "roll": 0, "pitch": 0})
+            assert _ack(ws) == {"seq": 2, "command": "head", "ok": True}